@@ -1,6 +1,8 @@
 # apps/core/admin.py
 # Importamos el módulo 'admin' de Django
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 # Importamos los modelos que hemos creado en 'core'
 from .models import (
     CatTipoCuenta, Condominio, CatPlan, Suscripcion,
@@ -10,7 +12,7 @@ from .models import (
     GastoCategoria, Gasto,
     # --- NUEVOS MODELOS FALTANTES ---
     ParamReglamento, FondoReservaMov, InteresRegla, Auditoria, CondominioAnexoRegla,
-    Notificacion, CuentaContable, LibroMovimiento, ResumenMensual
+    Notificacion, CuentaContable, LibroMovimiento, ResumenMensual, CorreoSaliente, CredencialApi
 )
 
 # --- INICIO: Admin para Catálogos de Unidad ---
@@ -273,11 +275,26 @@ class CondominioAnexoReglaAdmin(admin.ModelAdmin):
     list_filter = ('id_condominio', 'anexo_tipo')
     raw_id_fields = ('id_condominio', 'id_viv_subtipo')
 
+class PaginadorConteoAcotado(Paginator):
+    """
+    Cuenta como máximo `LIMITE` filas: en tablas enormes el COUNT(*) del changelist es lo
+    más caro de la página. Más allá del límite se navega con los filtros.
+    """
+    LIMITE = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list[:self.LIMITE].count()
+
 @admin.register(Auditoria)
 class AuditoriaAdmin(admin.ModelAdmin):
     list_display = ('created_at', 'usuario_email', 'accion', 'entidad', 'entidad_id')
     list_filter = ('accion', 'entidad', 'created_at')
-    search_fields = ('usuario_email', 'entidad_id', 'detalle')
+    # Búsquedas exactas, por los índices ix_auditoria_usuario / ix_auditoria_entidad.
+    # 'detalle' (JSON) queda fuera: buscar en él recorre la tabla completa.
+    search_fields = ('=usuario_email', '=entidad')
+    paginator = PaginadorConteoAcotado
+    show_full_result_count = False
     # La auditoría debe ser de solo lectura
     def has_add_permission(self, request):
         return False
@@ -293,6 +310,29 @@ class NotificacionAdmin(admin.ModelAdmin):
     search_fields = ('usuario__email', 'titulo', 'mensaje')
     raw_id_fields = ('usuario',)
 
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'asunto', 'estado', 'intentos', 'proximo_intento_at', 'enviado_at')
+    list_filter = ('estado',)
+    search_fields = ('asunto',)
+    readonly_fields = ('created_at', 'enviado_at', 'ultimo_error')
+
+@admin.register(CredencialApi)
+class CredencialApiAdmin(admin.ModelAdmin):
+    # Se emiten con el comando crear_credencial_api (el token solo se muestra ahí)
+    list_display = ('nombre', 'id_condominio', 'prefijo', 'activa', 'created_at')
+    list_filter = ('activa', 'id_condominio')
+    search_fields = ('nombre', 'prefijo')
+    readonly_fields = ('prefijo', 'clave_hash', 'created_at')
+    actions = ['revocar']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Revocar credenciales seleccionadas')
+    def revocar(self, request, queryset):
+        queryset.update(activa=False)
+
 @admin.register(CuentaContable)
 class CuentaContableAdmin(admin.ModelAdmin):
     list_display = ('codigo', 'nombre')
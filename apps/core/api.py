@@ -0,0 +1,250 @@
+# apps/core/api.py
+"""
+API JSON de solo lectura (v1) para integraciones: contabilidad, BI, etc.
+
+Autenticación: `Authorization: Bearer <token>` con una CredencialApi del condominio, o la
+sesión de un administrador del condominio. Sin credenciales responde 401 en JSON (nunca
+redirige al login).
+
+Cada recurso se consulta por condominio con:
+- ?fields=a,b,c   campos a devolver (por defecto todos los del recurso)
+- ?desde=YYYYMM&hasta=YYYYMM   rango de periodos
+- ?cursor=...&limit=N   paginación por cursor (ver utils.paginar_keyset)
+
+Las filas salen de values() como dicts planos, sin instanciar modelos. El ETag se arma con
+Condominio.version_datos y la consulta pedida: un cliente que repite la consulta con
+If-None-Match recibe 304 antes de ejecutarla.
+"""
+import hashlib
+import json
+import secrets
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+
+from apps.usuarios.decorators import es_admin, condominios_administrados
+from .models import Condominio, CredencialApi, Cobro, Pago, Gasto, ResumenMensual, Unidad
+from .utils import paginar_keyset, es_periodo
+
+
+# --- INICIO: Definición de recursos ---
+# 'campos' mapea el nombre público de cada campo a su ruta en el ORM, así el contrato
+# de la API no cambia si se renombra una columna o una relación.
+# 'orden' debe ser un orden total (el último campo es la PK); sus campos siempre se
+# incluyen en la respuesta porque el cursor se arma con ellos.
+
+def _unidades(condominio):
+    # Subconsulta: el filtro queda sobre id_unidad de la tabla principal (mismo criterio que pagos_list_view)
+    return Unidad.objects.filter(id_grupo__id_condominio=condominio).values('id_unidad')
+
+
+RECURSOS = {
+    'cobros': {
+        'consulta': lambda condominio: Cobro.objects.filter(id_unidad__in=_unidades(condominio)),
+        'orden': ('periodo', 'id_cobro'),
+        'campos': {
+            'id_cobro': 'id_cobro',
+            'periodo': 'periodo',
+            'id_unidad': 'id_unidad',
+            'unidad': 'id_unidad__codigo',
+            'tipo': 'tipo',
+            'estado': 'id_cobro_estado__codigo',
+            'emitido_at': 'emitido_at',
+            'total_cargos': 'total_cargos',
+            'total_descuentos': 'total_descuentos',
+            'total_interes': 'total_interes',
+            'total_pagado': 'total_pagado',
+            'saldo': 'saldo',
+            'observacion': 'observacion',
+        },
+    },
+    'pagos': {
+        'consulta': lambda condominio: Pago.objects.filter(id_unidad__in=_unidades(condominio)),
+        'orden': ('fecha_pago', 'id_pago'),
+        'campos': {
+            'id_pago': 'id_pago',
+            'fecha_pago': 'fecha_pago',
+            'periodo': 'periodo',
+            'id_unidad': 'id_unidad',
+            'unidad': 'id_unidad__codigo',
+            'tipo': 'tipo',
+            'monto': 'monto',
+            'metodo_pago': 'id_metodo_pago__codigo',
+            'ref_externa': 'ref_externa',
+            'observacion': 'observacion',
+        },
+    },
+    'gastos': {
+        'consulta': lambda condominio: Gasto.objects.filter(id_condominio=condominio),
+        'orden': ('periodo', 'id_gasto'),
+        'campos': {
+            'id_gasto': 'id_gasto',
+            'periodo': 'periodo',
+            'categoria': 'id_gasto_categ__nombre',
+            'id_proveedor': 'id_proveedor',
+            'proveedor': 'id_proveedor__nombre',
+            'doc_tipo': 'id_doc_tipo__codigo',
+            'documento_folio': 'documento_folio',
+            'fecha_emision': 'fecha_emision',
+            'fecha_venc': 'fecha_venc',
+            'neto': 'neto',
+            'iva': 'iva',
+            'total': 'total',
+            'estado_validacion': 'estado_validacion',
+            'descripcion': 'descripcion',
+        },
+    },
+    'resumenes': {
+        'consulta': lambda condominio: ResumenMensual.objects.filter(id_condominio=condominio),
+        'orden': ('periodo', 'id_resumen'),
+        'campos': {
+            'id_resumen': 'id_resumen',
+            'periodo': 'periodo',
+            'total_gastos': 'total_gastos',
+            'total_cargos': 'total_cargos',
+            'total_interes': 'total_interes',
+            'total_descuentos': 'total_descuentos',
+            'total_pagado': 'total_pagado',
+            'saldo_por_cobrar': 'saldo_por_cobrar',
+            'generado_at': 'generado_at',
+        },
+    },
+}
+
+# --- FIN: Definición de recursos ---
+
+
+def _error(mensaje, status=400, **extra):
+    return JsonResponse({'error': mensaje, **extra}, status=status)
+
+
+# --- INICIO: Autenticación ---
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def emitir_credencial(condominio, nombre):
+    """
+    Crea una CredencialApi para el condominio y retorna (credencial, token).
+    El token no se guarda: quien lo emite debe entregarlo en ese momento.
+    """
+    prefijo = secrets.token_hex(4)
+    token = f"{prefijo}.{secrets.token_urlsafe(32)}"
+    credencial = CredencialApi.objects.create(
+        id_condominio=condominio, nombre=nombre, prefijo=prefijo, clave_hash=_hash_token(token)
+    )
+    return credencial, token
+
+
+def autenticar_api(view_func):
+    """
+    Exige un token Bearer del condominio de la URL o la sesión de un administrador del
+    condominio. Los rechazos son JSON (401 sin credenciales, 403 sin acceso), no redirecciones.
+    """
+    @wraps(view_func)
+    def _vista(request, condominio_id, *args, **kwargs):
+        encabezado = request.headers.get('Authorization', '')
+        if encabezado.startswith('Bearer '):
+            # Una consulta por el índice único de clave_hash
+            condominio_credencial = CredencialApi.objects.filter(
+                clave_hash=_hash_token(encabezado[len('Bearer '):].strip()), activa=True
+            ).values_list('id_condominio', flat=True).first()
+            if condominio_credencial is None:
+                return _error("Credencial inválida o revocada", status=401)
+            if condominio_credencial != int(condominio_id):
+                return _error("La credencial no corresponde a este condominio", status=403)
+        elif not request.user.is_authenticated:
+            response = _error("Se requiere autenticación", status=401)
+            response['WWW-Authenticate'] = 'Bearer'
+            return response
+        else:
+            ids = condominios_administrados(request) if es_admin(request.user) else frozenset()
+            if ids is not None and int(condominio_id) not in ids:
+                return _error("Sin acceso a este condominio", status=403)
+        return view_func(request, condominio_id, *args, **kwargs)
+    return _vista
+
+# --- FIN: Autenticación ---
+
+
+def _valores(queryset, campos, mapeo):
+    """
+    values() con los nombres públicos: los que coinciden con la ruta van tal cual y el
+    resto como alias F() (un alias no puede llamarse igual que un campo del modelo).
+    """
+    directos = [campo for campo in campos if mapeo[campo] == campo]
+    alias = {campo: F(mapeo[campo]) for campo in campos if mapeo[campo] != campo}
+    return queryset.values(*directos, **alias)
+
+
+@require_GET
+@autenticar_api
+def api_listar(request, condominio_id, recurso):
+    """
+    GET /api/v1/condominio/<id>/<recurso>/
+    Responde {"datos": [...], "siguiente": cursor, "anterior": cursor}.
+    """
+    definicion = RECURSOS.get(recurso)
+    if definicion is None:
+        return _error("Recurso no encontrado", status=404, disponibles=list(RECURSOS))
+    version = Condominio.objects.filter(pk=condominio_id).values_list('version_datos', flat=True).first()
+    if version is None:
+        return _error("Condominio no encontrado", status=404)
+
+    # ETag por versión de datos + consulta: el 304 no ejecuta la consulta ni serializa
+    etag = quote_etag(hashlib.sha256(
+        f"{condominio_id}:{version}:{recurso}:{request.GET.urlencode()}".encode('utf-8')
+    ).hexdigest()[:32])
+    no_modificado = get_conditional_response(request, etag=etag)
+    if no_modificado is not None:
+        no_modificado['ETag'] = etag
+        return no_modificado
+
+    condominio = request.condominio
+    mapeo, orden = definicion['campos'], definicion['orden']
+
+    # Campos pedidos (los del orden se agregan siempre para poder armar el cursor)
+    if request.GET.get('fields'):
+        pedidos = [campo.strip() for campo in request.GET['fields'].split(',') if campo.strip()]
+        desconocidos = [campo for campo in pedidos if campo not in mapeo]
+        if desconocidos:
+            return _error(f"Campos desconocidos: {', '.join(desconocidos)}", disponibles=list(mapeo))
+        campos = list(dict.fromkeys([*pedidos, *orden]))
+    else:
+        campos = list(mapeo)
+
+    try:
+        limite = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        return _error("'limit' debe ser un entero")
+    limite = max(1, min(limite, settings.API_MAX_PAGE_SIZE))
+
+    queryset = definicion['consulta'](condominio)
+    for parametro, operador in (('desde', 'gte'), ('hasta', 'lte')):
+        valor = request.GET.get(parametro, '')
+        if valor:
+            if not es_periodo(valor):
+                return _error(f"'{parametro}' debe tener formato YYYYMM")
+            queryset = queryset.filter(**{f'periodo__{operador}': valor})
+
+    pagina = paginar_keyset(
+        _valores(queryset, campos, mapeo), orden,
+        cursor=request.GET.get('cursor'), tamano=limite
+    )
+
+    cuerpo = json.dumps(
+        {'datos': pagina.filas, 'siguiente': pagina.siguiente, 'anterior': pagina.anterior},
+        cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+    response = HttpResponse(cuerpo, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
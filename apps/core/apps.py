@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        # Conecta los receptores que mantienen Condominio.version_datos y los KPIs de gastos
+        from . import signals  # noqa: F401
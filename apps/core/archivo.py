@@ -0,0 +1,155 @@
+# apps/core/archivo.py
+"""
+Archivo histórico de auditoría y notificaciones en archivos JSONL comprimidos.
+
+Las filas más antiguas que la retención se escriben en ARCHIVO_DIR/<tabla>/ (una fila JSON
+por línea, agrupadas por mes de created_at) y se eliminan de la base en bloques. Cada bloque
+deja un archivo por mes, <AAAA-MM>.<pk inicial>.jsonl.gz: se escribe con extensión .tmp y se
+renombra recién al confirmar la transacción que elimina sus filas. Así nunca se reescribe lo
+ya archivado, la memoria usada no depende del tamaño de la tabla y una fila no queda dos
+veces en el archivo aunque el commit falle.
+
+leer_archivo() recorre los meses pedidos línea a línea, sin cargarlos en la base.
+"""
+import gzip
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Auditoria, Notificacion
+from .signals import contador_no_leidas_en_lote
+
+def _descontar_no_leidas(filas):
+    # Las no leídas que se archivan dejan de contar en Usuario.notificaciones_no_leidas
+    # (un UPDATE por cantidad distinta; las señales de Notificacion quedan suspendidas)
+    por_usuario = Counter(fila['usuario_id'] for fila in filas if not fila['leido'])
+    usuarios_por_cantidad = defaultdict(list)
+    for usuario_id, cantidad in por_usuario.items():
+        usuarios_por_cantidad[cantidad].append(usuario_id)
+    for cantidad, usuarios in usuarios_por_cantidad.items():
+        get_user_model().objects.filter(pk__in=usuarios).update(
+            notificaciones_no_leidas=Greatest(F('notificaciones_no_leidas') - cantidad, 0)
+        )
+
+
+# Tablas archivables: modelo, setting con los días de retención y qué hacer tras eliminar
+TABLAS = {
+    'auditoria': (Auditoria, 'AUDITORIA_RETENCION_DIAS', None),
+    'notificacion': (Notificacion, 'NOTIFICACION_RETENCION_DIAS', _descontar_no_leidas),
+}
+
+
+def _directorio(tabla):
+    return Path(settings.ARCHIVO_DIR) / tabla
+
+
+def _mes(fecha):
+    return timezone.localtime(fecha).strftime('%Y-%m')
+
+
+def _publicar(temporales):
+    # Después del commit: los archivos del bloque pasan a ser visibles para leer_archivo()
+    for temporal in temporales:
+        os.replace(temporal, temporal.with_suffix(''))
+
+
+def _recuperar_temporales(modelo, directorio):
+    """
+    Resuelve los .tmp que quedaron de una ejecución interrumpida: si sus filas siguen en la
+    base el bloque no se confirmó y se descarta; si ya no están, se confirmó y se publica.
+    """
+    pk = modelo._meta.pk.attname
+    for temporal in directorio.glob('*.jsonl.gz.tmp'):
+        with gzip.open(temporal, 'rt', encoding='utf-8') as archivo:
+            pks = [json.loads(linea)[pk] for linea in archivo]
+        if modelo.objects.filter(pk__in=pks).exists():
+            temporal.unlink()
+        else:
+            _publicar([temporal])
+
+
+def archivar_tabla(tabla, antes_de=None, bloque=1000):
+    """
+    Mueve al archivo las filas de `tabla` con created_at anterior a `antes_de` (por defecto,
+    hoy menos la retención configurada). Retorna la cantidad archivada.
+
+    Cada bloque se escribe y se elimina dentro de una transacción: si la escritura o el
+    commit fallan, las filas siguen en la base y sus archivos .tmp no se publican. Si el
+    proceso muere entre el commit y el renombre, la ejecución siguiente publica los .tmp
+    cuyas filas ya no están (ver _recuperar_temporales).
+    """
+    modelo, retencion, al_eliminar = TABLAS[tabla]
+    if antes_de is None:
+        antes_de = timezone.now() - timedelta(days=getattr(settings, retencion))
+    pk = modelo._meta.pk.attname
+    directorio = _directorio(tabla)
+    directorio.mkdir(parents=True, exist_ok=True)
+    _recuperar_temporales(modelo, directorio)
+
+    # Por el índice de created_at; el corte es fijo, así que el ciclo termina
+    pendientes = modelo.objects.filter(created_at__lt=antes_de).order_by('created_at', pk)
+    total = 0
+    while True:
+        temporales = []
+        try:
+            with transaction.atomic():
+                filas = list(pendientes.values()[:bloque])
+                if not filas:
+                    break
+                por_mes = {}
+                for fila in filas:
+                    por_mes.setdefault(_mes(fila['created_at']), []).append(fila)
+                for mes, filas_mes in por_mes.items():
+                    temporal = directorio / f'{mes}.{filas_mes[0][pk]:020d}.jsonl.gz.tmp'
+                    temporales.append(temporal)
+                    with gzip.open(temporal, 'wt', encoding='utf-8') as archivo:
+                        archivo.writelines(
+                            json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for fila in filas_mes
+                        )
+                transaction.on_commit(partial(_publicar, temporales))
+                # El contador de no leídas se descuenta en lote (al_eliminar), no por señal
+                with contador_no_leidas_en_lote():
+                    modelo.objects.filter(**{f'{pk}__in': [fila[pk] for fila in filas]}).delete()
+                if al_eliminar:
+                    al_eliminar(filas)
+        except BaseException:
+            # Bloque revertido: sus filas siguen en la base
+            for temporal in temporales:
+                temporal.unlink(missing_ok=True)
+            raise
+        total += len(filas)
+    return total
+
+
+def meses_archivados(tabla):
+    """Meses (AAAA-MM) con archivo para `tabla`, en orden."""
+    return sorted({ruta.name.split('.')[0] for ruta in _directorio(tabla).glob('*.jsonl.gz')})
+
+
+def leer_archivo(tabla, desde=None, hasta=None, **filtros):
+    """
+    Recorre las filas archivadas de `tabla` entre los meses `desde` y `hasta` (AAAA-MM,
+    inclusive) que coinciden exactamente con `filtros` (ej: entidad='Pago').
+    Es un generador: lee cada archivo en streaming, línea a línea y sin recordar filas (cada
+    fila está en un solo archivo publicado).
+    """
+    for mes in meses_archivados(tabla):
+        if (desde and mes < desde) or (hasta and mes > hasta):
+            continue
+        for ruta in sorted(_directorio(tabla).glob(f'{mes}*.jsonl.gz')):
+            with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+                for linea in archivo:
+                    fila = json.loads(linea)
+                    if all(str(fila.get(campo)) == str(valor) for campo, valor in filtros.items()):
+                        yield fila
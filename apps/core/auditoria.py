@@ -0,0 +1,104 @@
+# apps/core/auditoria.py
+"""
+Escritura de la auditoría en lotes.
+
+Las entradas registradas dentro de una transacción se acumulan por hilo y se insertan con
+un solo bulk_create al hacer commit (transaction.on_commit): una importación de miles de
+pagos escribe su auditoría en una sola consulta, después de confirmar. Si la transacción
+se revierte, sus entradas no se escriben. Fuera de una transacción se escriben al instante.
+
+Con AUDITORIA_SINCRONA = True cada entrada se inserta de inmediato dentro de la transacción
+del llamador, como antes (útil en tests que no ejecutan los callbacks de on_commit).
+"""
+import logging
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection, transaction
+from django.dispatch import receiver
+
+from .models import Auditoria
+
+logger = logging.getLogger(__name__)
+
+_buffer = threading.local()
+
+
+def _estado():
+    if not hasattr(_buffer, 'confirmadas'):
+        _buffer.confirmadas = []
+        # Última entrada registrada en cada nivel de savepoint (tupla de savepoints abiertos)
+        _buffer.ultimas = {}
+    return _buffer
+
+
+def _escribir(entradas):
+    try:
+        Auditoria.objects.bulk_create(entradas, batch_size=settings.AUDITORIA_BATCH_SIZE)
+    except Exception:
+        # La acción ya se confirmó: se registra el error sin romper al llamador
+        logger.exception("No se pudieron escribir %d entradas de auditoría", len(entradas))
+
+
+def vaciar_auditoria():
+    """Escribe las entradas ya confirmadas que queden en el buffer del hilo."""
+    estado = _estado()
+    entradas, estado.confirmadas = estado.confirmadas, []
+    if entradas:
+        _escribir(entradas)
+
+
+@receiver(request_finished)
+def _vaciar_al_terminar_peticion(sender, **kwargs):
+    # Respaldo: lo confirmado que haya quedado en el buffer. Fuera de una transacción
+    # no hay callbacks pendientes, así que las últimas de savepoints revertidos se descartan
+    vaciar_auditoria()
+    _estado().ultimas.clear()
+
+
+def _confirmar(entrada, nivel):
+    # Cada entrada tiene su propio callback: si un savepoint se revierte, Django descarta
+    # solo los callbacks de ese savepoint y esas entradas nunca llegan aquí.
+    # La última entrada de cada nivel vacía el buffer: si se revierte un savepoint, la
+    # última del nivel que lo contiene sigue pendiente y escribe lo confirmado
+    estado = _estado()
+    estado.confirmadas.append(entrada)
+    if estado.ultimas.get(nivel) is entrada:
+        del estado.ultimas[nivel]
+        vaciar_auditoria()
+
+
+def auditar(entidad, entidad_id, accion, usuario=None, detalle=None):
+    """
+    Registra una acción en la auditoría. Dentro de una transacción queda en el buffer
+    hasta el commit; fuera de ella se escribe de inmediato.
+    """
+    autenticado = usuario is not None and usuario.is_authenticated
+    entrada = Auditoria(
+        entidad=entidad,
+        entidad_id=entidad_id,
+        accion=accion,
+        id_usuario=usuario if autenticado else None,
+        usuario_email=usuario.email if autenticado else 'sistema',
+        detalle=detalle,
+    )
+
+    if settings.AUDITORIA_SINCRONA:
+        try:
+            with transaction.atomic():
+                entrada.save()
+        except Exception:
+            logger.exception("Error auditando %s %s", entidad, entidad_id)
+        return
+
+    if not connection.in_atomic_block:
+        _estado().confirmadas.append(entrada)
+        vaciar_auditoria()
+        return
+
+    # Un bulk_create por nivel de savepoint con entradas (normalmente uno por transacción)
+    nivel = tuple(connection.savepoint_ids)
+    _estado().ultimas[nivel] = entrada
+    transaction.on_commit(partial(_confirmar, entrada, nivel))
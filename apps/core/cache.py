@@ -0,0 +1,55 @@
+# apps/core/cache.py
+"""
+Backend de caché en memoria local con contadores de aciertos y fallos.
+
+Se usa para los fragmentos de plantilla ({% cache ... using="fragmentos" %}) y permite ver
+en /estadisticas/cache/ si cachearlos compensa. Los contadores son del proceso, igual que
+la caché misma.
+"""
+import threading
+from collections import defaultdict
+
+from django.core.cache.backends.locmem import LocMemCache
+
+_AUSENTE = object()
+_metricas = defaultdict(lambda: {'aciertos': 0, 'fallos': 0})
+_lock = threading.Lock()
+
+
+def _grupo(clave):
+    # Las claves de {% cache %} son 'template.cache.<nombre_fragmento>.<hash>'
+    partes = clave.split('.')
+    if len(partes) >= 4 and partes[:2] == ['template', 'cache']:
+        return partes[2]
+    return clave.split(':')[0]
+
+
+class LocMemCacheConMetricas(LocMemCache):
+    """LocMemCache que cuenta los aciertos y fallos de get(), agrupados por fragmento."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._ubicacion = name
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _AUSENTE, version)
+        resultado = 'fallos' if valor is _AUSENTE else 'aciertos'
+        with _lock:
+            _metricas[(self._ubicacion, _grupo(key))][resultado] += 1
+        return default if valor is _AUSENTE else valor
+
+    def clear(self):
+        super().clear()
+        with _lock:
+            for ubicacion, grupo in [k for k in _metricas if k[0] == self._ubicacion]:
+                del _metricas[(ubicacion, grupo)]
+
+
+def metricas_cache(ubicacion):
+    """Aciertos, fallos y tasa de aciertos por grupo de claves de una caché con métricas."""
+    with _lock:
+        copia = {grupo: dict(datos) for (ubic, grupo), datos in _metricas.items() if ubic == ubicacion}
+    for datos in copia.values():
+        total = datos['aciertos'] + datos['fallos']
+        datos['tasa_aciertos'] = round(datos['aciertos'] / total, 3) if total else None
+    return copia
@@ -0,0 +1,10 @@
+# apps/core/context_processors.py
+
+def condominio(request):
+    """
+    Condominio de la petición (CondominioMiddleware) para las plantillas: base.html lo usa
+    para los colores y el logo. Sigue siendo perezoso, no consulta si no se usa.
+    """
+    if hasattr(request, 'condominio'):
+        return {'condominio': request.condominio}
+    return {}
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.archivo import TABLAS, archivar_tabla
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve la auditoría y las notificaciones más antiguas que la retención a archivos '
+        'JSONL comprimidos por mes (ARCHIVO_DIR) y las elimina de la base en bloques.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tabla', choices=list(TABLAS), action='append', help='Solo esta tabla (se puede repetir)')
+        parser.add_argument('--dias', type=int, help='Retención en días (por defecto la de settings de cada tabla)')
+        parser.add_argument('--bloque', type=int, default=1000, help='Filas por escritura y DELETE')
+
+    def handle(self, *args, **options):
+        antes_de = None
+        if options['dias'] is not None:
+            antes_de = timezone.now() - timedelta(days=options['dias'])
+
+        for tabla in options['tabla'] or TABLAS:
+            cantidad = archivar_tabla(tabla, antes_de=antes_de, bloque=options['bloque'])
+            self.stdout.write(self.style.SUCCESS(f'{tabla}: {cantidad} fila(s) archivada(s).'))
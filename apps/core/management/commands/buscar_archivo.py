@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.archivo import TABLAS, leer_archivo
+
+
+class Command(BaseCommand):
+    help = (
+        'Busca en el archivo histórico (manage.py archivar) sin cargarlo en la base. '
+        'Imprime las filas encontradas en JSONL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tabla', choices=list(TABLAS))
+        parser.add_argument('--desde', help='Primer mes (AAAA-MM)')
+        parser.add_argument('--hasta', help='Último mes (AAAA-MM)')
+        parser.add_argument(
+            '--filtro', action='append', default=[],
+            help='campo=valor, coincidencia exacta (se puede repetir). Ej: --filtro entidad=Pago'
+        )
+        parser.add_argument('--limite', type=int, help='Máximo de filas a imprimir')
+
+    def handle(self, *args, **options):
+        filtros = {}
+        for filtro in options['filtro']:
+            campo, separador, valor = filtro.partition('=')
+            if not separador:
+                raise CommandError(f"Filtro inválido '{filtro}': usa campo=valor")
+            filtros[campo] = valor
+
+        encontradas = 0
+        for fila in leer_archivo(options['tabla'], desde=options['desde'], hasta=options['hasta'], **filtros):
+            self.stdout.write(json.dumps(fila, ensure_ascii=False))
+            encontradas += 1
+            if options['limite'] and encontradas >= options['limite']:
+                break
+        self.stderr.write(f'{encontradas} fila(s) encontrada(s).')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.api import emitir_credencial
+from apps.core.models import Condominio
+
+
+class Command(BaseCommand):
+    help = (
+        'Emite una credencial de la API v1 para un condominio. El token se muestra una sola '
+        'vez: en la base solo queda su hash. Se revoca desde el admin.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('condominio_id', type=int)
+        parser.add_argument('nombre', help='Para quién es la credencial (ej: "Integración contable")')
+
+    def handle(self, *args, **options):
+        try:
+            condominio = Condominio.objects.get(pk=options['condominio_id'])
+        except Condominio.DoesNotExist:
+            raise CommandError(f"No existe el condominio {options['condominio_id']}")
+
+        credencial, token = emitir_credencial(condominio, options['nombre'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Credencial {credencial.prefijo} emitida para {condominio.nombre}.'
+        ))
+        self.stdout.write(f'Authorization: Bearer {token}')
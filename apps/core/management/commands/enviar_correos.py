@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import enviar_correos_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía los correos de la bandeja de salida (correo_saliente) en lotes por una sola '
+        'conexión SMTP. Sin --intervalo procesa lo pendiente y termina.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help='Correos por conexión (por defecto EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument(
+            '--intervalo', type=float,
+            help='Segundos de espera cuando no hay pendientes; con esta opción el comando queda corriendo'
+        )
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        while True:
+            enviados, fallidos = enviar_correos_pendientes(lote=options['lote'])
+            total_enviados += enviados
+            total_fallidos += fallidos
+            if enviados or fallidos:
+                self.stdout.write(f'Lote: {enviados} enviado(s), {fallidos} con error.')
+                continue
+            if options['intervalo'] is None:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Correos enviados: {total_enviados}; con error (reprogramados o fallidos): {total_fallidos}.'
+        ))
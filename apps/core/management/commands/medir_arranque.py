@@ -0,0 +1,113 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo mismo que hace un worker web antes de atender su primera petición
+CODIGO_ARRANQUE_WEB = (
+    "import django; django.setup(); "
+    "from django.conf import settings; "
+    "import importlib; importlib.import_module(settings.ROOT_URLCONF)"
+)
+
+
+def parsear_importtime(salida):
+    """
+    Convierte la salida de `python -X importtime` en una lista de
+    (modulo, profundidad, propio_us, acumulado_us).
+    """
+    modulos = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'imported package' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        profundidad = (len(nombre) - len(nombre.lstrip(' ')) - 1) // 2
+        modulos.append((nombre.strip(), profundidad, int(propio), int(acumulado)))
+    return modulos
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el costo de arranque en frío: importación por módulo del proceso web '
+        '(django.setup() + URLConf) y latencia de un comando de manage.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Cantidad de módulos a listar')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Corridas para tomar la mediana')
+        parser.add_argument(
+            '--presupuesto-ms', type=float,
+            help='Falla si el arranque web (mediana) supera este tiempo'
+        )
+        parser.add_argument(
+            '--sin-manage', action='store_true',
+            help='No medir la latencia de `manage.py check`'
+        )
+
+    def _ejecutar(self, argumentos):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'config.settings'
+        ))
+        inicio = time.perf_counter()
+        resultado = subprocess.run(
+            [sys.executable, *argumentos],
+            cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True
+        )
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if resultado.returncode != 0:
+            raise CommandError(f"Falló la medición ({' '.join(argumentos)}):\n{resultado.stderr[-2000:]}")
+        return duracion_ms, resultado.stderr
+
+    def handle(self, *args, **options):
+        repeticiones = max(1, options['repeticiones'])
+
+        # 1. Arranque del proceso web, con detalle de importaciones
+        tiempos_web = []
+        modulos = []
+        for _ in range(repeticiones):
+            duracion_ms, stderr = self._ejecutar(['-X', 'importtime', '-c', CODIGO_ARRANQUE_WEB])
+            tiempos_web.append(duracion_ms)
+            modulos = parsear_importtime(stderr)
+        arranque_web_ms = statistics.median(tiempos_web)
+
+        total_import_ms = sum(acum for _, prof, _, acum in modulos if prof == 0) / 1000
+        self.stdout.write(self.style.MIGRATE_HEADING('Arranque del proceso web'))
+        self.stdout.write(f"  Tiempo total (mediana de {repeticiones}): {arranque_web_ms:.0f} ms")
+        self.stdout.write(f"  Importaciones: {total_import_ms:.0f} ms en {len(modulos)} módulos")
+
+        top = options['top']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Paquetes de primer nivel por costo acumulado (top {top})'))
+        primer_nivel = sorted((m for m in modulos if m[1] == 0), key=lambda m: m[3], reverse=True)
+        for nombre, _, _, acumulado in primer_nivel[:top]:
+            self.stdout.write(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Módulos por costo propio (top {top})'))
+        for nombre, _, propio, _ in sorted(modulos, key=lambda m: m[2], reverse=True)[:top]:
+            self.stdout.write(f"  {propio / 1000:8.1f} ms  {nombre}")
+
+        # 2. Latencia de un comando de gestión completo
+        if not options['sin_manage']:
+            tiempos_manage = [
+                self._ejecutar(['manage.py', 'check'])[0] for _ in range(repeticiones)
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING('Comando de gestión'))
+            self.stdout.write(f"  manage.py check (mediana): {statistics.median(tiempos_manage):.0f} ms")
+
+        # 3. Verificaciones de presupuesto
+        errores = []
+        importados = {nombre for nombre, _, _, _ in modulos}
+        for prohibido in settings.STARTUP_FORBIDDEN_MODULES:
+            if prohibido in importados:
+                errores.append(f"'{prohibido}' se importa al arrancar (debe cargarse en el primer uso)")
+
+        presupuesto = options['presupuesto_ms']
+        if presupuesto is not None and arranque_web_ms > presupuesto:
+            errores.append(f"El arranque web tomó {arranque_web_ms:.0f} ms (presupuesto: {presupuesto:.0f} ms)")
+
+        if errores:
+            raise CommandError('\n'.join(errores))
+        self.stdout.write(self.style.SUCCESS('Arranque dentro del presupuesto.'))
@@ -0,0 +1,91 @@
+import os
+import signal
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.utils import _render_local, atender_peticion_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        'Inicia un pool de workers persistentes de WeasyPrint que renderizan los PDFs '
+        'recibidos por el socket Unix PDF_RENDER_SOCKET.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', help='Ruta del socket Unix (por defecto PDF_RENDER_SOCKET)')
+        parser.add_argument('--workers', type=int, help='Procesos del pool (por defecto PDF_RENDER_WORKERS)')
+        parser.add_argument(
+            '--max-peticiones', type=int, default=500,
+            help='Peticiones que atiende cada proceso antes de reciclarse (acota fugas de memoria)'
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['socket'] or settings.PDF_RENDER_SOCKET
+        if not ruta:
+            raise CommandError('Define PDF_RENDER_SOCKET en settings o usa --socket.')
+        workers = options['workers'] or settings.PDF_RENDER_WORKERS
+        max_peticiones = options['max_peticiones']
+
+        # Precarga en el proceso padre: WeasyPrint, fuentes y hojas de estilo compartidas.
+        # Los hijos heredan todo ya inicializado vía fork.
+        _render_local(['<p>warm-up</p>'])
+
+        if os.path.exists(ruta):
+            os.unlink(ruta)
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        servidor.bind(ruta)
+        os.chmod(ruta, 0o660)
+        servidor.listen(64)
+
+        hijos = set()
+
+        def detener(signum, frame):
+            # Señales repetidas (ej: enviadas a todo el grupo de procesos) no deben re-entrar
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            for pid in hijos:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            raise SystemExit(0)
+
+        signal.signal(signal.SIGTERM, detener)
+        signal.signal(signal.SIGINT, detener)
+
+        self.stdout.write(self.style.SUCCESS(f'Worker de PDF escuchando en {ruta} con {workers} procesos'))
+        try:
+            for _ in range(workers):
+                hijos.add(self._lanzar_hijo(servidor, max_peticiones))
+
+            # Reponemos los procesos que terminan (reciclados o caídos)
+            while True:
+                pid, _ = os.wait()
+                hijos.discard(pid)
+                hijos.add(self._lanzar_hijo(servidor, max_peticiones))
+        finally:
+            servidor.close()
+            if os.path.exists(ruta):
+                os.unlink(ruta)
+
+    def _lanzar_hijo(self, servidor, max_peticiones):
+        pid = os.fork()
+        if pid:
+            return pid
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            for _ in range(max_peticiones):
+                conexion, _ = servidor.accept()
+                with conexion:
+                    conexion.settimeout(settings.PDF_RENDER_TIMEOUT)
+                    try:
+                        atender_peticion_pdf(conexion)
+                    except OSError as e:
+                        self.stderr.write(f'Conexión abortada: {e}')
+        finally:
+            os._exit(0)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Condominio
+from apps.core.services import recalcular_kpi_condominio
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye la tabla de KPIs del dashboard (condominio_kpi) desde cobros, '
+        'fondo de reserva y gastos. Útil tras cargas masivas o cambios hechos fuera de los servicios.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--condominio', type=int, action='append', help='Solo este id (se puede repetir)')
+
+    def handle(self, *args, **options):
+        condominios = Condominio.objects.order_by('pk')
+        if options['condominio']:
+            condominios = condominios.filter(pk__in=options['condominio'])
+
+        cantidad = 0
+        for condominio_id in condominios.values_list('pk', flat=True).iterator():
+            recalcular_kpi_condominio(condominio_id)
+            cantidad += 1
+        self.stdout.write(self.style.SUCCESS(f'KPIs recalculados para {cantidad} condominio(s).'))
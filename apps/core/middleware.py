@@ -0,0 +1,63 @@
+# apps/core/middleware.py
+"""
+Resolución del condominio de la petición.
+
+Las vistas bajo condominio/<int:condominio_id>/ usan `request.condominio`, que se obtiene
+una sola vez por petición (y solo si se usa) desde una caché en memoria del proceso con
+TTL corto. Al guardar o eliminar un Condominio se invalida en este proceso (signals.py);
+en los demás procesos la entrada expira sola en CONDOMINIO_CACHE_TTL segundos.
+
+Los campos que cambian sin save() (version_datos, datos_modificados_at) no deben leerse
+desde aquí: para eso está views._version_datos.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from .models import Condominio
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def obtener_condominio(condominio_id):
+    """Condominio por id desde la caché del proceso; Http404 si no existe."""
+    ahora = time.monotonic()
+    with _lock:
+        entrada = _cache.get(condominio_id)
+    if entrada is None or entrada[0] <= ahora:
+        try:
+            instancia = Condominio.objects.get(pk=condominio_id)
+        except Condominio.DoesNotExist:
+            raise Http404("Condominio no encontrado")
+        entrada = (ahora + settings.CONDOMINIO_CACHE_TTL, instancia)
+        with _lock:
+            _cache[condominio_id] = entrada
+    # Copia por petición: la instancia cacheada se comparte entre hilos
+    return copy.copy(entrada[1])
+
+
+def olvidar_condominios(condominio_ids):
+    with _lock:
+        for condominio_id in condominio_ids:
+            _cache.pop(condominio_id, None)
+
+
+class CondominioMiddleware:
+    """Expone `request.condominio` (perezoso) en las vistas que reciben condominio_id."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        condominio_id = view_kwargs.get('condominio_id')
+        if condominio_id is not None:
+            request.condominio = SimpleLazyObject(lambda: obtener_condominio(int(condominio_id)))
+        return None
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_condominio_color_primario_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['periodo', 'id_cobro_estado', 'id_unidad'], name='ix_cobro_periodo_estado'),
+        ),
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['periodo', 'saldo'], name='ix_cobro_periodo_saldo'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_cobro_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CondominioKpi',
+            fields=[
+                ('id_condominio', models.OneToOneField(db_column='id_condominio', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='kpi', serialize=False, to='core.condominio')),
+                ('total_facturado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_recaudado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo_por_cobrar', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unidades_con_deuda', models.IntegerField(default=0)),
+                ('saldo_fondo_reserva', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('gastos_pendientes', models.IntegerField(default=0)),
+                ('monto_gastos_pendientes', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actualizado_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'KPI de Condominio',
+                'verbose_name_plural': 'KPIs de Condominios',
+                'db_table': 'condominio_kpi',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def calcular_no_leidas(apps, schema_editor):
+    # Inicializa el contador desnormalizado con las notificaciones existentes
+    Notificacion = apps.get_model('core', 'Notificacion')
+    Usuario = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    pendientes = (
+        Notificacion.objects.filter(leido=False)
+        .values('usuario').annotate(cantidad=Count('pk')).order_by()
+    )
+    for fila in pendientes.iterator():
+        Usuario.objects.filter(pk=fila['usuario']).update(notificaciones_no_leidas=fila['cantidad'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_condominio_kpi'),
+        ('usuarios', '0006_usuario_notificaciones_no_leidas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', 'leido', 'created_at'], name='ix_notif_usuario_leido'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', 'created_at'], name='ix_notif_usuario_fecha'),
+        ),
+        migrations.RunPython(calcular_no_leidas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_notificacion_indices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['id_condominio', 'apellidos', 'nombres', 'id_trabajador'], name='ix_trabajador_nombre'),
+        ),
+    ]
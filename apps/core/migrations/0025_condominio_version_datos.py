@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_trabajador_indice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='condominio',
+            name='datos_modificados_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='condominio',
+            name='version_datos',
+            field=models.PositiveBigIntegerField(db_comment='Se incrementa con cada cambio en gastos, cobros o pagos del condominio', default=0),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_correo_saliente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['entidad', 'entidad_id', 'created_at'], name='ix_auditoria_entidad'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['created_at'], name='ix_auditoria_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['usuario_email', 'created_at'], name='ix_auditoria_usuario'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_indices_auditoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['created_at'], name='ix_notif_fecha'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_notificacion_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CredencialApi',
+            fields=[
+                ('id_credencial', models.AutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=80)),
+                ('prefijo', models.CharField(max_length=8)),
+                ('clave_hash', models.CharField(max_length=64, unique=True)),
+                ('activa', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('id_condominio', models.ForeignKey(db_column='id_condominio', on_delete=django.db.models.deletion.CASCADE, to='core.condominio')),
+            ],
+            options={
+                'verbose_name': 'Credencial de API',
+                'verbose_name_plural': 'Credenciales de API',
+                'db_table': 'credencial_api',
+            },
+        ),
+    ]
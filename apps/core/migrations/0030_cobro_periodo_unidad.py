@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_credencial_api'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cobro',
+            index=models.Index(fields=['periodo', 'id_unidad', 'id_cobro'], name='ix_cobro_periodo_unidad'),
+        ),
+    ]
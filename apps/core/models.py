@@ -2,6 +2,7 @@
 from django.db import models
 # Importamos el settings para poder referirnos al modelo de Usuario
 from django.conf import settings
+from django.utils import timezone
 
 # --- INICIO: Catálogos para Condominio ---
 
@@ -188,6 +189,14 @@ class Condominio(models.Model):
         help_text="Color hexadecimal secundario"
     )
 
+    # Versión de los datos financieros: sube con cada escritura de Gasto, Cobro o Pago
+    # del condominio (ver apps/core/signals.py). Alimenta los ETag de listados y reportes.
+    version_datos = models.PositiveBigIntegerField(
+        default=0,
+        db_comment="Se incrementa con cada cambio en gastos, cobros o pagos del condominio"
+    )
+    datos_modificados_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return self.nombre
 
@@ -784,6 +793,13 @@ class Cobro(models.Model):
     class Meta:
         db_table = 'cobro'
         unique_together = ('id_unidad', 'periodo', 'tipo')
+        indexes = [
+            # Filtros del listado de cobros de un periodo (por estado / solo con saldo)
+            models.Index(fields=['periodo', 'id_cobro_estado', 'id_unidad'], name='ix_cobro_periodo_estado'),
+            models.Index(fields=['periodo', 'saldo'], name='ix_cobro_periodo_saldo'),
+            # Orden del listado paginado por cursor: (id_unidad, id_cobro) dentro del periodo
+            models.Index(fields=['periodo', 'id_unidad', 'id_cobro'], name='ix_cobro_periodo_unidad'),
+        ]
 
 class CobroDetalle(models.Model):
     """
@@ -1031,6 +1047,10 @@ class Trabajador(models.Model):
     class Meta:
         db_table = 'trabajador'
         unique_together = ('id_condominio', 'rut_base', 'rut_dv')
+        indexes = [
+            # Listado alfabético paginado por cursor
+            models.Index(fields=['id_condominio', 'apellidos', 'nombres', 'id_trabajador'], name='ix_trabajador_nombre'),
+        ]
         verbose_name = 'Trabajador'
         verbose_name_plural = 'Trabajadores'
 
@@ -1239,6 +1259,13 @@ class Auditoria(models.Model):
         db_table = 'auditoria'
         verbose_name = 'Registro de Auditoría'
         verbose_name_plural = 'Auditoría del Sistema'
+        indexes = [
+            # Historial de un registro, del más reciente al más antiguo (auditoria_list_view)
+            models.Index(fields=['entidad', 'entidad_id', 'created_at'], name='ix_auditoria_entidad'),
+            # Listado completo y rangos de fechas; también el filtro de fecha del admin
+            models.Index(fields=['created_at'], name='ix_auditoria_fecha'),
+            models.Index(fields=['usuario_email', 'created_at'], name='ix_auditoria_usuario'),
+        ]
 
 
 class CondominioAnexoRegla(models.Model):
@@ -1356,6 +1383,52 @@ class ResumenMensual(models.Model):
         db_table = 'resumen_mensual'
         unique_together = ('id_condominio', 'periodo')
 
+class CondominioKpi(models.Model):
+    """
+    [Tabla materializada 'condominio_kpi']
+    Indicadores del dashboard de administración, uno por condominio.
+    Se mantienen al día desde los servicios (cierre, pagos, gastos) para que el dashboard
+    lea una fila por condominio sin agregar cobros ni pagos en cada carga.
+    Se pueden reconstruir con `manage.py recalcular_kpis`.
+    """
+    id_condominio = models.OneToOneField(
+        Condominio,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='id_condominio',
+        related_name='kpi'
+    )
+
+    total_facturado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_recaudado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo_por_cobrar = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unidades_con_deuda = models.IntegerField(default=0)
+    saldo_fondo_reserva = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gastos_pendientes = models.IntegerField(default=0)
+    monto_gastos_pendientes = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    actualizado_at = models.DateTimeField()
+
+    @property
+    def porcentaje_recaudado(self):
+        if not self.total_facturado:
+            return 0
+        return round(self.total_recaudado * 100 / self.total_facturado, 1)
+
+    @property
+    def porcentaje_morosidad(self):
+        if not self.total_facturado:
+            return 0
+        return round(self.saldo_por_cobrar * 100 / self.total_facturado, 1)
+
+    def __str__(self):
+        return f"KPIs {self.id_condominio_id}"
+
+    class Meta:
+        db_table = 'condominio_kpi'
+        verbose_name = 'KPI de Condominio'
+        verbose_name_plural = 'KPIs de Condominios'
+
 class Notificacion(models.Model):
     """
     Sistema de mensajería interna y alertas.
@@ -1376,3 +1449,74 @@ class Notificacion(models.Model):
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
         ordering = ['-created_at']
+        indexes = [
+            # Bandeja de avisos: no leídas de un usuario y listado completo por fecha
+            models.Index(fields=['usuario', 'leido', 'created_at'], name='ix_notif_usuario_leido'),
+            models.Index(fields=['usuario', 'created_at'], name='ix_notif_usuario_fecha'),
+            # Archivo de las antiguas (manage.py archivar)
+            models.Index(fields=['created_at'], name='ix_notif_fecha'),
+        ]
+
+
+class CredencialApi(models.Model):
+    """
+    Credencial de integración (contabilidad, BI) para la API de solo lectura (api.py).
+    Vale para un solo condominio. Del token solo se guarda su SHA-256: se muestra una vez
+    al emitirlo (manage.py crear_credencial_api) y no se puede recuperar.
+    """
+    id_credencial = models.AutoField(primary_key=True)
+    id_condominio = models.ForeignKey(
+        Condominio,
+        on_delete=models.CASCADE,
+        db_column='id_condominio'
+    )
+    nombre = models.CharField(max_length=80)  # ej: 'Contabilidad'
+    prefijo = models.CharField(max_length=8)  # Primeros caracteres del token, para identificarlo
+    clave_hash = models.CharField(max_length=64, unique=True)
+    activa = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.prefijo}…)"
+
+    class Meta:
+        db_table = 'credencial_api'
+        verbose_name = 'Credencial de API'
+        verbose_name_plural = 'Credenciales de API'
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida de correos (OTP, notificaciones).
+    Las vistas solo insertan la fila (services.encolar_correo); el comando enviar_correos
+    los despacha en lotes por una sola conexión SMTP, con reintentos y backoff.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    id_correo = models.BigAutoField(primary_key=True)
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=120)
+    destinatarios = models.JSONField()  # Lista de direcciones
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento_at = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    enviado_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.estado})"
+
+    class Meta:
+        db_table = 'correo_saliente'
+        verbose_name = 'Correo Saliente'
+        verbose_name_plural = 'Correos Salientes'
+        indexes = [
+            # El worker toma los pendientes cuyo próximo intento ya venció
+            models.Index(fields=['estado', 'proximo_intento_at'], name='ix_correo_pendientes'),
+        ]
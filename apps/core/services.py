@@ -1,12 +1,21 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import timedelta
 from decimal import Decimal
-from django.db import transaction
-from django.db.models import Sum, Q
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Sum, Q, Count, F, Prefetch
+from django.db.models.functions import Greatest
 from django.utils import timezone
+from .auditoria import auditar
 from .models import (
     Unidad, ProrrateoRegla, ProrrateoFactorUnidad, CatConceptoCargo,
     Gasto, Cobro, CobroDetalle, CargoUnidad, CatCobroEstado, Pago, PagoAplicacion, CatEstadoTx,
-    CatMetodoPago, InteresRegla, ParamReglamento, FondoReservaMov, Auditoria, CondominioAnexoRegla,
-    Notificacion, ResumenMensual
+    CatMetodoPago, InteresRegla, ParamReglamento, FondoReservaMov, CondominioAnexoRegla,
+    Notificacion, ResumenMensual, CondominioKpi, CorreoSaliente
 )
 
 def get_proximo_periodo(condominio):
@@ -48,23 +57,280 @@ def get_proximo_periodo(condominio):
         # Fallback
         return timezone.now().strftime("%Y%m")
 
-def registrar_auditoria(entidad, entidad_id, accion, usuario, detalle=None):
+def resumen_cierre(condominio, periodo):
     """
-    Registra una acción en la tabla de auditoría.
+    Todo lo que necesita la pantalla de cierre mensual de un periodo, en dos consultas:
+    un agregado sobre los cobros mensuales y la suma de gastos.
     """
-    try:
-        Auditoria.objects.create(
-            entidad=entidad,
-            entidad_id=entidad_id,
-            accion=accion,
-            id_usuario=usuario if usuario and usuario.is_authenticated else None,
-            usuario_email=usuario.email if usuario and usuario.is_authenticated else 'sistema',
-            detalle=detalle
+    cobros = Cobro.objects.filter(
+        id_unidad__id_grupo__id_condominio=condominio,
+        periodo=periodo,
+        tipo=Cobro.TipoCobro.MENSUAL
+    ).aggregate(
+        cantidad=Count('id_cobro'),
+        cargos=Sum('total_cargos'),
+    )
+    total_gastos = Gasto.objects.filter(
+        id_condominio=condominio,
+        periodo=periodo
+    ).aggregate(Sum('total'))['total__sum'] or 0
+
+    return {
+        'total_gastos': total_gastos,
+        'ya_cerrado': cobros['cantidad'] > 0,
+        'total_cobrado': cobros['cargos'] or 0,
+        'cantidad_cobros': cobros['cantidad'],
+    }
+
+def recalcular_kpi_condominio(condominio):
+    """
+    Recalcula desde cero la fila de KPIs del dashboard de un condominio.
+    Se usa tras un cierre (que cambia muchos cobros a la vez), cuando la fila aún no existe
+    y desde `manage.py recalcular_kpis`. Acepta el condominio o su id.
+    """
+    condominio_id = getattr(condominio, 'pk', condominio)
+    cobros = Cobro.objects.filter(id_unidad__id_grupo__id_condominio=condominio_id)
+    totales = cobros.aggregate(pagado=Sum('total_pagado'), saldo=Sum('saldo'))
+    fondo = FondoReservaMov.objects.filter(id_condominio=condominio_id).aggregate(
+        abonos=Sum('monto', filter=Q(tipo='ABONO')),
+        cargos=Sum('monto', filter=Q(tipo='CARGO')),
+    )
+    gastos = Gasto.objects.filter(
+        id_condominio=condominio_id,
+        estado_validacion=Gasto.EstadoValidacion.PENDIENTE
+    ).aggregate(cantidad=Count('id_gasto'), monto=Sum('total'))
+
+    pagado = totales['pagado'] or 0
+    saldo = totales['saldo'] or 0
+    kpi, _ = CondominioKpi.objects.update_or_create(
+        id_condominio_id=condominio_id,
+        defaults={
+            'total_facturado': pagado + saldo,
+            'total_recaudado': pagado,
+            'saldo_por_cobrar': saldo,
+            'unidades_con_deuda': cobros.filter(saldo__gt=0).values('id_unidad').distinct().count(),
+            'saldo_fondo_reserva': (fondo['abonos'] or 0) - (fondo['cargos'] or 0),
+            'gastos_pendientes': gastos['cantidad'],
+            'monto_gastos_pendientes': gastos['monto'] or 0,
+            'actualizado_at': timezone.now(),
+        }
+    )
+    return kpi
+
+def ajustar_kpi_condominio(condominio_id, **deltas):
+    """
+    Aplica variaciones a los KPIs de un condominio con un solo UPDATE (F() + delta),
+    sin volver a agregar sus cobros. Si la fila aún no existe, la calcula completa.
+    """
+    cambios = {campo: F(campo) + delta for campo, delta in deltas.items() if delta}
+    actualizadas = CondominioKpi.objects.filter(pk=condominio_id).update(
+        **cambios, actualizado_at=timezone.now()
+    )
+    if not actualizadas:
+        recalcular_kpi_condominio(condominio_id)
+
+def _clave_portal(usuario_id):
+    return f"portal:{usuario_id}"
+
+def portal_residente(usuario):
+    """
+    Datos del portal de residentes: las unidades activas del usuario (como residente o
+    copropietario) con su saldo, sus últimos cobros con el detalle y sus últimos pagos.
+    Son cuatro consultas sin importar cuántas unidades o cobros haya (unidades, cobros,
+    detalles, pagos). El resultado se cachea por usuario y se invalida cuando hay un pago
+    o un cierre en alguna de sus unidades (ver invalidar_portal_unidades).
+    """
+    clave = _clave_portal(usuario.pk)
+    unidades = cache.get(clave)
+    if unidades is not None:
+        return unidades
+
+    from apps.usuarios.models import Copropietario, Residencia
+
+    historial = settings.PORTAL_HISTORIAL
+    residencias = Residencia.objects.filter(id_usuario=usuario, hasta__isnull=True).values('id_unidad')
+    propiedades = Copropietario.objects.filter(id_usuario=usuario, hasta__isnull=True).values('id_unidad')
+
+    unidades = list(
+        Unidad.objects.filter(Q(id_unidad__in=residencias) | Q(id_unidad__in=propiedades))
+        .select_related('id_grupo__id_condominio')
+        .annotate(saldo_actual=Sum('cobro__saldo'))
+        .prefetch_related(
+            Prefetch(
+                'cobro_set',
+                queryset=Cobro.objects.select_related('id_cobro_estado')
+                                      .prefetch_related('cobrodetalle_set')
+                                      .order_by('-periodo', '-id_cobro')[:historial],
+                to_attr='cobros_recientes'
+            ),
+            Prefetch(
+                'pago_set',
+                queryset=Pago.objects.select_related('id_metodo_pago')
+                                     .order_by('-fecha_pago', '-id_pago')[:historial],
+                to_attr='pagos_recientes'
+            ),
+        )
+        .order_by('id_grupo__id_condominio__nombre', 'codigo')
+    )
+    cache.set(clave, unidades, settings.PORTAL_CACHE_TIMEOUT)
+    return unidades
+
+def invalidar_portal_unidades(unidades):
+    """
+    Borra el portal cacheado de todos los usuarios vinculados a estas unidades
+    (ids o queryset). Se ejecuta al confirmar la transacción, para que nadie vuelva
+    a cachear los datos anteriores mientras el cambio aún no es visible.
+    """
+    from apps.usuarios.models import Copropietario, Residencia
+
+    def invalidar():
+        usuarios = set(Residencia.objects.filter(id_unidad__in=unidades).values_list('id_usuario', flat=True))
+        usuarios.update(Copropietario.objects.filter(id_unidad__in=unidades).values_list('id_usuario', flat=True))
+        cache.delete_many([_clave_portal(usuario_id) for usuario_id in usuarios])
+
+    transaction.on_commit(invalidar)
+
+def crear_notificaciones(notificaciones, por_correo=False):
+    """
+    Inserta notificaciones (instancias sin guardar) con un bulk_create y suma las no
+    leídas al contador de cada destinatario: un UPDATE por cada cantidad distinta,
+    no uno por notificación.
+    Con por_correo=True también deja un correo por notificación en la bandeja de salida.
+    """
+    if not notificaciones:
+        return []
+    creadas = Notificacion.objects.bulk_create(notificaciones)
+
+    if por_correo:
+        emails = dict(
+            get_user_model().objects.filter(pk__in={n.usuario_id for n in creadas}).values_list('pk', 'email')
+        )
+        CorreoSaliente.objects.bulk_create([
+            _correo(n.titulo, n.mensaje, [emails[n.usuario_id]])
+            for n in creadas if emails.get(n.usuario_id)
+        ])
+
+    usuarios_por_cantidad = defaultdict(list)
+    for usuario_id, cantidad in Counter(n.usuario_id for n in creadas if not n.leido).items():
+        usuarios_por_cantidad[cantidad].append(usuario_id)
+    for cantidad, usuarios in usuarios_por_cantidad.items():
+        get_user_model().objects.filter(pk__in=usuarios).update(
+            notificaciones_no_leidas=F('notificaciones_no_leidas') + cantidad
         )
+    return creadas
+
+@transaction.atomic
+def marcar_notificaciones_leidas(usuario):
+    """
+    Marca todas las notificaciones del usuario como leídas con un solo UPDATE y
+    descuenta las marcadas de su contador. Retorna cuántas se marcaron.
+    """
+    marcadas = Notificacion.objects.filter(usuario=usuario, leido=False).update(leido=True)
+    if marcadas:
+        # Se descuenta lo marcado (no se fija en 0) para no perder avisos creados en paralelo.
+        # Los avisos guardados de a uno (admin) suman por señal (signals.py); el tope en 0
+        # solo protege el campo, que no admite negativos.
+        get_user_model().objects.filter(pk=usuario.pk).update(
+            notificaciones_no_leidas=Greatest(F('notificaciones_no_leidas') - marcadas, 0)
+        )
+    return marcadas
+
+# --- Bandeja de salida de correos ---
+
+def _correo(asunto, cuerpo, destinatarios, remitente=None):
+    return CorreoSaliente(
+        asunto=asunto[:200],
+        cuerpo=cuerpo,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+def encolar_correo(asunto, cuerpo, destinatarios, remitente=None):
+    """
+    Deja un correo en la bandeja de salida con un solo INSERT; no toca el SMTP.
+    Lo envía el comando enviar_correos.
+    """
+    correo = _correo(asunto, cuerpo, destinatarios, remitente)
+    correo.save()
+    return correo
+
+def _espera_reintento(intentos):
+    # Backoff exponencial: base, 2x, 4x... con tope
+    return min(settings.EMAIL_OUTBOX_BACKOFF * 2 ** (intentos - 1), settings.EMAIL_OUTBOX_BACKOFF_MAX)
+
+def enviar_correos_pendientes(lote=None, connection=None):
+    """
+    Envía hasta `lote` correos pendientes cuyo próximo intento ya venció, todos por la
+    misma conexión del backend de correo.
+    Antes de enviar se reserva el lote (se corre proximo_intento_at lo que puede tardar en
+    enviarse) para que otro worker no lo tome. Un correo que falla se reprograma con backoff y tras EMAIL_OUTBOX_MAX_INTENTOS
+    queda 'fallido'. Retorna (enviados, fallidos).
+    """
+    from django.core.mail import EmailMessage, get_connection
+
+    lote = lote or settings.EMAIL_OUTBOX_BATCH_SIZE
+    ahora = timezone.now()
+    with transaction.atomic():
+        correos = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', proximo_intento_at__lte=ahora)
+            .order_by('proximo_intento_at', 'id_correo')[:lote]
+        )
+        if not correos:
+            return 0, 0
+        # La reserva cubre el peor caso del lote (abrir la conexión y cada envío agotando
+        # EMAIL_TIMEOUT) más un margen: otro worker no puede tomar filas aún no enviadas
+        reserva = settings.EMAIL_OUTBOX_RESERVA + (len(correos) + 1) * (settings.EMAIL_TIMEOUT or 0)
+        CorreoSaliente.objects.filter(pk__in=[c.pk for c in correos]).update(
+            proximo_intento_at=ahora + timedelta(seconds=reserva)
+        )
+
+    enviados, fallidos = [], []
+    connection = connection or get_connection()
+    try:
+        connection.open()
     except Exception as e:
-        # En producción, usar logging.error. No queremos romper la transacción principal si falla la auditoría
-        # pero en "Security Zero Trust" quizás sí. Para este MVP, lo dejamos silencioso o print.
-        print(f"Error auditando: {e}")
+        # Relay caído: todo el lote cuenta como un intento fallido y sigue el backoff
+        for correo in correos:
+            correo.ultimo_error = f"{type(e).__name__}: {e}"
+        fallidos = correos
+    else:
+        try:
+            for correo in correos:
+                mensaje = EmailMessage(
+                    correo.asunto, correo.cuerpo, correo.remitente, correo.destinatarios, connection=connection
+                )
+                try:
+                    mensaje.send()
+                except Exception as e:
+                    correo.ultimo_error = f"{type(e).__name__}: {e}"
+                    fallidos.append(correo)
+                else:
+                    enviados.append(correo.pk)
+        finally:
+            connection.close()
+
+    ahora = timezone.now()
+    if enviados:
+        CorreoSaliente.objects.filter(pk__in=enviados).update(
+            estado='enviado', enviado_at=ahora, intentos=F('intentos') + 1, ultimo_error=None
+        )
+    for correo in fallidos:
+        correo.intentos += 1
+        if correo.intentos >= settings.EMAIL_OUTBOX_MAX_INTENTOS:
+            correo.estado = 'fallido'
+        else:
+            correo.proximo_intento_at = ahora + timedelta(seconds=_espera_reintento(correo.intentos))
+    if fallidos:
+        CorreoSaliente.objects.bulk_update(fallidos, ['intentos', 'estado', 'proximo_intento_at', 'ultimo_error'])
+    return len(enviados), len(fallidos)
+
+def registrar_auditoria(entidad, entidad_id, accion, usuario, detalle=None):
+    """
+    Registra una acción en la tabla de auditoría. Dentro de una transacción la entrada
+    se escribe al hacer commit, junto con las demás de la transacción (ver auditoria.py).
+    """
+    auditar(entidad, entidad_id, accion, usuario=usuario, detalle=detalle)
 
 def calcular_factores_prorrateo(prorrateo_regla: ProrrateoRegla):
     """
@@ -395,13 +661,14 @@ def generar_cierre_mensual(condominio, periodo):
     # Usaremos un filtro genérico si es posible o importamos dentro de la función.
     from apps.usuarios.models import UsuarioAdminCondo, Copropietario, Residencia
 
+    notificaciones = []
     admins = UsuarioAdminCondo.objects.filter(id_condominio=condominio).select_related('id_usuario')
     for admin_rel in admins:
-        Notificacion.objects.create(
+        notificaciones.append(Notificacion(
             usuario=admin_rel.id_usuario,
             titulo="Cierre Mensual Generado",
             mensaje=f"Se ha generado el cierre mensual del periodo {periodo} para {condominio.nombre}. Total cobrado: {len(cobros_generados)} unidades."
-        )
+        ))
 
     # 2. Notificar Residentes (Copropietarios y Arrendatarios)
     # Iteramos sobre los cobros generados para saber a quién notificar
@@ -425,11 +692,19 @@ def generar_cierre_mensual(condominio, periodo):
                 destinatarios.add(cop.id_usuario)
 
         for usuario_dest in destinatarios:
-            Notificacion.objects.create(
+            notificaciones.append(Notificacion(
                 usuario=usuario_dest,
                 titulo="Gastos Comunes Disponibles",
                 mensaje=f"Se ha generado el cobro de Gastos Comunes para su unidad {unidad.codigo}. Periodo: {periodo}. Total a pagar: ${cobro.saldo:,.0f}"
-            )
+            ))
+
+    # Un solo INSERT para todos los avisos del cierre (y sus contadores de no leídas);
+    # los correos quedan en la bandeja de salida
+    crear_notificaciones(notificaciones, por_correo=True)
+
+    # KPIs del dashboard: el cierre toca todos los cobros del periodo, se recalculan completos
+    recalcular_kpi_condominio(condominio)
+    invalidar_portal_unidades(Unidad.objects.filter(id_grupo__id_condominio=condominio).values('id_unidad'))
 
     return cobros_generados
 
@@ -575,6 +850,8 @@ def crear_gasto(condominio, form, usuario):
         usuario=usuario,
         detalle={'monto': float(gasto.total), 'proveedor': str(gasto.id_proveedor)}
     )
+
+    # Los KPIs de gastos pendientes los ajusta la señal de Gasto (signals.py)
     return gasto
 
 @transaction.atomic
@@ -614,10 +891,11 @@ def registrar_pago(unidad, monto, metodo_pago, fecha_pago, observacion=None, usu
     # 2. Buscar cobros con saldo > 0, ordenados por fecha de emisión (los más antiguos primero)
     # Asumimos que 'id_cobro' autoincremental refleja el orden cronológico de creación también,
     # o usamos 'emitido_at'.
-    cobros_pendientes = Cobro.objects.filter(
+    cobros_pendientes = list(Cobro.objects.filter(
         id_unidad=unidad,
         saldo__gt=0
-    ).order_by('emitido_at', 'id_cobro')
+    ).order_by('emitido_at', 'id_cobro'))
+    deuda_anterior = sum(cobro.saldo for cobro in cobros_pendientes)
 
     estado_pagado, _ = CatCobroEstado.objects.get_or_create(codigo='PAGADO')
 
@@ -658,6 +936,16 @@ def registrar_pago(unidad, monto, metodo_pago, fecha_pago, observacion=None, usu
     # En un sistema real, se generaría un 'Saldo a Favor' para futuros cobros.
     # Aquí simplemente queda registrado el pago con monto mayor a lo aplicado.
 
+    # KPIs del dashboard: solo lo aplicado a cobros cuenta como recaudado
+    aplicado = monto - monto_disponible
+    ajustar_kpi_condominio(
+        unidad.id_grupo.id_condominio_id,
+        total_recaudado=aplicado,
+        saldo_por_cobrar=-aplicado,
+        unidades_con_deuda=-1 if deuda_anterior > 0 and deuda_anterior - aplicado <= 0 else 0,
+    )
+    invalidar_portal_unidades([unidad.pk])
+
     # --- NOTIFICACIONES ---
     # Notificar al residente "Pago Recibido"
     from apps.usuarios.models import Residencia, Copropietario
@@ -671,12 +959,14 @@ def registrar_pago(unidad, monto, metodo_pago, fecha_pago, observacion=None, usu
         for cop in coprops:
             destinatarios.add(cop.id_usuario)
 
-    for usuario_dest in destinatarios:
-        Notificacion.objects.create(
+    crear_notificaciones([
+        Notificacion(
             usuario=usuario_dest,
             titulo="Pago Confirmado",
             mensaje=f"Hemos recibido su pago de ${monto:,.0f} para la unidad {unidad.codigo}. ¡Gracias!"
         )
+        for usuario_dest in destinatarios
+    ], por_correo=True)
 
     return pago
 
@@ -705,6 +995,10 @@ def anular_pago(pago_id, usuario=None):
 
     # Revertir aplicaciones (Si el pago original pagó cobros, debemos 'despagarlos' o aumentar su saldo)
     aplicaciones = PagoAplicacion.objects.filter(id_pago=pago_original)
+    deuda_anterior = Cobro.objects.filter(
+        id_unidad=pago_original.id_unidad, saldo__gt=0
+    ).aggregate(Sum('saldo'))['saldo__sum'] or 0
+    total_reversado = Decimal(0)
 
     estado_pendiente, _ = CatCobroEstado.objects.get_or_create(codigo='PENDIENTE')
 
@@ -715,6 +1009,7 @@ def anular_pago(pago_id, usuario=None):
         # Devolvemos el saldo al cobro
         cobro.saldo += monto_reversado
         cobro.total_pagado -= monto_reversado
+        total_reversado += monto_reversado
 
         # Si el saldo vuelve a ser positivo, cambiamos estado a PENDIENTE (o PARCIAL si implementáramos ese estado)
         if cobro.saldo > 0:
@@ -729,6 +1024,15 @@ def anular_pago(pago_id, usuario=None):
             monto_aplicado= -monto_reversado
         )
 
+    # KPIs del dashboard: lo reversado vuelve a ser deuda
+    ajustar_kpi_condominio(
+        pago_original.id_unidad.id_grupo.id_condominio_id,
+        total_recaudado=-total_reversado,
+        saldo_por_cobrar=total_reversado,
+        unidades_con_deuda=1 if deuda_anterior <= 0 and total_reversado > 0 else 0,
+    )
+    invalidar_portal_unidades([pago_original.id_unidad_id])
+
     registrar_auditoria(
         entidad='Pago',
         entidad_id=pago_original.pk,
@@ -738,3 +1042,77 @@ def anular_pago(pago_id, usuario=None):
     )
 
     return contra_pago
+
+# --- Resumen del condominio (dashboard asíncrono) ---
+# Cada bloque del resumen es una consulta independiente. En la vista asíncrona se ejecutan
+# a la vez, cada una en su propio hilo y con su propia conexión: el ORM asíncrono
+# (aaggregate, etc.) usa un único hilo compartido y las ejecutaría una tras otra.
+
+def _resumen_gastos(condominio_id, periodo):
+    return Gasto.objects.filter(id_condominio=condominio_id, periodo=periodo).aggregate(
+        total=Sum('total'),
+        cantidad=Count('id_gasto'),
+        pendientes=Count('id_gasto', filter=Q(estado_validacion=Gasto.EstadoValidacion.PENDIENTE)),
+    )
+
+def _resumen_cobros(condominio_id, periodo):
+    return Cobro.objects.filter(
+        id_unidad__id_grupo__id_condominio=condominio_id, periodo=periodo
+    ).aggregate(
+        cantidad=Count('id_cobro'),
+        cargos=Sum('total_cargos'),
+        pagado=Sum('total_pagado'),
+        por_cobrar=Sum('saldo'),
+        impagos=Count('id_cobro', filter=Q(saldo__gt=0)),
+    )
+
+def _resumen_pagos(condominio_id, periodo):
+    unidades = Unidad.objects.filter(id_grupo__id_condominio=condominio_id).values('id_unidad')
+    return Pago.objects.filter(id_unidad__in=unidades, periodo=periodo).aggregate(
+        total=Sum('monto'),
+        cantidad=Count('id_pago'),
+    )
+
+def _resumen_fondo_reserva(condominio_id, periodo):
+    movimientos = FondoReservaMov.objects.filter(id_condominio=condominio_id).aggregate(
+        abonos=Sum('monto', filter=Q(tipo='ABONO')),
+        cargos=Sum('monto', filter=Q(tipo='CARGO')),
+        abonos_periodo=Sum('monto', filter=Q(tipo='ABONO', periodo=periodo)),
+    )
+    return {
+        'saldo': (movimientos['abonos'] or 0) - (movimientos['cargos'] or 0),
+        'abonos_periodo': movimientos['abonos_periodo'] or 0,
+    }
+
+def _resumen_avisos(usuario_id):
+    return list(
+        Notificacion.objects.filter(usuario_id=usuario_id)
+        .order_by('-created_at', '-id_notificacion')
+        .values('titulo', 'leido', 'created_at')[:5]
+    )
+
+def _en_hilo_propio(funcion):
+    """
+    Envuelve una consulta para ejecutarla en un hilo del pool (thread_sensitive=False),
+    liberando al terminar la conexión que abrió ese hilo (respeta CONN_MAX_AGE).
+    """
+    def ejecutar(*args):
+        try:
+            return funcion(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(ejecutar, thread_sensitive=False)
+
+async def resumen_condominio(condominio_id, periodo, usuario_id):
+    """
+    Gastos, cobros, pagos y fondo de reserva del periodo, más los últimos avisos del
+    usuario, consultados en paralelo: la latencia es la de la consulta más lenta.
+    """
+    gastos, cobros, pagos, fondo, avisos = await asyncio.gather(
+        _en_hilo_propio(_resumen_gastos)(condominio_id, periodo),
+        _en_hilo_propio(_resumen_cobros)(condominio_id, periodo),
+        _en_hilo_propio(_resumen_pagos)(condominio_id, periodo),
+        _en_hilo_propio(_resumen_fondo_reserva)(condominio_id, periodo),
+        _en_hilo_propio(_resumen_avisos)(usuario_id),
+    )
+    return {'gastos': gastos, 'cobros': cobros, 'pagos': pagos, 'fondo': fondo, 'avisos': avisos}
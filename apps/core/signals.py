@@ -0,0 +1,263 @@
+# apps/core/signals.py
+"""
+Versión de datos por condominio (Condominio.version_datos).
+
+Cada escritura de Gasto, Cobro, CobroDetalle, Pago, Unidad o ResumenMensual marca su
+condominio como modificado (el código de la unidad aparece en listados y PDFs).
+Proveedores, categorías de gasto y catálogos (tipo de documento, estado de cobro, método de
+pago) son compartidos y sus nombres salen en los listados y la API: cambiarlos sube la
+versión de todos los condominios.
+Las marcas se acumulan durante la transacción y se aplican al hacer commit con un único
+UPDATE por transacción: un cierre que guarda cientos de cobros sube la versión una sola
+vez, y una transacción revertida no la sube.
+
+Las escrituras que no disparan señales (QuerySet.update, bulk_create) deben llamar a
+registrar_cambio_datos() explícitamente.
+
+Además, guardar un Condominio lo saca de la caché de middleware.obtener_condominio,
+cada escritura de Gasto ajusta los KPIs de gastos pendientes del dashboard (CondominioKpi)
+y cada escritura de Notificacion ajusta Usuario.notificaciones_no_leidas.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .middleware import olvidar_condominios
+from .models import (
+    Condominio, Grupo, Unidad, Gasto, Cobro, CobroDetalle, Pago, ResumenMensual,
+    Proveedor, GastoCategoria, CatDocTipo, CatCobroEstado, CatMetodoPago
+)
+from .models import CondominioKpi, Notificacion
+from .services import ajustar_kpi_condominio, recalcular_kpi_condominio
+
+_pendientes = threading.local()
+
+
+def _marcas():
+    if not hasattr(_pendientes, 'condominios'):
+        _pendientes.condominios = set()
+        _pendientes.unidades = set()
+        _pendientes.cobros = set()
+        _pendientes.grupos = set()
+        _pendientes.todos = False
+    return _pendientes
+
+
+def _aplicar_cambios():
+    marcas = _marcas()
+    if not (marcas.condominios or marcas.unidades or marcas.cobros or marcas.grupos or marcas.todos):
+        return  # Ya lo aplicó un callback anterior de la misma transacción
+    condominios, unidades, cobros, grupos = marcas.condominios, marcas.unidades, marcas.cobros, marcas.grupos
+    marcas.condominios, marcas.unidades, marcas.cobros, marcas.grupos = set(), set(), set(), set()
+    if marcas.todos:
+        marcas.todos = False
+        Condominio.objects.update(version_datos=F('version_datos') + 1, datos_modificados_at=timezone.now())
+        return
+
+    # Cobros y pagos cuelgan de la unidad (y el detalle del cobro): una consulta por tipo
+    if unidades:
+        condominios |= set(
+            Grupo.objects.filter(unidad__id_unidad__in=unidades).values_list('id_condominio', flat=True)
+        )
+    if cobros:
+        condominios |= set(
+            Grupo.objects.filter(unidad__cobro__id_cobro__in=cobros).values_list('id_condominio', flat=True)
+        )
+    if grupos:
+        condominios |= set(Grupo.objects.filter(pk__in=grupos).values_list('id_condominio', flat=True))
+    Condominio.objects.filter(pk__in=condominios).update(
+        version_datos=F('version_datos') + 1,
+        datos_modificados_at=timezone.now(),
+    )
+
+
+@receiver([post_save, post_delete], sender=Condominio)
+def _condominio_modificado(sender, instance, **kwargs):
+    # Nombre, colores, logo...: la próxima petición lo vuelve a leer, y las páginas que
+    # los muestran dejan de responder 304 (_aplicar_cambios usa update(), sin señales)
+    olvidar_condominios([instance.pk])
+    if kwargs['signal'] is post_save:
+        registrar_cambio_datos(condominio_id=instance.pk)
+
+
+def registrar_cambio_datos(condominio_id=None, unidad_id=None, cobro_id=None, grupo_id=None, todos=False):
+    """
+    Marca el condominio (o el de la unidad, cobro o grupo; con todos=True, todos los
+    condominios) como modificado; la versión sube al hacer commit.
+    """
+    marcas = _marcas()
+    if todos:
+        marcas.todos = True
+    if condominio_id is not None:
+        marcas.condominios.add(condominio_id)
+    if unidad_id is not None:
+        marcas.unidades.add(unidad_id)
+    if cobro_id is not None:
+        marcas.cobros.add(cobro_id)
+    if grupo_id is not None:
+        marcas.grupos.add(grupo_id)
+    transaction.on_commit(_aplicar_cambios)
+
+
+@receiver([post_save, post_delete], sender=Gasto)
+def _gasto_modificado(sender, instance, **kwargs):
+    registrar_cambio_datos(condominio_id=instance.id_condominio_id)
+
+
+# --- INICIO: KPIs de gastos pendientes ---
+# Cada Gasto recuerda cómo aportaba a CondominioKpi (condominio, pendiente, total) al leerse
+# de la BD; al guardarlo o eliminarlo se aplica la diferencia con un UPDATE F() + delta.
+# Validar, rechazar, editar el total o borrar un gasto mueve el contador sin recalcularlo.
+
+def _aporte_gasto(gasto):
+    if gasto.estado_validacion != Gasto.EstadoValidacion.PENDIENTE:
+        return gasto.id_condominio_id, 0, 0
+    return gasto.id_condominio_id, 1, gasto.total
+
+
+@receiver(post_init, sender=Gasto)
+def _gasto_leido(sender, instance, **kwargs):
+    # Solo con los campos ya cargados: leer uno diferido (.only()) sería una consulta por fila
+    cargados = instance.__dict__
+    if instance.pk is not None and all(c in cargados for c in ('id_condominio_id', 'estado_validacion', 'total')):
+        instance._aporte_kpi = _aporte_gasto(instance)
+    else:
+        instance._aporte_kpi = None
+
+
+def _ajustar_aporte(condominio_id, cantidad, monto):
+    if cantidad or monto:
+        ajustar_kpi_condominio(condominio_id, gastos_pendientes=cantidad, monto_gastos_pendientes=monto)
+
+
+@receiver(post_save, sender=Gasto)
+def _gasto_guardado_kpi(sender, instance, created, **kwargs):
+    anterior = None if created else instance._aporte_kpi
+    if anterior is None and not created:
+        # Instancia sin estado previo conocido (campos diferidos): se recalcula completo
+        recalcular_kpi_condominio(instance.id_condominio_id)
+        instance._aporte_kpi = _aporte_gasto(instance)
+        return
+    nuevo = _aporte_gasto(instance)
+    if anterior is not None and anterior[0] != nuevo[0]:
+        _ajustar_aporte(anterior[0], -anterior[1], -anterior[2])
+        anterior = None
+    if anterior is None:
+        _ajustar_aporte(nuevo[0], nuevo[1], nuevo[2])
+    else:
+        _ajustar_aporte(nuevo[0], nuevo[1] - anterior[1], nuevo[2] - anterior[2])
+    instance._aporte_kpi = nuevo
+
+
+@receiver(post_delete, sender=Gasto)
+def _gasto_eliminado_kpi(sender, instance, **kwargs):
+    condominio_id, cantidad, monto = instance._aporte_kpi or _aporte_gasto(instance)
+    if cantidad or monto:
+        # Solo si la fila existe: al borrar el condominio en cascada no hay que recrearla
+        CondominioKpi.objects.filter(pk=condominio_id).update(
+            gastos_pendientes=F('gastos_pendientes') - cantidad,
+            monto_gastos_pendientes=F('monto_gastos_pendientes') - monto,
+            actualizado_at=timezone.now(),
+        )
+
+# --- FIN: KPIs de gastos pendientes ---
+
+
+@receiver([post_save, post_delete], sender=Cobro)
+@receiver([post_save, post_delete], sender=Pago)
+def _movimiento_modificado(sender, instance, **kwargs):
+    registrar_cambio_datos(unidad_id=instance.id_unidad_id)
+
+
+@receiver([post_save, post_delete], sender=CobroDetalle)
+def _detalle_cobro_modificado(sender, instance, **kwargs):
+    registrar_cambio_datos(cobro_id=instance.id_cobro_id)
+
+
+@receiver([post_save, post_delete], sender=Unidad)
+def _unidad_modificada(sender, instance, **kwargs):
+    # Por el grupo: al borrar la unidad ya no se puede llegar al condominio desde ella
+    registrar_cambio_datos(grupo_id=instance.id_grupo_id)
+
+
+@receiver([post_save, post_delete], sender=ResumenMensual)
+def _resumen_modificado(sender, instance, **kwargs):
+    registrar_cambio_datos(condominio_id=instance.id_condominio_id)
+
+
+@receiver([post_save, post_delete], sender=Proveedor)
+@receiver([post_save, post_delete], sender=GastoCategoria)
+@receiver([post_save, post_delete], sender=CatDocTipo)
+@receiver([post_save, post_delete], sender=CatCobroEstado)
+@receiver([post_save, post_delete], sender=CatMetodoPago)
+def _compartido_modificado(sender, instance, **kwargs):
+    # Sin condominio dueño: cualquier listado o respuesta de la API puede mostrarlo
+    registrar_cambio_datos(todos=True)
+
+
+# --- INICIO: Contador de notificaciones no leídas ---
+# Las notificaciones guardadas o eliminadas de a una (admin, borrado en cascada del usuario...)
+# ajustan Usuario.notificaciones_no_leidas aquí. Las escrituras en lote no disparan señales
+# o las suspenden, y ajustan el contador ellas mismas: crear_notificaciones (bulk_create),
+# marcar_notificaciones_leidas (update) y archivo._descontar_no_leidas.
+
+_contador = threading.local()
+
+
+@contextmanager
+def contador_no_leidas_en_lote():
+    """Dentro del bloque las señales de Notificacion no tocan el contador."""
+    _contador.en_lote = True
+    try:
+        yield
+    finally:
+        _contador.en_lote = False
+
+
+def _ajustar_no_leidas(usuario_id, delta):
+    if delta and not getattr(_contador, 'en_lote', False):
+        get_user_model().objects.filter(pk=usuario_id).update(
+            notificaciones_no_leidas=Greatest(F('notificaciones_no_leidas') + delta, 0)
+        )
+
+
+@receiver(post_init, sender=Notificacion)
+def _notificacion_leida(sender, instance, **kwargs):
+    # (usuario, no leída) según la BD; None si la instancia es nueva o trae campos diferidos
+    cargados = instance.__dict__
+    if instance.pk is not None and 'usuario_id' in cargados and 'leido' in cargados:
+        instance._no_leida = (instance.usuario_id, not instance.leido)
+    else:
+        instance._no_leida = None
+
+
+@receiver(post_save, sender=Notificacion)
+def _notificacion_guardada(sender, instance, created, **kwargs):
+    anterior = None if created else instance._no_leida
+    nuevo = (instance.usuario_id, not instance.leido)
+    instance._no_leida = nuevo
+    if anterior is None and not created:
+        # Estado previo desconocido: se recuenta el usuario
+        if not getattr(_contador, 'en_lote', False):
+            get_user_model().objects.filter(pk=instance.usuario_id).update(
+                notificaciones_no_leidas=Notificacion.objects.filter(usuario_id=instance.usuario_id, leido=False).count()
+            )
+        return
+    if anterior is not None:
+        _ajustar_no_leidas(anterior[0], -int(anterior[1]))
+    _ajustar_no_leidas(nuevo[0], int(nuevo[1]))
+
+
+@receiver(post_delete, sender=Notificacion)
+def _notificacion_eliminada(sender, instance, **kwargs):
+    usuario_id, no_leida = instance._no_leida or (instance.usuario_id, not instance.leido)
+    _ajustar_no_leidas(usuario_id, -int(no_leida))
+
+# --- FIN: Contador de notificaciones no leídas ---
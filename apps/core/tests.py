@@ -1,10 +1,36 @@
-from django.test import TestCase
+import base64
+import json
+import tempfile
+import threading
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from decimal import Decimal
-from apps.core.models import Condominio, GastoCategoria, Proveedor, CatDocTipo, Gasto
+from apps.core.models import (
+    Condominio, GastoCategoria, Proveedor, CatDocTipo, Gasto,
+    Grupo, Unidad, Pago, CatMetodoPago, Notificacion, Trabajador, Remuneracion,
+    CorreoSaliente, Auditoria, ResumenMensual
+)
 from apps.usuarios.models import Usuario
 from apps.core.forms import GastoForm
-from apps.core.services import crear_gasto
+from apps.core.services import (
+    crear_gasto, crear_notificaciones, marcar_notificaciones_leidas, encolar_correo, enviar_correos_pendientes
+)
+from apps.core.management.commands.medir_arranque import parsear_importtime
+from apps.core.middleware import olvidar_condominios
+from apps.core.auditoria import auditar
+from apps.core.api import emitir_credencial
+from apps.core.archivo import archivar_tabla, leer_archivo, meses_archivados
 
 class GastoFormValidationTests(TestCase):
     def setUp(self):
@@ -100,3 +126,777 @@ class GastoFormValidationTests(TestCase):
         self.assertAlmostEqual(gasto.iva, expected_iva, places=2)
         self.assertAlmostEqual(gasto.total, total, places=2)
         self.assertEqual(gasto.estado_validacion, Gasto.EstadoValidacion.PENDIENTE)
+
+
+class MedirArranqueCommandTests(TestCase):
+    def test_parsear_importtime(self):
+        salida = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     encodings.idna\n"
+            "import time:       300 |       1500 | django\n"
+        )
+        self.assertEqual(
+            parsear_importtime(salida),
+            [('encodings.idna', 2, 120, 120), ('django', 0, 300, 1500)]
+        )
+
+    def test_arranque_web_no_importa_weasyprint(self):
+        """
+        El arranque del proceso web (setup + URLConf) no debe cargar dependencias pesadas
+        como WeasyPrint: el comando falla si algún módulo de STARTUP_FORBIDDEN_MODULES aparece.
+        """
+        out = StringIO()
+        call_command('medir_arranque', '--repeticiones', '1', '--sin-manage', '--top', '3', stdout=out)
+        self.assertIn('Arranque dentro del presupuesto', out.getvalue())
+
+
+class PagosListViewTests(TestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        caches['fragmentos'].clear()
+
+        self.condominio = Condominio.objects.create(nombre="Condo Pagos")
+        grupo = Grupo.objects.create(id_condominio=self.condominio, nombre="Torre A", tipo="Torre")
+        self.unidad = Unidad.objects.create(id_grupo=grupo, codigo="101", coef_prop=Decimal("0.05"))
+        self.transferencia = CatMetodoPago.objects.create(codigo="TRANSF", nombre="Transferencia")
+        self.efectivo = CatMetodoPago.objects.create(codigo="EFECTIVO", nombre="Efectivo")
+
+        # Pago de otro condominio: nunca debe aparecer
+        otro = Condominio.objects.create(nombre="Otro Condo")
+        otra_unidad = Unidad.objects.create(
+            id_grupo=Grupo.objects.create(id_condominio=otro, nombre="B", tipo="Torre"),
+            codigo="201", coef_prop=Decimal("0.05")
+        )
+        self._pago(otra_unidad, "2025-03-10", 999, self.transferencia)
+
+    def _pago(self, unidad, fecha, monto, metodo):
+        return Pago.objects.create(
+            id_unidad=unidad, fecha_pago=timezone.make_aware(datetime.fromisoformat(f"{fecha}T12:00")),
+            monto=Decimal(monto), id_metodo_pago=metodo, periodo=fecha[:7].replace('-', '')
+        )
+
+    def test_filtros_total_y_paginacion(self):
+        for dia in (3, 5, 5, 20):
+            self._pago(self.unidad, f"2025-03-{dia:02d}", 100, self.transferencia)
+        self._pago(self.unidad, "2025-03-15", 50, self.efectivo)
+        self._pago(self.unidad, "2025-04-01", 70, self.transferencia)
+
+        url = reverse('pagos_list', kwargs={'condominio_id': self.condominio.pk})
+        filtros = {'desde': '2025-03-01', 'hasta': '2025-03-31'}
+        with override_settings(LIST_PAGE_SIZE=3):
+            primera = self.client.get(url, filtros)
+            segunda = self.client.get(url, {**filtros, 'cursor': primera.context['pagina'].siguiente})
+
+        self.assertEqual(primera.context['resumen']['total'], Decimal("450"))
+        self.assertEqual(primera.context['resumen']['cantidad'], 5)
+        vistos = [p.fecha_pago.day for p in primera.context['pagos']] + \
+                 [p.fecha_pago.day for p in segunda.context['pagos']]
+        self.assertEqual(vistos, [20, 15, 5, 5, 3])
+        self.assertIsNone(segunda.context['pagina'].siguiente)
+
+        por_metodo = self.client.get(url, {**filtros, 'metodo': 'EFECTIVO'})
+        self.assertEqual(por_metodo.context['resumen']['total'], Decimal("50"))
+
+    def test_cursor_adulterado_vuelve_a_la_primera_pagina(self):
+        self._pago(self.unidad, "2025-03-05", 100, self.transferencia)
+        url = reverse('pagos_list', kwargs={'condominio_id': self.condominio.pk})
+        for valores in (["abc", 1], [None, 1], ["2025-03-05T00:00:00", "x"], [[1], {"a": 1}]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': valores, 'd': 'n'}).encode()).decode()
+            response = self.client.get(url, {'desde': '2025-03-01', 'hasta': '2025-03-31', 'cursor': cursor})
+            self.assertEqual(response.status_code, 200, valores)
+            self.assertEqual(len(response.context["pagos"]), 1, valores)
+
+        api = reverse('api_listar', kwargs={'condominio_id': self.condominio.pk, 'recurso': 'pagos'})
+        cursor = base64.urlsafe_b64encode(json.dumps({'v': ["x", None], 'd': 'n'}).encode()).decode()
+        self.assertEqual(len(self.client.get(api, {'cursor': cursor}).json()['datos']), 1)
+
+    def test_exportar_csv_por_periodo(self):
+        self._pago(self.unidad, "2025-02-28", 10, self.transferencia)
+        self._pago(self.unidad, "2025-03-05", 20, self.efectivo)
+        self._pago(self.unidad, "2025-04-01", 30, self.transferencia)
+
+        url = reverse('exportar_pagos_csv', kwargs={'condominio_id': self.condominio.pk})
+        response = self.client.get(url, {'desde': '202503', 'hasta': '202504'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lineas[0].split(',')[:3], ['ID Pago', 'Fecha Pago', 'Periodo'])
+        self.assertEqual([l.split(',')[6] for l in lineas[1:]], ['20.00', '30.00'])
+
+
+class GastosListViewTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        caches['fragmentos'].clear()
+        self.condominio = Condominio.objects.create(nombre="Condo Gastos")
+        self.categoria = GastoCategoria.objects.create(nombre="Aseo")
+        self.url = reverse('gastos_list', kwargs={'condominio_id': self.condominio.pk})
+
+    def _gasto(self, periodo, total, nombre_proveedor):
+        proveedor = Proveedor.objects.create(
+            rut_base=Proveedor.objects.count() + 1, rut_dv="1",
+            nombre=nombre_proveedor, tipo=Proveedor.TipoProveedor.EMPRESA
+        )
+        return Gasto.objects.create(
+            id_condominio=self.condominio, periodo=periodo, id_gasto_categ=self.categoria,
+            id_proveedor=proveedor, total=Decimal(total)
+        )
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        self._gasto("202501", 100, "Prov 1")
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(self.url)
+        for i in range(5):
+            self._gasto("202502", 100, f"Prov {i + 2}")
+        caches['fragmentos'].clear()
+        olvidar_condominios([self.condominio.pk])
+        with CaptureQueriesContext(connection) as muchas:
+            self.client.get(self.url)
+        self.assertEqual(len(pocas), len(muchas))
+
+    def test_subtotales_por_periodo_con_paginacion(self):
+        self._gasto("202501", 100, "A")
+        self._gasto("202502", 200, "B")
+        self._gasto("202502", 300, "C")
+
+        with override_settings(LIST_PAGE_SIZE=2):
+            response = self.client.get(self.url)
+        grupos = response.context['grupos']
+
+        # La página solo trae los dos gastos de 202502, con el subtotal de ese periodo
+        self.assertEqual([(g['periodo'], g['subtotal'], len(g['gastos'])) for g in grupos],
+                         [("202502", Decimal("500"), 2)])
+        self.assertIsNotNone(response.context['pagina'].siguiente)
+
+        filtrado = self.client.get(self.url, {'periodo': '202501'})
+        self.assertEqual([g['subtotal'] for g in filtrado.context['grupos']], [Decimal("100")])
+
+    def test_version_datos_y_get_condicional(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self._gasto("202501", 100, "A")
+                self._gasto("202501", 200, "B")
+        # Dos escrituras en la misma transacción suben la versión una sola vez
+        self.condominio.refresh_from_db()
+        self.assertEqual(self.condominio.version_datos, 1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            repetida = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertFalse(any('"gasto"' in q['sql'] for q in consultas.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._gasto("202502", 300, "C")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_etag_cambia_con_la_sesion_y_el_condominio(self):
+        self._gasto("202501", 100, "A")
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # El login rota el token CSRF: la copia del navegador trae un token muerto
+        self.client.logout()
+        self.client.login(email='admin@example.com', password='password')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Cambiar el nombre o los colores del condominio también invalida la página
+        with self.captureOnCommitCallbacks(execute=True):
+            self.condominio.color_primario = "#445566"
+            self.condominio.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_fragmento_cacheado_por_version(self):
+        self._gasto("202501", 100, "A")
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as consultas:
+            cacheada = self.client.get(self.url)
+        self.assertFalse(any('FROM "gasto"' in q['sql'] for q in consultas.captured_queries))
+        self.assertContains(cacheada, "Subtotal $ 100")
+
+        # Un cambio de datos sube la versión y el fragmento se vuelve a generar
+        with self.captureOnCommitCallbacks(execute=True):
+            self._gasto("202501", 50, "B")
+        self.assertContains(self.client.get(self.url), "Subtotal $ 150")
+
+        metricas = self.client.get(reverse('estadisticas_cache')).json()['fragmentos']
+        self.assertEqual(metricas['gastos_lista'], {'aciertos': 1, 'fallos': 2, 'tasa_aciertos': 0.333})
+
+    def test_exportar_csv_escapa_formulas(self):
+        gasto = self._gasto("202501", 100, "Prov Uno")
+        gasto.descripcion = "=HYPERLINK(\"http://x\")"
+        gasto.save()
+        self._gasto("202412", 50, "Prov Viejo")
+
+        url = reverse('exportar_gastos_csv', kwargs={'condominio_id': self.condominio.pk})
+        contenido = b''.join(self.client.get(url, {'desde': '202501'}).streaming_content).decode('utf-8-sig')
+
+        lineas = contenido.splitlines()
+        self.assertEqual(len(lineas), 2)
+        self.assertIn('Prov Uno', lineas[1])
+        self.assertIn('"\'=HYPERLINK(""http://x"")"', lineas[1])
+
+    def test_exportar_csv_ignora_meses_invalidos(self):
+        self._gasto("202501", 100, "Prov Uno")
+        for tipo in ('gastos', 'pagos', 'cobros'):
+            url = reverse(f'exportar_{tipo}_csv', kwargs={'condominio_id': self.condominio.pk})
+            response = self.client.get(url, {'desde': '202513', 'hasta': '202500'})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('inicio-hoy', response['Content-Disposition'])
+
+
+class NotificacionesTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            email='vecino@example.com', password='password',
+            rut_base=5, rut_dv='1', nombres='Vecino', apellidos='Uno'
+        )
+        self.client.login(email='vecino@example.com', password='password')
+
+    def _contador(self):
+        self.usuario.refresh_from_db(fields=['notificaciones_no_leidas'])
+        return self.usuario.notificaciones_no_leidas
+
+    def test_contador_y_marcar_todas_leidas(self):
+        crear_notificaciones([
+            Notificacion(usuario=self.usuario, titulo=f"Aviso {i}", mensaje="...") for i in range(3)
+        ])
+        self.assertEqual(self._contador(), 3)
+
+        response = self.client.get(reverse('avisos_list'))
+        self.assertContains(response, 'bg-danger ms-1">3</span>')
+
+        with CaptureQueriesContext(connection) as consultas:
+            marcar_notificaciones_leidas(self.usuario)
+        # Un UPDATE para las notificaciones y otro para el contador, sin importar cuántas sean
+        self.assertEqual([q['sql'].split()[0] for q in consultas if 'SAVEPOINT' not in q['sql']], ['UPDATE', 'UPDATE'])
+        self.assertEqual(self._contador(), 0)
+        self.assertFalse(Notificacion.objects.filter(usuario=self.usuario, leido=False).exists())
+
+        response = self.client.post(reverse('avisos_marcar_leidas'))
+        self.assertRedirects(response, reverse('avisos_list'))
+        self.assertEqual(self._contador(), 0)
+
+    def test_contador_con_notificaciones_guardadas_de_a_una(self):
+        # Como desde el admin: crear, marcar leída y volver a no leída, eliminar
+        aviso = Notificacion.objects.create(usuario=self.usuario, titulo="Admin", mensaje="...")
+        otro = Notificacion.objects.create(usuario=self.usuario, titulo="Admin 2", mensaje="...")
+        self.assertEqual(self._contador(), 2)
+
+        leido = Notificacion.objects.get(pk=aviso.pk)
+        leido.leido = True
+        leido.save()
+        self.assertEqual(self._contador(), 1)
+        leido.leido = False
+        leido.save()
+        self.assertEqual(self._contador(), 2)
+
+        Notificacion.objects.get(pk=otro.pk).delete()
+        self.assertEqual(self._contador(), 1)
+        self.assertEqual(marcar_notificaciones_leidas(self.usuario), 1)
+        self.assertEqual(self._contador(), 0)
+
+    def test_bandeja_paginada(self):
+        crear_notificaciones([
+            Notificacion(usuario=self.usuario, titulo=f"Aviso {i}", mensaje="...") for i in range(5)
+        ])
+        with override_settings(LIST_PAGE_SIZE=3):
+            primera = self.client.get(reverse('avisos_list'))
+            segunda = self.client.get(reverse('avisos_list'), {'cursor': primera.context['pagina'].siguiente})
+
+        vistos = [n.pk for n in primera.context['notificaciones']] + [n.pk for n in segunda.context['notificaciones']]
+        self.assertEqual(len(primera.context['notificaciones']), 3)
+        self.assertEqual(sorted(vistos, reverse=True), vistos)
+        self.assertEqual(len(set(vistos)), 5)
+
+    def test_notificaciones_por_correo_van_a_la_bandeja(self):
+        crear_notificaciones([
+            Notificacion(usuario=self.usuario, titulo=f"Aviso {i}", mensaje="...") for i in range(2)
+        ], por_correo=True)
+        self.assertEqual(
+            list(CorreoSaliente.objects.values_list('destinatarios', flat=True)),
+            [['vecino@example.com']] * 2
+        )
+
+
+class RemuneracionesListViewTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        self.condominio = Condominio.objects.create(nombre="Condo RRHH")
+        self.metodo = CatMetodoPago.objects.create(codigo="TRANSF", nombre="Transferencia")
+        self.url = reverse('remuneraciones_list', kwargs={'condominio_id': self.condominio.pk})
+
+    def _trabajador(self, rut):
+        return Trabajador.objects.create(
+            id_condominio=self.condominio, tipo="Planta", rut_base=rut, rut_dv="1",
+            nombres=f"Nombre {rut}", apellidos=f"Apellido {rut}", cargo="Conserje"
+        )
+
+    def _remuneracion(self, trabajador, periodo, liquido):
+        return Remuneracion.objects.create(
+            id_trabajador=trabajador, periodo=periodo, bruto=Decimal(liquido) * 2,
+            liquido=Decimal(liquido), id_metodo_pago=self.metodo
+        )
+
+    def test_totales_por_periodo_y_consultas_constantes(self):
+        self._remuneracion(self._trabajador(10), "202501", 100)
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(self.url)
+
+        for rut in range(11, 15):
+            trabajador = self._trabajador(rut)
+            self._remuneracion(trabajador, "202501", 100)
+            self._remuneracion(trabajador, "202502", 300)
+        olvidar_condominios([self.condominio.pk])
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.get(self.url)
+        self.assertEqual(len(pocas), len(muchas))
+
+        self.assertEqual(
+            [(g['periodo'], g['liquido'], g['cantidad']) for g in response.context['grupos']],
+            [("202502", Decimal("1200"), 4), ("202501", Decimal("500"), 5)]
+        )
+
+        filtrado = self.client.get(self.url, {'periodo': '202501'})
+        self.assertEqual([g['periodo'] for g in filtrado.context['grupos']], ["202501"])
+
+
+class ApiV1Tests(TestCase):
+    def setUp(self):
+        Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        self.condominio = Condominio.objects.create(nombre="Condo API")
+        categoria = GastoCategoria.objects.create(nombre="Aseo")
+        for periodo, total in (("202501", 100), ("202502", 200), ("202502", 300), ("202503", 400)):
+            Gasto.objects.create(
+                id_condominio=self.condominio, periodo=periodo, id_gasto_categ=categoria, total=Decimal(total)
+            )
+        self.url = reverse('api_listar', kwargs={'condominio_id': self.condominio.pk, 'recurso': 'gastos'})
+
+    def test_campos_rango_y_cursor(self):
+        filtros = {'fields': 'total,categoria', 'desde': '202502', 'limit': 2}
+        primera = self.client.get(self.url, filtros).json()
+        segunda = self.client.get(self.url, {**filtros, 'cursor': primera['siguiente']}).json()
+
+        # Los campos del orden (periodo, id_gasto) se incluyen siempre para el cursor
+        self.assertEqual(set(primera['datos'][0]), {'total', 'categoria', 'periodo', 'id_gasto'})
+        self.assertEqual(primera['datos'][0]['categoria'], 'Aseo')
+        totales = [fila['total'] for fila in primera['datos'] + segunda['datos']]
+        self.assertEqual(totales, ['200.00', '300.00', '400.00'])
+        self.assertIsNone(segunda['siguiente'])
+
+        self.assertEqual(self.client.get(self.url, {'fields': 'clave'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url.replace('gastos', 'usuarios')).status_code, 404)
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['datos']), 4)
+
+        repetida = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+        # El 304 sale de Condominio.version_datos: no consulta los gastos
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertFalse(any('"gasto"' in consulta['sql'] for consulta in consultas.captured_queries))
+
+        gasto = Gasto.objects.get(periodo="202501")
+        gasto.total = Decimal(150)
+        with self.captureOnCommitCallbacks(execute=True):
+            gasto.save()
+        cambiada = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cambiada.status_code, 200)
+
+    def test_resumenes_y_catalogos_cambian_la_version(self):
+        resumenes = self.url.replace('gastos', 'resumenes')
+        with self.captureOnCommitCallbacks(execute=True):
+            resumen = ResumenMensual.objects.create(id_condominio=self.condominio, periodo="202501")
+        etag = self.client.get(resumenes)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resumen.total_pagado = Decimal(500)
+            resumen.save()
+        self.assertEqual(self.client.get(resumenes, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # La categoría es compartida: sube la versión de todos los condominios
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            categoria = GastoCategoria.objects.get(nombre="Aseo")
+            categoria.nombre = "Aseo y ornato"
+            categoria.save()
+        cambiada = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cambiada.status_code, 200)
+        self.assertEqual(cambiada.json()['datos'][0]['categoria'], "Aseo y ornato")
+
+    def test_sin_sesion_responde_401_json(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        self.assertIn('error', response.json())
+
+    def test_credencial_por_condominio(self):
+        self.client.logout()
+        credencial, token = emitir_credencial(self.condominio, "Contabilidad")
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['datos']), 4)
+
+        # Otro condominio: 403; token desconocido o revocado: 401
+        otro = Condominio.objects.create(nombre="Otro")
+        otra_url = reverse('api_listar', kwargs={'condominio_id': otro.pk, 'recurso': 'gastos'})
+        self.assertEqual(self.client.get(otra_url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer x.y').status_code, 401)
+        credencial.activa = False
+        credencial.save()
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 401)
+
+
+class ResumenCondominioAsyncTests(TransactionTestCase):
+    # TransactionTestCase: las consultas corren en otros hilos (otras conexiones) y
+    # solo ven datos confirmados.
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        self.condominio = Condominio.objects.create(nombre="Condo Resumen")
+        unidad = Unidad.objects.create(
+            id_grupo=Grupo.objects.create(id_condominio=self.condominio, nombre="A", tipo="Torre"),
+            codigo="101", coef_prop=Decimal("0.05")
+        )
+        categoria = GastoCategoria.objects.create(nombre="Aseo")
+        for total in (100, 250):
+            Gasto.objects.create(
+                id_condominio=self.condominio, periodo="202503", id_gasto_categ=categoria, total=Decimal(total)
+            )
+        Pago.objects.create(
+            id_unidad=unidad, fecha_pago=timezone.now(), periodo="202503", monto=Decimal(80),
+            id_metodo_pago=CatMetodoPago.objects.create(codigo="TRANSF", nombre="Transferencia")
+        )
+        crear_notificaciones([Notificacion(usuario=self.admin, titulo="Aviso", mensaje="Hola")])
+
+    def test_bloques_consultados_en_paralelo(self):
+        from apps.core import services
+        hilos = set()
+
+        def registrando(funcion):
+            def envoltura(*args):
+                hilos.add(threading.get_ident())
+                return funcion(*args)
+            return envoltura
+
+        bloques = ('_resumen_gastos', '_resumen_cobros', '_resumen_pagos', '_resumen_fondo_reserva', '_resumen_avisos')
+        with ExitStack() as stack:
+            for nombre in bloques:
+                stack.enter_context(mock.patch.object(services, nombre, registrando(getattr(services, nombre))))
+            response = self.client.get(
+                reverse('resumen_condominio', kwargs={'condominio_id': self.condominio.pk}), {'periodo': '202503'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['gastos']['total'], Decimal("350"))
+        self.assertEqual(response.context['pagos']['cantidad'], 1)
+        self.assertEqual(response.context['fondo']['saldo'], 0)
+        self.assertEqual([a['titulo'] for a in response.context['avisos']], ["Aviso"])
+        # Ningún bloque corrió en el hilo de la vista
+        self.assertNotIn(threading.get_ident(), hilos)
+        self.assertGreater(len(hilos), 1)
+
+
+class CondominioMiddlewareTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        self.condominio = Condominio.objects.create(nombre="Condo Tema", color_primario="#112233")
+        self.url = reverse('trabajadores_list', kwargs={'condominio_id': self.condominio.pk})
+
+    def test_condominio_cacheado_e_invalidado_al_guardar(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "--bs-primary: #112233")
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url)
+        self.assertFalse(any('FROM "condominio"' in q['sql'] for q in consultas.captured_queries))
+
+        self.condominio.color_primario = "#445566"
+        self.condominio.save()
+        self.assertContains(self.client.get(self.url), "--bs-primary: #445566")
+
+        ausente = reverse('trabajadores_list', kwargs={'condominio_id': self.condominio.pk + 100})
+        self.assertEqual(self.client.get(ausente).status_code, 404)
+
+
+class _BackendQueFalla:
+    """Conexión de correo que rechaza los mensajes dirigidos a 'rebota@...'."""
+    def __init__(self, caido=False):
+        self.caido = caido
+        self.aperturas = 0
+        self.enviados = []
+
+    def open(self):
+        self.aperturas += 1
+        if self.caido:
+            raise ConnectionRefusedError('relay no disponible')
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send_messages(self, mensajes):
+        for mensaje in mensajes:
+            if mensaje.to[0].startswith('rebota@'):
+                raise ConnectionError('550 buzón inexistente')
+            self.enviados.append(mensaje)
+        return len(mensajes)
+
+
+@override_settings(EMAIL_OUTBOX_MAX_INTENTOS=2, EMAIL_OUTBOX_BACKOFF=60)
+class BandejaCorreoTests(TestCase):
+    def test_lote_por_una_conexion_con_reintento_y_backoff(self):
+        encolar_correo('Uno', 'a', ['uno@example.com'])
+        encolar_correo('Dos', 'b', ['rebota@example.com'])
+        encolar_correo('Tres', 'c', ['tres@example.com'])
+
+        conexion = _BackendQueFalla()
+        self.assertEqual(enviar_correos_pendientes(connection=conexion), (2, 1))
+        self.assertEqual(conexion.aperturas, 1)
+        self.assertEqual([m.subject for m in conexion.enviados], ['Uno', 'Tres'])
+
+        rebotado = CorreoSaliente.objects.get(asunto='Dos')
+        self.assertEqual((rebotado.estado, rebotado.intentos), ('pendiente', 1))
+        self.assertIn('550', rebotado.ultimo_error)
+        self.assertGreater(rebotado.proximo_intento_at, timezone.now() + timedelta(seconds=50))
+
+        # Aún no vence el backoff: nada que enviar
+        self.assertEqual(enviar_correos_pendientes(connection=conexion), (0, 0))
+
+        CorreoSaliente.objects.filter(pk=rebotado.pk).update(proximo_intento_at=timezone.now())
+        self.assertEqual(enviar_correos_pendientes(connection=conexion), (0, 1))
+        rebotado.refresh_from_db()
+        self.assertEqual((rebotado.estado, rebotado.intentos), ('fallido', 2))
+        self.assertEqual(CorreoSaliente.objects.filter(estado='enviado').count(), 2)
+
+    @override_settings(EMAIL_TIMEOUT=30, EMAIL_OUTBOX_RESERVA=0)
+    def test_reserva_cubre_el_lote_completo(self):
+        for i in range(3):
+            encolar_correo(f'Correo {i}', 'x', [f'{i}@example.com'])
+        reservas = []
+
+        class _Registrando(_BackendQueFalla):
+            def send_messages(self, mensajes):
+                reservas.append(CorreoSaliente.objects.get(asunto=mensajes[0].subject).proximo_intento_at)
+                return super().send_messages(mensajes)
+
+        inicio = timezone.now()
+        enviar_correos_pendientes(connection=_Registrando())
+        # Tres envíos más la apertura, cada uno hasta EMAIL_TIMEOUT
+        for reserva in reservas:
+            self.assertGreaterEqual(reserva, inicio + timedelta(seconds=120))
+
+    def test_relay_caido_reprograma_todo_el_lote(self):
+        encolar_correo('Uno', 'a', ['uno@example.com'])
+        encolar_correo('Dos', 'b', ['dos@example.com'])
+
+        self.assertEqual(enviar_correos_pendientes(connection=_BackendQueFalla(caido=True)), (0, 2))
+        for correo in CorreoSaliente.objects.all():
+            self.assertEqual((correo.estado, correo.intentos), ('pendiente', 1))
+            self.assertIn('ConnectionRefusedError', correo.ultimo_error)
+            self.assertGreater(correo.proximo_intento_at, timezone.now() + timedelta(seconds=50))
+
+
+class AuditoriaBufferTests(TestCase):
+    def test_un_insert_al_commit_sin_entradas_revertidas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for i in range(2):
+                        auditar('Pago', i, 'CREATE', detalle={'n': i})
+                    try:
+                        with transaction.atomic():
+                            auditar('Pago', 99, 'CREATE')
+                            raise ValueError
+                    except ValueError:
+                        pass
+                    auditar('Pago', 2, 'CREATE')
+                    self.assertFalse(Auditoria.objects.exists())
+
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT INTO "auditoria"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(sorted(Auditoria.objects.values_list('entidad_id', flat=True)), [0, 1, 2])
+
+    def test_transaccion_revertida_no_audita(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    auditar('Gasto', 1, 'CREATE')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertFalse(Auditoria.objects.exists())
+
+    @override_settings(AUDITORIA_SINCRONA=True)
+    def test_modo_sincrono(self):
+        auditar('Gasto', 7, 'DELETE', detalle={'motivo': 'test'})
+        self.assertEqual(Auditoria.objects.get().usuario_email, 'sistema')
+
+
+class AuditoriaCommitRealTests(TransactionTestCase):
+    # Commit real (sin petición que vacíe el buffer al terminar, como en un comando)
+    def test_savepoint_final_revertido_no_retiene_las_confirmadas(self):
+        with transaction.atomic():
+            auditar('Pago', 1, 'CREATE')
+            try:
+                with transaction.atomic():
+                    auditar('Pago', 99, 'CREATE')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(list(Auditoria.objects.values_list('entidad_id', flat=True)), [1])
+
+        # La transacción siguiente escribe solo lo suyo
+        with transaction.atomic():
+            auditar('Pago', 2, 'CREATE')
+        self.assertEqual(Auditoria.objects.count(), 2)
+
+    def test_entradas_de_savepoint_confirmado_despues_de_la_ultima_externa(self):
+        with transaction.atomic():
+            auditar('Pago', 1, 'CREATE')
+            with transaction.atomic():
+                auditar('Pago', 2, 'CREATE')
+                auditar('Pago', 3, 'CREATE')
+        self.assertEqual(sorted(Auditoria.objects.values_list('entidad_id', flat=True)), [1, 2, 3])
+
+
+class AuditoriaListViewTests(TestCase):
+    def setUp(self):
+        Usuario.objects.create_superuser(
+            email='admin@example.com', password='password',
+            rut_base=1, rut_dv='9', nombres='Admin', apellidos='User'
+        )
+        self.client.login(email='admin@example.com', password='password')
+        Auditoria.objects.bulk_create(
+            [Auditoria(entidad='Pago', entidad_id=i % 2, accion='CREATE', usuario_email='sistema') for i in range(5)]
+            + [Auditoria(entidad='Gasto', entidad_id=0, accion='DELETE', usuario_email='sistema')]
+        )
+
+    def test_filtra_y_pagina_sin_conteo(self):
+        url = reverse('auditoria_list')
+        with override_settings(LIST_PAGE_SIZE=2):
+            with CaptureQueriesContext(connection) as consultas:
+                primera = self.client.get(url, {'entidad': 'Pago', 'entidad_id': '0'})
+            segunda = self.client.get(
+                url, {'entidad': 'Pago', 'entidad_id': '0', 'cursor': primera.context['pagina'].siguiente}
+            )
+
+        vistos = [r.pk for r in primera.context['registros']] + [r.pk for r in segunda.context['registros']]
+        esperados = Auditoria.objects.filter(entidad='Pago', entidad_id=0).order_by('-created_at', '-id_auditoria')
+        self.assertEqual(vistos, list(esperados.values_list('pk', flat=True)))
+        self.assertFalse(any('COUNT(' in q['sql'] for q in consultas.captured_queries))
+        self.assertContains(self.client.get(url, {'accion': 'DELETE'}), 'Gasto #0')
+
+    def test_admin_sin_conteo_completo(self):
+        response = self.client.get(reverse('admin:core_auditoria_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['cl'].show_full_result_count)
+
+
+class ArchivoHistoricoTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(ARCHIVO_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_archiva_por_mes_en_bloques_y_lee_en_streaming(self):
+        Auditoria.objects.bulk_create([
+            Auditoria(entidad='Pago' if i % 2 else 'Gasto', entidad_id=i, accion='CREATE') for i in range(5)
+        ])
+        fechas = [datetime(2024, 1, 10), datetime(2024, 1, 20), datetime(2024, 2, 5), datetime(2024, 2, 6)]
+        for registro, fecha in zip(Auditoria.objects.order_by('entidad_id'), fechas):
+            Auditoria.objects.filter(pk=registro.pk).update(created_at=timezone.make_aware(fecha))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archivar_tabla('auditoria', bloque=3), 4)
+        self.assertEqual(list(Auditoria.objects.values_list('entidad_id', flat=True)), [4])
+        self.assertEqual(meses_archivados('auditoria'), ['2024-01', '2024-02'])
+
+        pagos = list(leer_archivo('auditoria', entidad='Pago'))
+        self.assertEqual([fila['entidad_id'] for fila in pagos], [1, 3])
+        self.assertEqual([fila['entidad_id'] for fila in leer_archivo('auditoria', desde='2024-02')], [2, 3])
+
+    def test_notificaciones_archivadas_descuentan_no_leidas(self):
+        usuario = Usuario.objects.create_user(
+            email='vecino@example.com', password='password',
+            rut_base=5, rut_dv='1', nombres='Vecino', apellidos='Uno'
+        )
+        crear_notificaciones([Notificacion(usuario=usuario, titulo=f"Aviso {i}", mensaje="...") for i in range(3)])
+        antigua = Notificacion.objects.order_by('pk').first()
+        Notificacion.objects.filter(pk=antigua.pk).update(created_at=timezone.now() - timedelta(days=400))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archivar', tabla=['notificacion'], stdout=StringIO())
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.notificaciones_no_leidas, 2)
+        self.assertEqual([fila['titulo'] for fila in leer_archivo('notificacion')], [antigua.titulo])
+
+    def test_bloque_revertido_no_queda_en_el_archivo(self):
+        Auditoria.objects.bulk_create([Auditoria(entidad='Pago', entidad_id=i, accion='CREATE') for i in range(2)])
+        Auditoria.objects.update(created_at=timezone.make_aware(datetime(2024, 1, 10)))
+
+        # Falla después de escribir y eliminar, dentro de la transacción del bloque
+        falla = {'auditoria': (Auditoria, 'AUDITORIA_RETENCION_DIAS', mock.Mock(side_effect=OSError))}
+        with mock.patch('apps.core.archivo.TABLAS', falla):
+            with self.assertRaises(OSError):
+                archivar_tabla('auditoria')
+        # Las filas siguen en la base y nada quedó publicado ni a medio escribir
+        self.assertEqual(Auditoria.objects.count(), 2)
+        self.assertEqual(meses_archivados('auditoria'), [])
+        self.assertEqual(list(Path(settings.ARCHIVO_DIR).rglob('*.tmp')), [])
+
+        # Reintento: cada fila una sola vez
+        with self.captureOnCommitCallbacks(execute=True):
+            archivar_tabla('auditoria')
+        self.assertEqual(sorted(fila['entidad_id'] for fila in leer_archivo('auditoria')), [0, 1])
+
+    def test_temporales_de_una_ejecucion_interrumpida(self):
+        Auditoria.objects.bulk_create([Auditoria(entidad='Pago', entidad_id=i, accion='CREATE') for i in range(2)])
+        Auditoria.objects.update(created_at=timezone.make_aware(datetime(2024, 1, 10)))
+        # Commit hecho pero sin renombrar: el .tmp queda y sus filas ya no están
+        with self.captureOnCommitCallbacks(execute=False):
+            archivar_tabla('auditoria')
+        self.assertEqual(meses_archivados('auditoria'), [])
+
+        archivar_tabla('auditoria')
+        self.assertEqual(sorted(fila['entidad_id'] for fila in leer_archivo('auditoria')), [0, 1])
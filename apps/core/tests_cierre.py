@@ -1,11 +1,31 @@
 # apps/core/tests_cierre.py
-from django.test import TestCase, Client
+import io
+import os
+import socket
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
-from apps.core.models import Condominio, Unidad, Grupo, ProrrateoRegla, CatConceptoCargo, CatCobroEstado
-from apps.core.services import generar_cierre_mensual
+from django.core.cache import cache, caches
+from django.utils import timezone
+
+from apps.core.models import (
+    Condominio, Unidad, Grupo, ProrrateoRegla, CatConceptoCargo, CatCobroEstado, Cobro,
+    CobroDetalle, CatMetodoPago, CondominioKpi, CorreoSaliente, Gasto, GastoCategoria
+)
+from apps.core.services import (
+    generar_cierre_mensual, resumen_cierre, registrar_pago, anular_pago, recalcular_kpi_condominio,
+    portal_residente
+)
+from apps.usuarios.models import Residencia
+from apps.core.utils import atender_peticion_pdf, html_to_pdf_bytes
 
 Usuario = get_user_model()
 
@@ -22,6 +42,12 @@ class CierreMensualServiceTest(TestCase):
 
 class CierreMensualViewTest(TestCase):
     def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(PDF_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
         self.client = Client()
         self.admin_user = Usuario.objects.create_superuser(
             email="admin@test.com",
@@ -32,6 +58,7 @@ class CierreMensualViewTest(TestCase):
             apellidos='User'
         )
         self.client.login(email="admin@test.com", password="password")
+        caches['fragmentos'].clear()
 
         self.condominio = Condominio.objects.create(nombre="Condominio PDF")
         self.grupo = Grupo.objects.create(id_condominio=self.condominio, nombre="Torre A", tipo="Torre")
@@ -61,3 +88,422 @@ class CierreMensualViewTest(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_exportar_pdf_reutiliza_cache_y_soporta_304(self):
+        """
+        Verifica que un segundo pedido del mismo cierre no vuelve a ejecutar WeasyPrint
+        y que un cliente con el ETag vigente recibe 304.
+        """
+        url = reverse('cierre_mensual', kwargs={'condominio_id': self.condominio.pk})
+        params = {'export_pdf': 'true', 'periodo': '202512'}
+
+        with mock.patch('apps.core.utils.html_to_pdf_bytes', return_value=b'%PDF-1.4 prueba') as html_mock:
+            primera = self.client.get(url, params)
+            segunda = self.client.get(url, params)
+            condicional = self.client.get(url, params, HTTP_IF_NONE_MATCH=primera['ETag'])
+
+        self.assertEqual(html_mock.call_count, 1)
+        self.assertEqual(segunda.content, primera.content)
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+        self.assertIn('Last-Modified', segunda)
+        self.assertEqual(condicional.status_code, 304)
+
+    def test_cache_pdf_se_invalida_al_cambiar_estilos_o_unidades(self):
+        """
+        Un cambio en las hojas de estilo (deploy) o en el código de una unidad no debe seguir
+        sirviendo el PDF cacheado.
+        """
+        estilos = tempfile.NamedTemporaryFile('w', suffix='.css', delete=False)
+        estilos.write('body { color: black; }')
+        estilos.close()
+        self.addCleanup(os.unlink, estilos.name)
+
+        url = reverse('cierre_mensual', kwargs={'condominio_id': self.condominio.pk})
+        params = {'export_pdf': 'true', 'periodo': '202512'}
+        with override_settings(PDF_STYLESHEETS=[estilos.name]), \
+                mock.patch('apps.core.utils.html_to_pdf_bytes', return_value=b'%PDF-1.4 prueba') as html_mock:
+            primera = self.client.get(url, params)
+            os.utime(estilos.name, ns=(0, os.stat(estilos.name).st_mtime_ns + 10 ** 9))
+            segunda = self.client.get(url, params, HTTP_IF_NONE_MATCH=primera['ETag'])
+            self.assertEqual(segunda.status_code, 200)
+            self.assertEqual(html_mock.call_count, 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.unidad.codigo = "101-A"
+                self.unidad.save()
+            tercera = self.client.get(url, params, HTTP_IF_NONE_MATCH=segunda['ETag'])
+            self.assertEqual(tercera.status_code, 200)
+            self.assertEqual(html_mock.call_count, 3)
+
+    def test_pdf_muestra_la_fecha_de_los_datos(self):
+        """
+        El PDF se cachea por versión de datos: la fecha impresa es la de los datos, no la hora
+        de la descarga.
+        """
+        fecha = timezone.make_aware(datetime(2025, 3, 1, 10, 30))
+        Condominio.objects.filter(pk=self.condominio.pk).update(datos_modificados_at=fecha)
+        url = reverse('cierre_mensual', kwargs={'condominio_id': self.condominio.pk})
+        renderizado = []
+        with mock.patch('apps.core.utils.html_to_pdf_bytes',
+                        side_effect=lambda html: renderizado.append(''.join(html)) or b'%PDF-1.4 prueba'):
+            self.client.get(url, {'export_pdf': 'true', 'periodo': '202512'})
+        self.assertIn('01/03/2025 10:30', renderizado[0])
+
+    def test_resumen_cierre_y_periodo_explicito(self):
+        """
+        Verifica el resumen del cierre y que con el periodo en la URL no se busca el próximo periodo.
+        """
+        resumen = resumen_cierre(self.condominio, "202512")
+        self.assertTrue(resumen['ya_cerrado'])
+        self.assertEqual(resumen['cantidad_cobros'], 1)
+        self.assertFalse(resumen_cierre(self.condominio, "202511")['ya_cerrado'])
+
+        url = reverse('cierre_mensual', kwargs={'condominio_id': self.condominio.pk})
+        with mock.patch('apps.core.views.get_proximo_periodo') as proximo:
+            response = self.client.get(url, {'periodo': '202512'})
+        proximo.assert_not_called()
+        self.assertEqual(response.context['cantidad_cobros'], 1)
+
+    def test_exportar_pdf_por_bloques(self):
+        """
+        Verifica que el cierre se maqueta en bloques de PDF_CHUNK_SIZE cobros, con el
+        encabezado solo en el primero y el total general solo en el último.
+        """
+        Unidad.objects.create(id_grupo=self.grupo, codigo="102", coef_prop=Decimal("0.05"))
+        generar_cierre_mensual(self.condominio, "202512")
+
+        url = reverse('cierre_mensual', kwargs={'condominio_id': self.condominio.pk})
+        recibidos = []
+
+        def renderizar(bloques):
+            # Los bloques llegan como generador: se producen a medida que se piden
+            self.assertNotIsInstance(bloques, (list, str))
+            recibidos.extend(bloques)
+            return b'%PDF-1.4 prueba'
+
+        with override_settings(PDF_CHUNK_SIZE=1), \
+                mock.patch('apps.core.utils.html_to_pdf_bytes', side_effect=renderizar):
+            response = self.client.get(url, {'export_pdf': 'true', 'periodo': '202512'})
+
+        self.assertEqual(response.status_code, 200)
+        primero, ultimo = recibidos
+        self.assertIn('Resumen del Cierre Mensual', primero)
+        self.assertNotIn('Total General', primero)
+        self.assertNotIn('Resumen del Cierre Mensual', ultimo)
+        self.assertIn('Total General', ultimo)
+
+    def test_avisos_cobro_zip_contiene_un_pdf_por_unidad(self):
+        """
+        Verifica que el lote de avisos entrega un ZIP (en streaming) con un PDF por cobro.
+        """
+        Unidad.objects.create(id_grupo=self.grupo, codigo="102", coef_prop=Decimal("0.05"))
+        generar_cierre_mensual(self.condominio, "202512")
+
+        url = reverse('avisos_cobro_zip', kwargs={'condominio_id': self.condominio.pk, 'periodo': '202512'})
+        with override_settings(PDF_BATCH_WORKERS=1), \
+                mock.patch('apps.core.utils.html_to_pdf_bytes', return_value=b'%PDF-1.4 prueba'):
+            response = self.client.get(url)
+            contenido = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+            self.assertEqual(
+                archivo_zip.namelist(),
+                ['aviso_202512_101.pdf', 'aviso_202512_102.pdf']
+            )
+            self.assertEqual(archivo_zip.read('aviso_202512_101.pdf'), b'%PDF-1.4 prueba')
+
+    def test_cobros_list_paginado_por_cursor_y_filtros(self):
+        """
+        Verifica que el listado de cobros avanza y retrocede por cursor sin repetir filas
+        y que el filtro de saldo excluye los cobros pagados.
+        """
+        for codigo in ("102", "103"):
+            Unidad.objects.create(id_grupo=self.grupo, codigo=codigo, coef_prop=Decimal("0.05"))
+        generar_cierre_mensual(self.condominio, "202512")
+
+        url = reverse('cobros_list', kwargs={'condominio_id': self.condominio.pk, 'periodo': '202512'})
+        codigos = lambda r: [c.id_unidad.codigo for c in r.context['cobros']]
+
+        with override_settings(LIST_PAGE_SIZE=2):
+            primera = self.client.get(url)
+            segunda = self.client.get(url, {'cursor': primera.context['pagina'].siguiente})
+            de_vuelta = self.client.get(url, {'cursor': segunda.context['pagina'].anterior})
+            invalido = self.client.get(url, {'cursor': 'no-es-un-cursor'})
+
+        self.assertEqual(codigos(primera), ["101", "102"])
+        self.assertIsNone(primera.context['pagina'].anterior)
+        self.assertEqual(codigos(segunda), ["103"])
+        self.assertIsNone(segunda.context['pagina'].siguiente)
+        self.assertEqual(codigos(de_vuelta), ["101", "102"])
+        self.assertEqual(codigos(invalido), ["101", "102"])
+
+        Cobro.objects.filter(periodo="202512").update(saldo=Decimal("1000"))
+        Cobro.objects.filter(id_unidad__codigo="102").update(saldo=0)
+        response = self.client.get(url, {'con_saldo': '1'})
+        self.assertEqual(codigos(response), ["101", "103"])
+
+    def test_exportar_cobros_csv_con_detalle(self):
+        """
+        Verifica que la exportación de cobros sale en streaming con una fila por línea de detalle.
+        """
+        url = reverse('exportar_cobros_csv', kwargs={'condominio_id': self.condominio.pk})
+        response = self.client.get(url, {'desde': '202512', 'hasta': '202512'})
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lineas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        detalles = CobroDetalle.objects.filter(id_cobro__periodo="202512").count()
+        self.assertEqual(len(lineas) - 1, max(detalles, 1))
+        self.assertTrue(all(l.startswith('202512,101,') for l in lineas[1:]))
+
+        vacio = self.client.get(url, {'desde': '202601'})
+        self.assertEqual(len(b''.join(vacio.streaming_content).decode('utf-8-sig').splitlines()), 1)
+
+
+class CondominioKpiTest(TestCase):
+    """
+    Verifica que la tabla de KPIs del dashboard se mantiene al día con los eventos
+    y coincide con un recálculo completo.
+    """
+    def setUp(self):
+        self.condominio = Condominio.objects.create(nombre="Condominio KPI")
+        grupo = Grupo.objects.create(id_condominio=self.condominio, nombre="Torre A", tipo="Torre")
+        self.unidades = [
+            Unidad.objects.create(id_grupo=grupo, codigo=codigo, coef_prop=Decimal("0.5"))
+            for codigo in ("101", "102")
+        ]
+        generar_cierre_mensual(self.condominio, "202512")
+        Cobro.objects.filter(periodo="202512").update(saldo=Decimal("1000"))
+        recalcular_kpi_condominio(self.condominio)
+        self.metodo = CatMetodoPago.objects.create(codigo="TRANSF", nombre="Transferencia")
+
+    def _kpi(self):
+        return CondominioKpi.objects.get(pk=self.condominio.pk)
+
+    def test_pagos_y_anulaciones_ajustan_kpis(self):
+        self.assertEqual(self._kpi().unidades_con_deuda, 2)
+
+        pago = registrar_pago(self.unidades[0], Decimal("1000"), self.metodo, timezone.now())
+        registrar_pago(self.unidades[1], Decimal("400"), self.metodo, timezone.now())
+        kpi = self._kpi()
+        self.assertEqual(kpi.total_recaudado, Decimal("1400"))
+        self.assertEqual(kpi.saldo_por_cobrar, Decimal("600"))
+        self.assertEqual(kpi.unidades_con_deuda, 1)
+
+        anular_pago(pago.pk)
+        kpi = self._kpi()
+        self.assertEqual(kpi.total_recaudado, Decimal("400"))
+        self.assertEqual(kpi.unidades_con_deuda, 2)
+
+        # Lo mantenido incrementalmente coincide con el recálculo completo
+        recalculado = recalcular_kpi_condominio(self.condominio)
+        for campo in ('total_facturado', 'total_recaudado', 'saldo_por_cobrar', 'unidades_con_deuda'):
+            self.assertEqual(getattr(kpi, campo), getattr(recalculado, campo), campo)
+
+    def test_gastos_pendientes_siguen_validacion_edicion_y_borrado(self):
+        categoria = GastoCategoria.objects.create(nombre="Aseo")
+        gastos = [
+            Gasto.objects.create(id_condominio=self.condominio, periodo="202512", id_gasto_categ=categoria, total=Decimal(total))
+            for total in (100, 200, 300)
+        ]
+        kpi = self._kpi()
+        self.assertEqual((kpi.gastos_pendientes, kpi.monto_gastos_pendientes), (3, Decimal("600")))
+
+        # Validar (desde una instancia leída de la BD, como el admin), editar y borrar
+        validado = Gasto.objects.get(pk=gastos[0].pk)
+        validado.estado_validacion = Gasto.EstadoValidacion.APROBADO
+        validado.save()
+        kpi = self._kpi()
+        self.assertEqual((kpi.gastos_pendientes, kpi.monto_gastos_pendientes), (2, Decimal("500")))
+
+        gastos[1].total, gastos[1].neto, gastos[1].iva = Decimal(250), 0, 0
+        gastos[1].save()
+        gastos[2].delete()
+        kpi = self._kpi()
+        self.assertEqual((kpi.gastos_pendientes, kpi.monto_gastos_pendientes), (1, Decimal("250")))
+
+        recalculado = recalcular_kpi_condominio(self.condominio)
+        self.assertEqual(
+            (kpi.gastos_pendientes, kpi.monto_gastos_pendientes),
+            (recalculado.gastos_pendientes, recalculado.monto_gastos_pendientes)
+        )
+
+    def test_dashboard_muestra_solo_condominios_administrados(self):
+        from apps.usuarios.models import UsuarioAdminCondo
+
+        admin = Usuario.objects.create_user(
+            email="admin@kpi.com", password="password", rut_base=2, rut_dv='7',
+            nombres='Admin', apellidos='Condo', tipo_usuario='admin'
+        )
+        UsuarioAdminCondo.objects.create(id_usuario=admin, id_condominio=self.condominio)
+        Condominio.objects.create(nombre="Otro Condominio")
+
+        self.client.login(email="admin@kpi.com", password="password")
+        response = self.client.get(reverse('index'))
+
+        self.assertEqual([c.nombre for c in response.context['mis_condominios']], ["Condominio KPI"])
+        self.assertContains(response, "Morosidad")
+
+
+class PortalResidenteTest(TestCase):
+    """
+    Verifica que el portal resuelve todo en un número fijo de consultas, se cachea por
+    usuario y se invalida al registrar un pago.
+    """
+    def setUp(self):
+        cache.clear()
+        self.condominio = Condominio.objects.create(nombre="Condominio Portal")
+        grupo = Grupo.objects.create(id_condominio=self.condominio, nombre="Torre A", tipo="Torre")
+        self.residente = Usuario.objects.create_user(
+            email="residente@test.com", password="password", rut_base=3, rut_dv='5',
+            nombres='Ana', apellidos='Residente'
+        )
+        self.unidades = []
+        for codigo in ("101", "102"):
+            unidad = Unidad.objects.create(id_grupo=grupo, codigo=codigo, coef_prop=Decimal("0.5"))
+            Residencia.objects.create(
+                id_unidad=unidad, id_usuario=self.residente,
+                origen=Residencia.OrigenResidencia.PROPIETARIO, desde="2024-01-01"
+            )
+            self.unidades.append(unidad)
+        for periodo in ("202511", "202512"):
+            generar_cierre_mensual(self.condominio, periodo)
+        Cobro.objects.update(saldo=Decimal("500"))
+        self.metodo = CatMetodoPago.objects.create(codigo="TRANSF", nombre="Transferencia")
+
+    def test_consultas_fijas_cache_e_invalidacion(self):
+        with self.assertNumQueries(4):
+            unidades = portal_residente(self.residente)
+        self.assertEqual([u.codigo for u in unidades], ["101", "102"])
+        self.assertEqual(unidades[0].saldo_actual, Decimal("1000"))
+        self.assertEqual(len(unidades[0].cobros_recientes), 2)
+
+        with self.assertNumQueries(0):
+            portal_residente(self.residente)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_pago(self.unidades[0], Decimal("1000"), self.metodo, timezone.now())
+
+        unidades = portal_residente(self.residente)
+        self.assertEqual(unidades[0].saldo_actual, 0)
+        self.assertEqual(len(unidades[0].pagos_recientes), 1)
+
+    def test_cierre_y_pago_dejan_correos_en_la_bandeja(self):
+        # Dos cierres x dos unidades en setUp
+        self.assertEqual(
+            CorreoSaliente.objects.filter(asunto="Gastos Comunes Disponibles", destinatarios=["residente@test.com"]).count(), 4
+        )
+        registrar_pago(self.unidades[0], Decimal("1000"), self.metodo, timezone.now())
+        self.assertTrue(CorreoSaliente.objects.filter(asunto="Pago Confirmado", estado='pendiente').exists())
+
+    def test_vista_muestra_unidades_del_residente(self):
+        self.client.login(email="residente@test.com", password="password")
+        response = self.client.get(reverse('portal_residente'))
+        self.assertContains(response, "Unidad 101")
+        self.assertContains(response, "Saldo $ 1000")
+
+
+class PdfWorkerProtocoloTest(TestCase):
+    """
+    Verifica el cliente del worker persistente de PDFs contra un servidor en un hilo.
+    """
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta_socket = os.path.join(directorio.name, 'pdf.sock')
+
+    def _servidor_una_peticion(self, renderizar):
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        servidor.bind(self.ruta_socket)
+        servidor.listen(1)
+
+        def atender():
+            conexion, _ = servidor.accept()
+            with conexion:
+                atender_peticion_pdf(conexion, renderizar=renderizar)
+            servidor.close()
+
+        hilo = threading.Thread(target=atender)
+        hilo.start()
+        return hilo
+
+    def test_delega_render_al_worker(self):
+        hilo = self._servidor_una_peticion(lambda bloques: b'%PDF-1.4 ' + '|'.join(bloques).encode('utf-8'))
+        with override_settings(PDF_RENDER_SOCKET=self.ruta_socket), \
+                mock.patch('apps.core.utils._render_local') as render_local:
+            pdf = html_to_pdf_bytes('<p>Ñandú</p>')
+        hilo.join(timeout=5)
+
+        self.assertEqual(pdf, '%PDF-1.4 <p>Ñandú</p>'.encode('utf-8'))
+        render_local.assert_not_called()
+
+    def test_worker_recibe_bloques_en_orden(self):
+        hilo = self._servidor_una_peticion(lambda bloques: '|'.join(bloques).encode('utf-8'))
+        with override_settings(PDF_RENDER_SOCKET=self.ruta_socket):
+            pdf = html_to_pdf_bytes(['<p>1</p>', '<p>2</p>', '<p>3</p>'])
+        hilo.join(timeout=5)
+
+        self.assertEqual(pdf, b'<p>1</p>|<p>2</p>|<p>3</p>')
+
+    def test_error_del_worker_se_propaga(self):
+        def falla(html):
+            raise ValueError('HTML inválido')
+
+        hilo = self._servidor_una_peticion(falla)
+        with override_settings(PDF_RENDER_SOCKET=self.ruta_socket), \
+                self.assertLogs('apps.core.utils', level='ERROR'):
+            with self.assertRaisesRegex(RuntimeError, 'HTML inválido'):
+                html_to_pdf_bytes('<p>x</p>')
+        hilo.join(timeout=5)
+
+    def test_sin_worker_renderiza_localmente(self):
+        with override_settings(PDF_RENDER_SOCKET=self.ruta_socket), \
+                mock.patch('apps.core.utils._render_local', return_value=b'%PDF-local') as render_local:
+            pdf = html_to_pdf_bytes('<p>x</p>')
+
+        self.assertEqual(pdf, b'%PDF-local')
+        render_local.assert_called_once_with(['<p>x</p>'])
+
+
+class RenderLocalPorBloquesTest(TestCase):
+    """
+    Verifica la unión de bloques de _render_local con un WeasyPrint simulado: cada bloque se
+    escribe como PDF propio y la numeración de páginas continúa entre bloques.
+    """
+    def test_une_pdfs_de_cada_bloque_con_numeracion_continua(self):
+        from pypdf import PdfReader, PdfWriter
+        from apps.core import utils
+
+        reinicios = []
+
+        class Documento:
+            def __init__(self, paginas):
+                self.pages = [object()] * paginas
+
+            def write_pdf(self):
+                escritor = PdfWriter()
+                for _ in self.pages:
+                    escritor.add_blank_page(width=100, height=100)
+                salida = io.BytesIO()
+                escritor.write(salida)
+                return salida.getvalue()
+
+        class HTML:
+            def __init__(self, string):
+                self.paginas = int(string)
+
+            def render(self, stylesheets, font_config):
+                reinicios.append(stylesheets[-1])
+                return Documento(self.paginas)
+
+        def css(string, font_config):
+            return string.split('counter-reset: page ')[1].split()[0]
+
+        estado = {'HTML': HTML, 'CSS': css, 'font_config': None, 'stylesheets': []}
+        with mock.patch.object(utils, '_weasyprint', return_value=estado):
+            pdf = utils._render_local(iter(['2', '3', '1']))
+
+        self.assertEqual(len(PdfReader(io.BytesIO(pdf)).pages), 6)
+        self.assertEqual(reinicios, ['0', '2', '5'])
@@ -1,23 +1,34 @@
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     path('', views.index_view, name='index'),
     path('portal/', views.portal_residente_view, name='portal_residente'),
     path('avisos/', views.avisos_list_view, name='avisos_list'), # New
+    path('avisos/marcar-leidas/', views.avisos_marcar_leidas_view, name='avisos_marcar_leidas'),
     path('soporte/', views.soporte_view, name='soporte'), # New
+    path('estadisticas/cache/', views.estadisticas_cache_view, name='estadisticas_cache'),
+    path('auditoria/', views.auditoria_list_view, name='auditoria_list'),
 
+    path('condominio/<int:condominio_id>/resumen/', views.resumen_condominio_view, name='resumen_condominio'),
     path('condominio/<int:condominio_id>/gastos/', views.gastos_list_view, name='gastos_list'),
     path('condominio/<int:condominio_id>/gastos/nuevo/', views.gasto_create_view, name='gasto_create'),
     path('condominio/<int:condominio_id>/cierre/', views.cierre_mensual_view, name='cierre_mensual'),
     path('condominio/<int:condominio_id>/cobros/<str:periodo>/', views.cobros_list_view, name='cobros_list'),
+    path('condominio/<int:condominio_id>/cobros/<str:periodo>/avisos.zip', views.avisos_cobro_zip_view, name='avisos_cobro_zip'),
     path('condominio/<int:condominio_id>/pagos/', views.pagos_list_view, name='pagos_list'),
     path('condominio/<int:condominio_id>/pagos/nuevo/', views.pago_create_view, name='pago_create'),
+    path('condominio/<int:condominio_id>/exportar/cobros.csv', views.exportar_cobros_csv, name='exportar_cobros_csv'),
+    path('condominio/<int:condominio_id>/exportar/pagos.csv', views.exportar_pagos_csv, name='exportar_pagos_csv'),
+    path('condominio/<int:condominio_id>/exportar/gastos.csv', views.exportar_gastos_csv, name='exportar_gastos_csv'),
     path('condominio/<int:condominio_id>/trabajadores/', views.trabajadores_list_view, name='trabajadores_list'),
     path('condominio/<int:condominio_id>/trabajadores/nuevo/', views.trabajador_create_view, name='trabajador_create'),
     path('condominio/<int:condominio_id>/remuneraciones/', views.remuneraciones_list_view, name='remuneraciones_list'),
     path('condominio/<int:condominio_id>/remuneraciones/nuevo/', views.remuneracion_create_view, name='remuneracion_create'),
 
+    # API JSON de solo lectura
+    path('api/v1/condominio/<int:condominio_id>/<slug:recurso>/', api.api_listar, name='api_listar'),
+
     # AJAX Create Endpoints
     path('api/proveedor/create/', views.proveedor_create_ajax, name='proveedor_create_ajax'),
     path('api/categoria/create/', views.categoria_create_ajax, name='categoria_create_ajax'),
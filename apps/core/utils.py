@@ -1,26 +1,659 @@
 # apps/core/utils.py
-from io import BytesIO
-from django.http import HttpResponse
+import base64
+import csv
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+import time
+from collections import deque
+from decimal import Decimal
+from itertools import chain, islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import get_template
-from weasyprint import HTML
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+
+# --- INICIO: Caché de PDFs en disco ---
+# Los PDFs se guardan en PDF_CACHE_DIR con el hash de su contenido de origen como nombre.
+# El atime de cada archivo (fijado explícitamente en cada acierto) es el "último uso" para la
+# expulsión LRU; el mtime se mantiene como fecha de generación y alimenta Last-Modified.
+
+def _pdf_cache_dir():
+    directorio = Path(settings.PDF_CACHE_DIR)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
 
-def render_to_pdf(template_src, context_dict={}):
+def _pdf_cache_get(clave):
     """
-    Renderiza una plantilla Django a un PDF usando WeasyPrint.
+    Retorna la ruta del PDF cacheado para la clave (o None) y la marca como recién usada.
     """
-    template = get_template(template_src)
-    html_string = template.render(context_dict)
+    ruta = _pdf_cache_dir() / f"{clave}.pdf"
+    try:
+        os.utime(ruta, (time.time(), ruta.stat().st_mtime))
+    except FileNotFoundError:
+        return None
+    return ruta
+
+def _pdf_cache_put(clave, pdf_bytes):
+    """
+    Guarda el PDF de forma atómica (archivo temporal + rename) y aplica la expulsión LRU.
+    """
+    directorio = _pdf_cache_dir()
+    ruta = directorio / f"{clave}.pdf"
+    fd, ruta_tmp = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(pdf_bytes)
+    os.replace(ruta_tmp, ruta)
+    _pdf_cache_evict(directorio)
+    return ruta
+
+def _pdf_cache_evict(directorio):
+    """
+    Elimina los PDFs menos usados hasta que el directorio quede bajo PDF_CACHE_MAX_BYTES.
+    """
+    archivos = []
+    total = 0
+    for entrada in os.scandir(directorio):
+        if entrada.name.endswith('.pdf'):
+            stat = entrada.stat()
+            archivos.append((stat.st_atime, stat.st_size, entrada.path))
+            total += stat.st_size
+
+    if total <= settings.PDF_CACHE_MAX_BYTES:
+        return
+
+    archivos.sort()  # Los de uso más antiguo primero
+    for _, tamano, ruta in archivos:
+        if total <= settings.PDF_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except FileNotFoundError:
+            pass
+
+# --- FIN: Caché de PDFs en disco ---
+
 
+# --- INICIO: Renderizado WeasyPrint (local o vía worker persistente) ---
+# WeasyPrint (y sus librerías nativas) se importa recién al renderizar localmente: ni el arranque
+# de los workers web ni los comandos de manage.py pagan ese costo. Si PDF_RENDER_SOCKET está
+# definido, el proceso web nunca lo carga y el trabajo lo hace `manage.py pdf_worker`.
+# Ver `manage.py medir_arranque` para vigilar el costo de importación al arrancar.
+#
+# Protocolo del socket (una petición por conexión):
+#   petición:  por cada bloque [4 bytes largo][HTML en UTF-8], y al final [4 bytes 0]
+#   respuesta: [1 byte estado: 0 ok / 1 error][4 bytes largo][PDF o mensaje de error UTF-8]
+# (enteros big-endian). Los bloques se envían a medida que se generan y el worker maqueta cada
+# uno al recibirlo. Un documento normal es un único bloque; ver render_to_pdf(chunk_field=...).
+
+_weasyprint_estado = {}
+
+def _weasyprint():
+    """
+    Importa WeasyPrint y precarga la configuración de fuentes y las hojas de estilo
+    compartidas (PDF_STYLESHEETS) una sola vez por proceso.
+    """
+    if not _weasyprint_estado:
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        _weasyprint_estado.update(
+            HTML=HTML,
+            CSS=CSS,
+            font_config=font_config,
+            stylesheets=[
+                CSS(filename=str(ruta), font_config=font_config)
+                for ruta in settings.PDF_STYLESHEETS
+            ],
+        )
+    return _weasyprint_estado
+
+def _render_local(bloques):
+    """
+    Renderiza bloques HTML (una lista o un iterador que los genera de a uno) como un único PDF.
+    Cada bloque se maqueta y se escribe como PDF por separado, se suelta su layout y el PDF
+    se agrega al documento final con pypdf. La memoria máxima es la del PDF resultante más
+    el layout de un solo bloque, no la de todo el documento maquetado.
+    El contador de páginas de cada bloque parte donde terminó el anterior.
+    """
+    estado = _weasyprint()
     # WeasyPrint espera una URL base para resolver rutas relativas (CSS, imágenes)
     # En este caso, como no tenemos rutas complejas, podemos omitirlo o usar un valor dummy.
     # Si tuviéramos archivos estáticos:
     # from django.contrib.staticfiles import finders
     # base_url = finders.find('css/style.css') # o cualquier archivo estático
+    bloques = iter(bloques)
+    primero = next(bloques)
+    segundo = next(bloques, None)
+    if segundo is None:
+        return estado['HTML'](string=primero).write_pdf(
+            stylesheets=estado['stylesheets'],
+            font_config=estado['font_config'],
+        )
+
+    from pypdf import PdfWriter
 
-    pdf_file = HTML(string=html_string).write_pdf()
+    escritor = PdfWriter()
+    paginas = 0
+    for html_string in chain([primero, segundo], bloques):
+        numeracion = estado['CSS'](
+            string=f"@page :first {{ counter-reset: page {paginas} }}",
+            font_config=estado['font_config'],
+        )
+        documento = estado['HTML'](string=html_string).render(
+            stylesheets=estado['stylesheets'] + [numeracion],
+            font_config=estado['font_config'],
+        )
+        paginas += len(documento.pages)
+        escritor.append(io.BytesIO(documento.write_pdf()))
+        del documento, html_string  # El layout del bloque ya no se necesita
+
+    salida = io.BytesIO()
+    escritor.write(salida)
+    return salida.getvalue()
+
+def _leer_exacto(conexion, cantidad):
+    partes = []
+    while cantidad:
+        parte = conexion.recv(min(cantidad, 1024 * 1024))
+        if not parte:
+            raise ConnectionError("El socket se cerró antes de completar el mensaje")
+        partes.append(parte)
+        cantidad -= len(parte)
+    return b''.join(partes)
+
+def _conectar_worker():
+    conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conexion.settimeout(settings.PDF_RENDER_TIMEOUT)
+        conexion.connect(settings.PDF_RENDER_SOCKET)
+    except OSError:
+        conexion.close()
+        raise
+    return conexion
+
+def _render_remoto(conexion, bloques):
+    with conexion:
+        # Cada bloque se envía apenas se genera: ni aquí ni en el worker se juntan todos
+        for html_string in bloques:
+            datos = html_string.encode('utf-8')
+            conexion.sendall(struct.pack('>I', len(datos)) + datos)
+        conexion.sendall(struct.pack('>I', 0))
+        estado, largo = struct.unpack('>BI', _leer_exacto(conexion, 5))
+        payload = _leer_exacto(conexion, largo)
+
+    if estado != 0:
+        raise RuntimeError(f"El worker de PDF no pudo renderizar: {payload.decode('utf-8', 'replace')}")
+    return payload
+
+def atender_peticion_pdf(conexion, renderizar=_render_local):
+    """
+    Atiende una petición del protocolo anterior sobre una conexión ya aceptada.
+    Lo usa el comando pdf_worker en cada proceso del pool.
+    """
+    def bloques():
+        while True:
+            (largo,) = struct.unpack('>I', _leer_exacto(conexion, 4))
+            if not largo:
+                return
+            yield _leer_exacto(conexion, largo).decode('utf-8')
+
+    pendientes = bloques()
+    try:
+        estado, payload = 0, renderizar(pendientes)
+        # Un renderizador que no consumió todo deja bloques en el socket: se descartan
+        for _ in pendientes:
+            pass
+    except Exception as e:
+        logger.exception("Error renderizando PDF en el worker")
+        estado, payload = 1, str(e).encode('utf-8')
+        for _ in pendientes:
+            pass
+    conexion.sendall(struct.pack('>BI', estado, len(payload)) + payload)
+
+def html_to_pdf_bytes(html):
+    """
+    Convierte un HTML ya renderizado (o bloques HTML: una lista o un iterador) a los bytes
+    del PDF. Si hay un worker persistente configurado (PDF_RENDER_SOCKET) se le delega el
+    trabajo; si no acepta la conexión, se renderiza en este proceso para no dejar al usuario
+    sin su PDF. Una vez conectado los bloques ya se consumieron, así que un error posterior
+    se propaga.
+    """
+    bloques = [html] if isinstance(html, str) else html
+    if settings.PDF_RENDER_SOCKET:
+        try:
+            conexion = _conectar_worker()
+        except OSError as e:
+            logger.warning("Worker de PDF no disponible (%s), renderizando localmente", e)
+        else:
+            return _render_remoto(conexion, bloques)
+    return _render_local(bloques)
+
+# --- FIN: Renderizado WeasyPrint ---
+
+
+def _render_html(template_src, context_dict, chunk_field=None):
+    """
+    Renderiza la plantilla. Con `chunk_field`, la colección de ese campo del contexto se
+    parte en bloques de PDF_CHUNK_SIZE filas y se retorna un generador de HTML, uno por
+    bloque: cada bloque se genera recién cuando el renderizador lo pide, así que nunca
+    están todos en memoria.
+    Cada bloque recibe `continuacion` (no es el primero) y `hay_mas` (no es el último)
+    para que la plantilla muestre encabezados y totales solo donde corresponde.
+    """
+    template = get_template(template_src)
+    if not chunk_field:
+        return template.render(context_dict)
+    return _bloques_html(template, context_dict, chunk_field)
+
+def _bloques_html(template, context_dict, chunk_field):
+    tamano = settings.PDF_CHUNK_SIZE
+    filas = context_dict[chunk_field]
+    # Los querysets se leen de a bloques desde la BD en lugar de cargarse completos
+    iterador = iter(filas.iterator(chunk_size=tamano) if hasattr(filas, 'iterator') else filas)
+
+    actual = list(islice(iterador, tamano))
+    continuacion = False
+    while True:
+        siguiente = list(islice(iterador, tamano))
+        yield template.render({
+            **context_dict,
+            chunk_field: actual,
+            'continuacion': continuacion,
+            'hay_mas': bool(siguiente),
+        })
+        if not siguiente:
+            return
+        actual, continuacion = siguiente, True
+
+def _huella_fuentes(template_src):
+    """
+    Fecha de modificación y tamaño de la plantilla y de PDF_STYLESHEETS: forman parte de la
+    clave de la caché, así un deploy que cambia el diseño no sigue sirviendo PDFs viejos.
+    """
+    rutas = [get_template(template_src).origin.name, *settings.PDF_STYLESHEETS]
+    partes = []
+    for ruta in rutas:
+        try:
+            stat = os.stat(ruta)
+            partes.append(f"{ruta}:{stat.st_mtime_ns}:{stat.st_size}")
+        except (OSError, TypeError):
+            partes.append(str(ruta))
+    return '|'.join(partes)
+
+def render_to_pdf(template_src, context_dict=None, request=None, cache_key=None, chunk_field=None):
+    """
+    Renderiza una plantilla Django a un PDF usando WeasyPrint.
+
+    El resultado se guarda en una caché en disco direccionada por contenido:
+    - Si se entrega `cache_key` (ej: una versión de los datos), la clave es plantilla + cache_key
+      y en un acierto ni siquiera se renderiza el HTML.
+    - Si no, la clave es el hash del HTML renderizado.
+    En ambos casos la clave incluye la huella de la plantilla y las hojas de estilo.
+    Si se entrega `request`, la respuesta soporta GET condicional (ETag / Last-Modified -> 304).
+    Con `chunk_field` los documentos muy largos se maquetan por bloques (ver _render_html).
+    """
+    context_dict = context_dict or {}
+    html = None
+
+    fuentes = _huella_fuentes(template_src)
+    if cache_key is not None:
+        origen = f"{fuentes}\n{cache_key}"
+    else:
+        # Sin cache_key hay que generar todo el HTML para calcular la clave; los documentos
+        # grandes deben pasar cache_key para que los bloques se generen de a uno
+        html = _render_html(template_src, context_dict, chunk_field)
+        if not isinstance(html, str):
+            html = list(html)
+        origen = f"{fuentes}\n" + (html if isinstance(html, str) else ''.join(html))
+    clave = hashlib.sha256(origen.encode('utf-8')).hexdigest()
+
+    pdf_file = None
+    ruta = _pdf_cache_get(clave)
+    if ruta is None:
+        if html is None:
+            html = _render_html(template_src, context_dict, chunk_field)
+        pdf_file = html_to_pdf_bytes(html)
+
+        try:
+            ruta = _pdf_cache_put(clave, pdf_file)
+        except OSError as e:
+            # Un disco lleno o sin permisos no debe impedir la descarga
+            logger.warning("No se pudo guardar el PDF en caché: %s", e)
+
+    etag = quote_etag(clave)
+    try:
+        last_modified = int(ruta.stat().st_mtime) if ruta is not None else None
+    except FileNotFoundError:
+        last_modified = None
+
+    if request is not None:
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if no_modificado is not None:
+            no_modificado['ETag'] = etag
+            return no_modificado
+
+    if pdf_file is None:
+        try:
+            pdf_file = ruta.read_bytes()
+        except FileNotFoundError:
+            # Expulsado por otro proceso entre la búsqueda y la lectura
+            html = html or _render_html(template_src, context_dict, chunk_field)
+            pdf_file = html_to_pdf_bytes(html)
 
     response = HttpResponse(pdf_file, content_type='application/pdf')
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
     # Opcional: Forzar la descarga del archivo
     # response['Content-Disposition'] = 'attachment; filename="reporte.pdf"'
 
     return response
+
+
+# --- INICIO: Lotes de PDFs en ZIP (streaming) ---
+
+class _ZipStream:
+    """
+    Destino de escritura no-seekable para zipfile.
+    Acumula lo escrito hasta que el generador lo entrega al cliente con `drenar()`.
+    Al no tener `seek`, zipfile usa data descriptors y nunca necesita volver atrás.
+    """
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, data):
+        self._partes.append(bytes(data))
+        self._posicion += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        data = b''.join(self._partes)
+        self._partes.clear()
+        return data
+
+def _renderizar_pdfs(documentos, workers):
+    """
+    Convierte un iterable de (nombre, html) en (nombre, pdf_bytes), en el mismo orden.
+    Con más de un worker usa un pool de procesos, manteniendo como máximo 2 * workers
+    documentos en vuelo para que la memoria no dependa del tamaño del lote.
+    Si hay worker persistente (PDF_RENDER_SOCKET) el trabajo local es solo E/S, así que
+    basta un pool de hilos.
+    """
+    if workers <= 1:
+        for nombre, html_string in documentos:
+            yield nombre, html_to_pdf_bytes(html_string)
+        return
+
+    # Importación tardía: el pool de procesos arrastra multiprocessing.connection/queues
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    pool_cls = ThreadPoolExecutor if settings.PDF_RENDER_SOCKET else ProcessPoolExecutor
+    pool = pool_cls(max_workers=workers)
+    en_vuelo = deque()
+    try:
+        for nombre, html_string in documentos:
+            en_vuelo.append((nombre, pool.submit(html_to_pdf_bytes, html_string)))
+            if len(en_vuelo) >= workers * 2:
+                nombre_listo, futuro = en_vuelo.popleft()
+                yield nombre_listo, futuro.result()
+        while en_vuelo:
+            nombre_listo, futuro = en_vuelo.popleft()
+            yield nombre_listo, futuro.result()
+    finally:
+        # Si el cliente corta la descarga, no seguimos renderizando
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _generar_zip(documentos, workers):
+    import zipfile
+
+    buffer = _ZipStream()
+    # Los PDFs ya vienen comprimidos: ZIP_STORED evita gastar CPU sin ganar tamaño
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archivo_zip:
+        for nombre, pdf_bytes in _renderizar_pdfs(documentos, workers):
+            archivo_zip.writestr(nombre, pdf_bytes)
+            yield buffer.drenar()
+    yield buffer.drenar()  # Directorio central del ZIP
+
+def render_to_pdf_zip(template_src, items, filename, workers=None):
+    """
+    Genera un ZIP con un PDF por elemento y lo envía al cliente mientras se va generando.
+    `items` es un iterable (idealmente perezoso) de tuplas (nombre_archivo_pdf, context_dict).
+    Las plantillas se renderizan en este proceso y los PDFs se generan en paralelo
+    con PDF_BATCH_WORKERS workers.
+    """
+    template = get_template(template_src)
+    documentos = (
+        (nombre, template.render(context_dict))
+        for nombre, context_dict in items
+    )
+    if workers is None:
+        workers = settings.PDF_BATCH_WORKERS
+
+    response = StreamingHttpResponse(_generar_zip(documentos, workers), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# --- FIN: Lotes de PDFs en ZIP (streaming) ---
+
+
+# --- INICIO: Paginación por cursor (keyset) ---
+# En vez de OFFSET (que recorre y descarta todas las filas anteriores), cada página se
+# pide como "las N filas que siguen a la última vista" según un orden total. Con un índice
+# que cubra el filtro y el orden, el costo de una página no depende de su profundidad.
+# Tampoco se ejecuta COUNT(*): se pide una fila extra para saber si hay más.
+
+class PaginaKeyset:
+    """Resultado de paginar_keyset: filas de la página y cursores opacos a las vecinas."""
+
+    def __init__(self, filas, siguiente=None, anterior=None):
+        self.filas = filas
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    def __iter__(self):
+        return iter(self.filas)
+
+    def __len__(self):
+        return len(self.filas)
+
+    def __bool__(self):
+        return bool(self.filas)
+
+
+def _valor_orden(fila, campo):
+    """Lee 'campo' (admite 'fk__campo') desde una instancia o desde un dict de values()."""
+    if isinstance(fila, dict):
+        return fila[campo]
+    valor = fila
+    for parte in campo.split('__'):
+        valor = getattr(valor, parte)
+    return getattr(valor, 'pk', valor)
+
+
+def _valor_json(valor):
+    # Fechas con precisión completa (DjangoJSONEncoder trunca a milisegundos y el cursor
+    # dejaría de coincidir con el valor guardado); la BD convierte el texto al comparar.
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"Valor no serializable en un cursor: {valor!r}")
+
+
+def _codificar_cursor(valores, direccion):
+    datos = json.dumps({'v': valores, 'd': direccion}, default=_valor_json, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor, cantidad_campos):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores, direccion = datos['v'], datos['d']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direccion not in ('n', 'p') or not isinstance(valores, list) or len(valores) != cantidad_campos:
+        return None
+    return valores, direccion
+
+
+def _campo_orden(queryset, nombre):
+    """Campo del modelo detrás de `nombre` ('fk__campo' o un alias de values()); None si no se sabe."""
+    anotacion = queryset.query.annotations.get(nombre)
+    if anotacion is not None:
+        return getattr(anotacion, 'target', None)
+    modelo, campo = queryset.model, None
+    for parte in nombre.split('__'):
+        if modelo is None:
+            return None
+        campo = modelo._meta.get_field(parte)
+        modelo = campo.related_model
+    return campo
+
+
+def _valores_cursor(queryset, orden, valores):
+    """
+    Convierte los valores del cursor al tipo de cada campo del orden. El cursor viene del
+    cliente: un valor nulo o de otro tipo lanza ValueError/ValidationError/TypeError.
+    """
+    convertidos = []
+    for campo, valor in zip(orden, valores):
+        if valor is None:
+            raise ValueError("El orden del cursor no admite nulos")
+        definicion = _campo_orden(queryset, campo.lstrip('-'))
+        convertidos.append(definicion.to_python(valor) if definicion is not None else valor)
+    return convertidos
+
+
+def _filtro_keyset(orden, valores, hacia_adelante):
+    """
+    Construye (a > x) OR (a = x AND b > y) OR ... respetando la dirección de cada campo.
+    """
+    filtro = Q()
+    iguales = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        descendente = campo.startswith('-')
+        operador = 'lt' if descendente == hacia_adelante else 'gt'
+        filtro |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+        iguales[nombre] = valor
+    return filtro
+
+
+def paginar_keyset(queryset, orden, cursor=None, tamano=50):
+    """
+    Pagina `queryset` por cursor.
+
+    `orden` es una tupla de campos (con '-' para descendente) que debe definir un orden
+    total sobre columnas no nulas: el último campo tiene que ser la PK o algo único.
+    Conviene un índice compuesto con los filtros fijos seguidos de estos campos.
+    `cursor` es el token recibido en `pagina.siguiente` o `pagina.anterior`; uno inválido
+    se trata como la primera página.
+    """
+    decodificado = _decodificar_cursor(cursor, len(orden)) if cursor else None
+    if decodificado:
+        try:
+            decodificado = (_valores_cursor(queryset, orden, decodificado[0]), decodificado[1])
+        except (ValidationError, ValueError, TypeError):
+            decodificado = None
+    hacia_adelante = decodificado is None or decodificado[1] == 'n'
+
+    if hacia_adelante:
+        consulta = queryset.order_by(*orden)
+    else:
+        # Para retroceder se recorre el orden inverso y luego se da vuelta la página
+        inverso = [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden]
+        consulta = queryset.order_by(*inverso)
+    if decodificado:
+        consulta = consulta.filter(_filtro_keyset(orden, decodificado[0], hacia_adelante))
+
+    filas = list(consulta[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if not hacia_adelante:
+        filas.reverse()
+
+    def cursor_de(fila, direccion):
+        return _codificar_cursor([_valor_orden(fila, campo.lstrip('-')) for campo in orden], direccion)
+
+    siguiente = anterior = None
+    if filas:
+        if hay_mas or not hacia_adelante:
+            siguiente = cursor_de(filas[-1], 'n')
+        if (hay_mas and not hacia_adelante) or (hacia_adelante and decodificado):
+            anterior = cursor_de(filas[0], 'p')
+    return PaginaKeyset(filas, siguiente=siguiente, anterior=anterior)
+
+# --- FIN: Paginación por cursor (keyset) ---
+
+
+# --- INICIO: Exportación CSV (streaming) ---
+# Las filas se escriben a medida que se leen de la BD (values_list(...).iterator()), así que
+# la descarga empieza de inmediato y la memoria no depende del tamaño del historial.
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: en vez de guardar la línea, la retorna."""
+
+    def write(self, valor):
+        return valor
+
+
+def _celda_csv(valor):
+    # Un texto que empieza con = + - @ se interpreta como fórmula al abrirlo en Excel
+    if isinstance(valor, str) and valor[:1] in ('=', '+', '-', '@'):
+        return "'" + valor
+    return valor
+
+
+def render_to_csv(filas, encabezados, filename, lineas_por_bloque=500):
+    """
+    Respuesta CSV en streaming a partir de un iterable de tuplas.
+    Incluye BOM UTF-8 para que Excel detecte la codificación, y agrupa las líneas en
+    bloques para no enviar un fragmento HTTP por fila.
+    """
+    escritor = csv.writer(_Eco())
+
+    def generar():
+        bloque = ['\ufeff' + escritor.writerow(encabezados)]
+        for fila in filas:
+            bloque.append(escritor.writerow([_celda_csv(valor) for valor in fila]))
+            if len(bloque) >= lineas_por_bloque:
+                yield ''.join(bloque)
+                bloque = []
+        if bloque:
+            yield ''.join(bloque)
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# --- FIN: Exportación CSV (streaming) ---
+
+
+def es_periodo(texto):
+    """True si `texto` es un periodo YYYYMM con mes entre 01 y 12."""
+    return len(texto) == 6 and texto.isdigit() and 1 <= int(texto[4:]) <= 12
@@ -1,29 +1,96 @@
 # apps/core/views.py
-from django.shortcuts import render, get_object_or_404, redirect
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import get_valid_filename
 from django.contrib import messages
-from django.db.models import Sum
+from django.contrib.messages import get_messages
+from django.db.models import Sum, Count
 
 # --- IMPORTANTE: Importamos los modelos para poder buscar datos ---
 # Agregamos Auditoria, CondominioAnexoRegla y ParamReglamento como precaución
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, condition
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_protect
+from django.middleware.csrf import get_token
+import hashlib
 import json
 
 from .models import (
     Condominio, Gasto, Cobro, Pago, Trabajador, Remuneracion,
     Notificacion, Auditoria, CondominioAnexoRegla, ParamReglamento,
-    Proveedor, GastoCategoria
+    Proveedor, GastoCategoria, CatCobroEstado, CatMetodoPago, Unidad
 )
 from .forms import GastoForm, PagoForm, TrabajadorForm, RemuneracionForm
 from .services import (
     generar_cierre_mensual, registrar_pago, registrar_auditoria, crear_gasto,
-    get_proximo_periodo
+    get_proximo_periodo, resumen_cierre, portal_residente, marcar_notificaciones_leidas,
+    resumen_condominio
 )
-from .utils import render_to_pdf  # Importamos la utilidad para PDF
-from apps.usuarios.decorators import solo_admin
+from .cache import metricas_cache
+from .utils import render_to_pdf, render_to_pdf_zip, render_to_csv, paginar_keyset, es_periodo  # Utilidades de PDF, CSV y paginación
+from apps.usuarios.decorators import solo_admin, condominios_administrados
+
+# --- INICIO: GET condicional por versión de datos ---
+# Los listados y reportes de un condominio solo cambian cuando cambia su version_datos
+# (ver signals.py). El ETag se arma con esa versión antes de ejecutar la vista: si el
+# navegador ya tiene la página, responde 304 con una sola consulta a `condominio`.
+
+def _version_datos(request, condominio_id, **kwargs):
+    """
+    (version_datos, datos_modificados_at) leídos de la BD una vez por petición.
+    No se toman de request.condominio: esa instancia puede venir de la caché del proceso
+    y estos campos cambian con UPDATE, sin save().
+    """
+    if not hasattr(request, '_version_datos'):
+        request._version_datos = Condominio.objects.filter(pk=condominio_id).values_list(
+            'version_datos', 'datos_modificados_at'
+        ).first() or (None, None)
+    return request._version_datos
+
+
+def _etag_datos(request, condominio_id, **kwargs):
+    if len(get_messages(request)):
+        # Hay mensajes pendientes: la página debe renderizarse para mostrarlos
+        return None
+    version = _version_datos(request, condominio_id)
+    if version[0] is None:
+        return None
+    # La página también muestra datos del usuario (contador de avisos), el token CSRF de
+    # sus formularios (el login lo rota) y los filtros por defecto dependen del día.
+    # El secreto CSRF y la sesión van como hash: el ETag viaja en la respuesta.
+    # get_token() crea el secreto si la petición aún no trae la cookie
+    get_token(request)
+    sesion = hashlib.sha256(
+        f"{request.META.get('CSRF_COOKIE', '')}:{request.session.session_key}".encode('utf-8')
+    ).hexdigest()[:16]
+    return f"{condominio_id}-{version[0]}-{request.user.pk}-{request.user.notificaciones_no_leidas}-{timezone.localdate():%Y%m%d}-{sesion}"
+
+
+def _ultima_modificacion_datos(request, condominio_id, **kwargs):
+    if len(get_messages(request)):
+        return None
+    return _version_datos(request, condominio_id)[1]
+
+
+def segun_version_datos(view_func):
+    """
+    Responde 304 si el cliente ya tiene la versión actual de los datos del condominio.
+    'no-cache' obliga al navegador a revalidar siempre en vez de reutilizar su copia.
+    """
+    view_func = condition(etag_func=_etag_datos, last_modified_func=_ultima_modificacion_datos)(view_func)
+    return cache_control(private=True, no_cache=True)(view_func)
+
+# --- FIN: GET condicional por versión de datos ---
 
 # --- INICIO: Vistas del Dashboard ---
 
@@ -33,10 +100,12 @@ def portal_residente_view(request):
     Vista exclusiva para Residentes (Portal de solo lectura).
     Muestra 'Mis Gastos Comunes'.
     """
-    # Aquí iría la lógica para obtener los cobros asociados a la unidad del usuario.
-    # Por ahora renderizamos un template simple o el mismo index pero filtrado.
-    # Para cumplir estrictamente con la segregación, usamos un template distinto.
-    return render(request, 'core/portal_residente.html', {'usuario': request.user})
+    # Unidades, cobros (con detalle) y pagos del usuario; cacheado por usuario
+    contexto = {
+        'usuario': request.user,
+        'unidades': portal_residente(request.user),
+    }
+    return render(request, 'core/portal_residente.html', contexto)
 
 @login_required
 @solo_admin
@@ -46,8 +115,12 @@ def index_view(request):
     Solo accesible por Administradores.
     """
     
-    # 1. Buscamos TODOS los condominios en la base de datos
-    lista_condominios = Condominio.objects.all()
+    # 1. Condominios que administra el usuario (todos para el super admin), con sus KPIs
+    #    precalculados en el mismo JOIN: una fila por condominio, sin agregaciones.
+    lista_condominios = Condominio.objects.select_related('kpi').order_by('nombre')
+    administrados = condominios_administrados(request)  # Cacheados en la sesión
+    if administrados is not None:
+        lista_condominios = lista_condominios.filter(pk__in=administrados)
 
     # 2. Preparamos el contexto con el usuario Y la lista
     contexto = {
@@ -62,12 +135,33 @@ def avisos_list_view(request):
     """
     Muestra las notificaciones del usuario.
     """
-    notificaciones = Notificacion.objects.filter(usuario=request.user).order_by('-created_at')
+    notificaciones = Notificacion.objects.filter(usuario=request.user)
+    solo_no_leidas = request.GET.get('no_leidas') == '1'
+    if solo_no_leidas:
+        notificaciones = notificaciones.filter(leido=False)
 
-    # Marcar como leídas (opcional, para este MVP simplemente las listamos)
-    # notificaciones.update(leido=True)
+    # Paginada por cursor (ix_notif_usuario_fecha / ix_notif_usuario_leido): el costo de
+    # cada página no crece con los avisos acumulados tras cada cierre
+    pagina = paginar_keyset(
+        notificaciones, ('-created_at', '-id_notificacion'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    )
 
-    return render(request, 'core/avisos_list.html', {'notificaciones': notificaciones})
+    contexto = {
+        'notificaciones': pagina,
+        'pagina': pagina,
+        'solo_no_leidas': solo_no_leidas,
+    }
+    return render(request, 'core/avisos_list.html', contexto)
+
+@login_required
+@require_POST
+def avisos_marcar_leidas_view(request):
+    """
+    Marca todas las notificaciones del usuario como leídas (un solo UPDATE).
+    """
+    marcar_notificaciones_leidas(request.user)
+    return redirect('avisos_list')
 
 @login_required
 def soporte_view(request):
@@ -76,27 +170,98 @@ def soporte_view(request):
     """
     return render(request, 'core/soporte.html')
 
+@login_required
+@solo_admin
+async def resumen_condominio_view(request, condominio_id):
+    """
+    Resumen de un condominio para un periodo (por defecto el mes en curso).
+    Vista asíncrona: bajo ASGI (config/asgi.py) los bloques del resumen se consultan
+    en paralelo (ver services.resumen_condominio).
+    """
+    condominio = await aget_object_or_404(Condominio, pk=condominio_id)
+    periodo = request.GET.get('periodo') or timezone.localdate().strftime('%Y%m')
+    usuario = await request.auser()
+
+    contexto = {
+        'condominio': condominio,
+        'periodo': periodo,
+        **await resumen_condominio(condominio.pk, periodo, usuario.pk),
+    }
+    # El render (sesión, mensajes, context processors) sigue siendo síncrono
+    return await sync_to_async(render)(request, 'core/resumen_condominio.html', contexto)
+
+@staff_member_required
+def estadisticas_cache_view(request):
+    """
+    Aciertos y fallos de la caché de fragmentos por listado (del proceso que responde).
+    """
+    return JsonResponse({'fragmentos': metricas_cache(settings.CACHES['fragmentos']['LOCATION'])})
+
 # --- FIN: Vistas del Dashboard ---
 
 # --- INICIO: Vistas de Gastos ---
 
 @login_required
 @solo_admin
+@segun_version_datos
 def gastos_list_view(request, condominio_id):
     """
     Vista para listar los gastos de un condominio específico.
+    Filtra por periodo, categoría y proveedor, pagina por cursor y agrupa la página
+    por periodo con su subtotal.
     """
     # 1. Obtenemos el condominio o devolvemos 404 si no existe
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
-
-    # 2. Obtenemos los gastos asociados a ese condominio
-    #    Ordenamos por fecha de emisión descendente (los más recientes primero)
-    gastos = Gasto.objects.filter(id_condominio=condominio).order_by('-fecha_emision')
-
-    # 3. Preparamos el contexto
+    condominio = request.condominio
+
+    # 2. Obtenemos los gastos asociados a ese condominio, con los filtros de la URL
+    gastos = Gasto.objects.filter(id_condominio=condominio)
+    periodo = request.GET.get('periodo', '')
+    categoria = request.GET.get('categoria', '')
+    proveedor = request.GET.get('proveedor', '')
+    if periodo:
+        gastos = gastos.filter(periodo=periodo)
+    if categoria.isdigit():
+        gastos = gastos.filter(id_gasto_categ_id=categoria)
+    if proveedor.isdigit():
+        gastos = gastos.filter(id_proveedor_id=proveedor)
+
+    # 3. Página actual: periodos más recientes primero (cubierto por ix_gasto_periodo).
+    #    select_related evita una consulta por fila para categoría y proveedor.
+    #    Es perezosa: si el fragmento del listado está en caché no se consulta.
+    pagina = SimpleLazyObject(lambda: paginar_keyset(
+        gastos.select_related('id_gasto_categ', 'id_proveedor'), ('-periodo', '-id_gasto'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    ))
+
+    # 4. Subtotales de los periodos visibles en una sola consulta agrupada.
+    #    El subtotal es del periodo completo (con los filtros), no solo de la página.
+    def agrupar():
+        subtotales = {
+            fila['periodo']: fila
+            for fila in gastos.filter(periodo__in={g.periodo for g in pagina})
+                              .values('periodo')
+                              .annotate(subtotal=Sum('total'), cantidad=Count('id_gasto'))
+                              .order_by()
+        }
+        grupos = []
+        for gasto in pagina:
+            if not grupos or grupos[-1]['periodo'] != gasto.periodo:
+                grupos.append({**subtotales[gasto.periodo], 'gastos': []})
+            grupos[-1]['gastos'].append(gasto)
+        return grupos
+
+    # 5. Preparamos el contexto
     contexto = {
         'condominio': condominio,
-        'gastos': gastos,
+        'gastos': pagina,
+        'version_datos': _version_datos(request, condominio_id)[0],  # Clave del fragmento cacheado
+        'grupos': SimpleLazyObject(agrupar),
+        'pagina': pagina,
+        'categorias': GastoCategoria.objects.order_by('nombre'),
+        'proveedores': Proveedor.objects.filter(gasto__id_condominio=condominio).distinct().order_by('nombre'),
+        'periodo': periodo,
+        'categoria': categoria,
+        'proveedor': proveedor,
         'usuario': request.user
     }
 
@@ -108,7 +273,7 @@ def gasto_create_view(request, condominio_id):
     """
     Vista para crear un nuevo gasto en un condominio.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
+    condominio = request.condominio
 
     if request.method == 'POST':
         form = GastoForm(request.POST)
@@ -133,54 +298,53 @@ def gasto_create_view(request, condominio_id):
 
 @login_required
 @solo_admin
+@segun_version_datos
 def cierre_mensual_view(request, condominio_id):
     """
     Vista para gestionar el cierre mensual.
     Muestra resumen del mes y botón para generar cobros.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
-
-    # Periodo por defecto: mes actual o último con movimientos
-    # Calculado dinámicamente
-    periodo_sugerido = get_proximo_periodo(condominio)
-
-    # Permitimos override por GET (opcional, por si acaso)
-    periodo = request.GET.get('periodo', periodo_sugerido)
+    condominio = request.condominio
 
-    # Resumen de gastos
-    total_gastos = Gasto.objects.filter(
-        id_condominio=condominio,
-        periodo=periodo
-    ).aggregate(Sum('total'))['total__sum'] or 0
+    # Periodo por defecto: mes actual o último con movimientos.
+    # Solo se calcula si no viene en la URL (evita dos búsquedas ordenadas).
+    periodo = request.GET.get('periodo') or get_proximo_periodo(condominio)
 
-    # Verificar si ya hay cobros generados
-    cobros_existentes = Cobro.objects.filter(
-        id_unidad__id_grupo__id_condominio=condominio,
-        periodo=periodo,
-        tipo=Cobro.TipoCobro.MENSUAL
-    )
-    ya_cerrado = cobros_existentes.exists()
-    total_cobrado = cobros_existentes.aggregate(Sum('total_cargos'))['total_cargos__sum'] or 0
+    # Resumen de gastos y cobros del periodo (dos consultas agregadas)
+    resumen = resumen_cierre(condominio, periodo)
 
     # Contexto base para ambas vistas (HTML y PDF)
     contexto = {
         'condominio': condominio,
         'periodo': periodo,
-        'total_gastos': total_gastos,
-        'ya_cerrado': ya_cerrado,
-        'total_cobrado': total_cobrado,
-        'cantidad_cobros': cobros_existentes.count(),
-        'cobros': cobros_existentes # Añadimos los cobros al contexto para el PDF
+        'total_gastos': resumen['total_gastos'],
+        'ya_cerrado': resumen['ya_cerrado'],
+        'total_cobrado': resumen['total_cobrado'],
+        'cantidad_cobros': resumen['cantidad_cobros'],
     }
 
     # --- Lógica de Exportación a PDF ---
     if request.GET.get('export_pdf') == 'true':
-        if not ya_cerrado:
+        if not resumen['ya_cerrado']:
             messages.error(request, "No se puede exportar un cierre que no ha sido generado.")
             return redirect('cierre_mensual', condominio_id=condominio_id)
 
-        # Renderizamos la plantilla PDF
-        return render_to_pdf('core/pdf_cierre.html', contexto)
+        # Solo el PDF necesita las filas: se recorren por bloques y con la unidad en el mismo JOIN
+        contexto['cobros'] = Cobro.objects.filter(
+            id_unidad__id_grupo__id_condominio=condominio,
+            periodo=periodo,
+            tipo=Cobro.TipoCobro.MENSUAL
+        ).select_related('id_unidad').order_by('id_unidad__codigo', 'id_cobro')
+
+        # Si ningún gasto, cobro ni pago del condominio cambió, se reutiliza el PDF cacheado.
+        # Por eso el PDF muestra la fecha de los datos (igual en cada descarga) y no la hora actual
+        version, contexto['datos_al'] = _version_datos(request, condominio_id)
+        cache_key = f"{condominio.pk}:{condominio.nombre}:{periodo}:{version}"
+
+        # Renderizamos la plantilla PDF por bloques de cobros (acota memoria en cierres grandes)
+        return render_to_pdf(
+            'core/pdf_cierre.html', contexto, request=request, cache_key=cache_key, chunk_field='cobros'
+        )
 
     # --- Lógica de Generación de Cierre (POST) ---
     if request.method == 'POST':
@@ -199,25 +363,82 @@ def cierre_mensual_view(request, condominio_id):
 
 @login_required
 @solo_admin
+@segun_version_datos
 def cobros_list_view(request, condominio_id, periodo):
     """
     Lista los cobros generados para un condominio y periodo.
+    Paginada por cursor sobre (id_unidad, id_cobro), con filtros por estado y saldo.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
+    condominio = request.condominio
 
     cobros = Cobro.objects.filter(
         id_unidad__id_grupo__id_condominio=condominio,
         periodo=periodo
-    ).select_related('id_unidad', 'id_cobro_estado').order_by('id_unidad__codigo')
+    ).select_related('id_unidad', 'id_cobro_estado')
+
+    # Filtros (cubiertos por ix_cobro_periodo_estado / ix_cobro_periodo_saldo)
+    estado = request.GET.get('estado', '')
+    if estado:
+        cobros = cobros.filter(id_cobro_estado__codigo=estado)
+    con_saldo = request.GET.get('con_saldo') == '1'
+    if con_saldo:
+        cobros = cobros.filter(saldo__gt=0)
+
+    # Perezosa: si el fragmento del listado está en caché no se consulta.
+    # Orden sobre columnas del cobro (ix_cobro_periodo_unidad): cada página lee solo sus
+    # filas del índice; ordenar por el código de la unidad (otra tabla) obligaría a ordenar
+    # todos los cobros del periodo. Las filas quedan por unidad en su orden de alta.
+    pagina = SimpleLazyObject(lambda: paginar_keyset(
+        cobros, ('id_unidad', 'id_cobro'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    ))
 
     contexto = {
         'condominio': condominio,
         'periodo': periodo,
-        'cobros': cobros
+        'cobros': pagina,
+        'version_datos': _version_datos(request, condominio_id)[0],  # Clave del fragmento cacheado
+        'pagina': pagina,
+        'estados': CatCobroEstado.objects.order_by('codigo'),
+        'estado': estado,
+        'con_saldo': con_saldo,
     }
 
     return render(request, 'core/cobros_list.html', contexto)
 
+@login_required
+@solo_admin
+def avisos_cobro_zip_view(request, condominio_id, periodo):
+    """
+    Descarga un ZIP con el aviso de cobro en PDF de cada unidad del periodo.
+    El ZIP se envía a medida que se generan los PDFs.
+    """
+    condominio = request.condominio
+
+    cobros = Cobro.objects.filter(
+        id_unidad__id_grupo__id_condominio=condominio,
+        periodo=periodo
+    ).select_related('id_unidad').prefetch_related('cobrodetalle_set').order_by('id_unidad__codigo')
+
+    if not cobros.exists():
+        messages.error(request, "No hay cobros generados para este periodo.")
+        return redirect('cobros_list', condominio_id=condominio_id, periodo=periodo)
+
+    # Generador perezoso: los cobros se leen de a bloques mientras el ZIP avanza
+    items = (
+        (
+            get_valid_filename(f"aviso_{periodo}_{cobro.id_unidad.codigo}.pdf"),
+            {'condominio': condominio, 'periodo': periodo, 'cobro': cobro}
+        )
+        for cobro in cobros.iterator(chunk_size=200)
+    )
+
+    return render_to_pdf_zip(
+        'core/pdf_aviso_cobro.html',
+        items,
+        filename=f"avisos_{periodo}_{condominio.pk}.zip"
+    )
+
 # --- FIN: Vistas de Cierre Mensual y Cobros ---
 
 
@@ -229,7 +450,7 @@ def pago_create_view(request, condominio_id):
     """
     Vista para registrar un nuevo pago manualmente.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
+    condominio = request.condominio
 
     if request.method == 'POST':
         form = PagoForm(request.POST, condominio_id=condominio_id)
@@ -257,21 +478,65 @@ def pago_create_view(request, condominio_id):
     }
     return render(request, 'core/pago_form.html', contexto)
 
+def _fecha_filtro(texto):
+    """Convierte un filtro 'YYYY-MM-DD' de la URL en fecha; vacío o inválido -> None."""
+    try:
+        return parse_date(texto) if texto else None
+    except ValueError:
+        return None
+
 @login_required
 @solo_admin
+@segun_version_datos
 def pagos_list_view(request, condominio_id):
     """
     Lista los pagos registrados para un condominio.
-    """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
-
-    pagos = Pago.objects.filter(
-        id_unidad__id_grupo__id_condominio=condominio
-    ).select_related('id_unidad', 'id_metodo_pago').order_by('-fecha_pago')
+    Filtra por rango de fechas (por defecto el mes en curso) y método de pago, muestra el
+    total recaudado del filtro y pagina por cursor sobre (-fecha_pago, -id_pago).
+    """
+    condominio = request.condominio
+
+    # Las unidades del condominio como subconsulta: el filtro queda sobre pago.id_unidad
+    # y el rango de fechas se resuelve con ix_pago_unidad_fecha, sin recorrer grupo/unidad
+    # por cada pago.
+    unidades = Unidad.objects.filter(id_grupo__id_condominio=condominio).values('id_unidad')
+    pagos = Pago.objects.filter(id_unidad__in=unidades)
+
+    # Filtros. Si no vienen en la URL se usa el mes en curso; un campo enviado vacío
+    # significa "sin límite".
+    hoy = timezone.localdate()
+    desde_txt = request.GET.get('desde', hoy.replace(day=1).isoformat())
+    hasta_txt = request.GET.get('hasta', hoy.isoformat())
+    metodo = request.GET.get('metodo', '')
+
+    desde = _fecha_filtro(desde_txt)
+    hasta = _fecha_filtro(hasta_txt)
+    if desde:
+        pagos = pagos.filter(fecha_pago__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        pagos = pagos.filter(fecha_pago__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)))
+    if metodo:
+        pagos = pagos.filter(id_metodo_pago__codigo=metodo)
+
+    # Encabezado: total recaudado con los filtros actuales (una sola consulta agregada).
+    # Total y página son perezosos: si el fragmento del listado está en caché no se consultan.
+    resumen = SimpleLazyObject(lambda: pagos.aggregate(total=Sum('monto'), cantidad=Count('id_pago')))
+
+    pagina = SimpleLazyObject(lambda: paginar_keyset(
+        pagos.select_related('id_unidad', 'id_metodo_pago'), ('-fecha_pago', '-id_pago'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    ))
 
     contexto = {
         'condominio': condominio,
-        'pagos': pagos
+        'pagos': pagina,
+        'version_datos': _version_datos(request, condominio_id)[0],  # Clave del fragmento cacheado
+        'pagina': pagina,
+        'resumen': resumen,
+        'metodos': CatMetodoPago.objects.order_by('nombre'),
+        'desde': desde_txt,
+        'hasta': hasta_txt,
+        'metodo': metodo,
     }
 
     return render(request, 'core/pagos_list.html', contexto)
@@ -279,6 +544,130 @@ def pagos_list_view(request, condominio_id):
 # --- FIN: Vistas de Pagos ---
 
 
+# --- INICIO: Exportaciones CSV ---
+# Para contabilidad: cada exportación recorre la BD con values_list(...).iterator(), sin
+# instanciar modelos ni cargar el historial completo en memoria, y se envía en streaming.
+
+EXPORT_CHUNK_SIZE = 2000  # Filas por lectura del cursor de BD
+
+
+def _rango_periodos(request):
+    """Lee los filtros 'desde'/'hasta' (YYYYMM) de la URL; los inválidos se ignoran."""
+    desde = request.GET.get('desde', '')
+    hasta = request.GET.get('hasta', '')
+    desde = desde if es_periodo(desde) else ''
+    hasta = hasta if es_periodo(hasta) else ''
+    return desde, hasta
+
+
+def _nombre_export(tipo, condominio, desde, hasta):
+    return get_valid_filename(f"{tipo}_{condominio.nombre}_{desde or 'inicio'}-{hasta or 'hoy'}.csv")
+
+
+@login_required
+@solo_admin
+def exportar_cobros_csv(request, condominio_id):
+    """
+    Exporta los cobros del condominio con una fila por línea de detalle
+    (los cobros sin detalle salen con las columnas de detalle vacías).
+    """
+    condominio = request.condominio
+    desde, hasta = _rango_periodos(request)
+
+    cobros = Cobro.objects.filter(id_unidad__id_grupo__id_condominio=condominio)
+    if desde:
+        cobros = cobros.filter(periodo__gte=desde)
+    if hasta:
+        cobros = cobros.filter(periodo__lte=hasta)
+
+    filas = cobros.order_by('periodo', 'id_unidad__codigo', 'id_cobro', 'cobrodetalle__id_cobro_det').values_list(
+        'periodo', 'id_unidad__codigo', 'id_cobro', 'tipo', 'id_cobro_estado__codigo',
+        'total_cargos', 'total_descuentos', 'total_interes', 'total_pagado', 'saldo',
+        'cobrodetalle__tipo', 'cobrodetalle__glosa', 'cobrodetalle__monto',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    encabezados = [
+        'Periodo', 'Unidad', 'ID Cobro', 'Tipo', 'Estado',
+        'Total Cargos', 'Total Descuentos', 'Total Interés', 'Total Pagado', 'Saldo',
+        'Tipo Detalle', 'Glosa Detalle', 'Monto Detalle',
+    ]
+    return render_to_csv(filas, encabezados, _nombre_export('cobros', condominio, desde, hasta))
+
+
+@login_required
+@solo_admin
+def exportar_pagos_csv(request, condominio_id):
+    """
+    Exporta los pagos del condominio. El rango de periodos se aplica sobre la fecha
+    de pago (en hora local), igual que el listado.
+    """
+    condominio = request.condominio
+    desde, hasta = _rango_periodos(request)
+
+    unidades = Unidad.objects.filter(id_grupo__id_condominio=condominio).values('id_unidad')
+    pagos = Pago.objects.filter(id_unidad__in=unidades)
+    if desde:
+        inicio = datetime(int(desde[:4]), int(desde[4:]), 1)
+        pagos = pagos.filter(fecha_pago__gte=timezone.make_aware(inicio))
+    if hasta:
+        anio, mes = int(hasta[:4]), int(hasta[4:])
+        fin = datetime(anio + mes // 12, mes % 12 + 1, 1)
+        pagos = pagos.filter(fecha_pago__lt=timezone.make_aware(fin))
+
+    filas = pagos.order_by('fecha_pago', 'id_pago').values_list(
+        'id_pago', 'fecha_pago', 'periodo', 'id_unidad__codigo', 'tipo',
+        'id_metodo_pago__nombre', 'monto', 'ref_externa', 'observacion',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    # La fecha se exporta en hora local y sin zona, que es lo que espera una planilla
+    filas = (
+        (id_pago, timezone.localtime(fecha).strftime('%Y-%m-%d %H:%M:%S'), *resto)
+        for id_pago, fecha, *resto in filas
+    )
+
+    encabezados = [
+        'ID Pago', 'Fecha Pago', 'Periodo', 'Unidad', 'Tipo',
+        'Método', 'Monto', 'Referencia', 'Observación',
+    ]
+    return render_to_csv(filas, encabezados, _nombre_export('pagos', condominio, desde, hasta))
+
+
+@login_required
+@solo_admin
+def exportar_gastos_csv(request, condominio_id):
+    """
+    Exporta los gastos del condominio con categoría, proveedor y documento.
+    """
+    condominio = request.condominio
+    desde, hasta = _rango_periodos(request)
+
+    gastos = Gasto.objects.filter(id_condominio=condominio)
+    if desde:
+        gastos = gastos.filter(periodo__gte=desde)
+    if hasta:
+        gastos = gastos.filter(periodo__lte=hasta)
+
+    filas = gastos.order_by('periodo', 'id_gasto').values_list(
+        'id_gasto', 'periodo', 'fecha_emision', 'fecha_venc', 'id_gasto_categ__nombre',
+        'id_proveedor__nombre', 'id_proveedor__rut_base', 'id_proveedor__rut_dv',
+        'id_doc_tipo__codigo', 'documento_folio', 'neto', 'iva', 'total',
+        'estado_validacion', 'descripcion',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    # RUT del proveedor en formato 12345678-9
+    filas = (
+        (*fila[:6], f"{fila[6]}-{fila[7]}" if fila[6] else '', *fila[8:])
+        for fila in filas
+    )
+
+    encabezados = [
+        'ID Gasto', 'Periodo', 'Fecha Emisión', 'Fecha Vencimiento', 'Categoría',
+        'Proveedor', 'RUT Proveedor', 'Tipo Documento', 'Folio', 'Neto', 'IVA', 'Total',
+        'Estado Validación', 'Descripción',
+    ]
+    return render_to_csv(filas, encabezados, _nombre_export('gastos', condominio, desde, hasta))
+
+# --- FIN: Exportaciones CSV ---
+
+
 # --- INICIO: Vistas de RRHH (Trabajadores y Remuneraciones) ---
 
 @login_required
@@ -287,12 +676,17 @@ def trabajadores_list_view(request, condominio_id):
     """
     Lista los trabajadores de un condominio.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
-    trabajadores = Trabajador.objects.filter(id_condominio=condominio)
+    condominio = request.condominio
+    # Orden alfabético paginado por cursor (cubierto por ix_trabajador_nombre)
+    pagina = paginar_keyset(
+        Trabajador.objects.filter(id_condominio=condominio), ('apellidos', 'nombres', 'id_trabajador'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    )
 
     contexto = {
         'condominio': condominio,
-        'trabajadores': trabajadores
+        'trabajadores': pagina,
+        'pagina': pagina,
     }
     return render(request, 'core/trabajadores_list.html', contexto)
 
@@ -302,7 +696,7 @@ def trabajador_create_view(request, condominio_id):
     """
     Vista para registrar un nuevo trabajador.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
+    condominio = request.condominio
 
     if request.method == 'POST':
         form = TrabajadorForm(request.POST)
@@ -327,13 +721,51 @@ def remuneraciones_list_view(request, condominio_id):
     """
     Lista las remuneraciones (sueldos) de un condominio.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
-    # Filtramos por trabajadores del condominio
-    remuneraciones = Remuneracion.objects.filter(id_trabajador__id_condominio=condominio).order_by('-periodo')
+    condominio = request.condominio
+    # Filtramos por trabajadores del condominio (subconsulta: usa el índice único
+    # trabajador + periodo + tipo de la tabla remuneracion)
+    trabajadores = Trabajador.objects.filter(id_condominio=condominio)
+    remuneraciones = Remuneracion.objects.filter(id_trabajador__in=trabajadores.values('id_trabajador'))
+
+    periodo = request.GET.get('periodo', '')
+    trabajador = request.GET.get('trabajador', '')
+    if periodo:
+        remuneraciones = remuneraciones.filter(periodo=periodo)
+    if trabajador.isdigit():
+        remuneraciones = remuneraciones.filter(id_trabajador_id=trabajador)
+
+    # select_related evita una consulta por fila para el trabajador y el método de pago
+    pagina = paginar_keyset(
+        remuneraciones.select_related('id_trabajador', 'id_metodo_pago'), ('-periodo', '-id_remuneracion'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    )
+
+    # Totales de planilla de los periodos visibles, en una sola consulta agrupada
+    totales = {
+        fila['periodo']: fila
+        for fila in remuneraciones.filter(periodo__in={r.periodo for r in pagina})
+                                  .values('periodo')
+                                  .annotate(
+                                      bruto=Sum('bruto'), imposiciones=Sum('imposiciones'),
+                                      descuentos=Sum('descuentos'), liquido=Sum('liquido'),
+                                      cantidad=Count('id_remuneracion'),
+                                  )
+                                  .order_by()
+    }
+    grupos = []
+    for remu in pagina:
+        if not grupos or grupos[-1]['periodo'] != remu.periodo:
+            grupos.append({**totales[remu.periodo], 'remuneraciones': []})
+        grupos[-1]['remuneraciones'].append(remu)
 
     contexto = {
         'condominio': condominio,
-        'remuneraciones': remuneraciones
+        'remuneraciones': pagina,
+        'grupos': grupos,
+        'pagina': pagina,
+        'trabajadores': trabajadores.order_by('apellidos', 'nombres'),
+        'periodo': periodo,
+        'trabajador': trabajador,
     }
     return render(request, 'core/remuneraciones_list.html', contexto)
 
@@ -343,7 +775,7 @@ def remuneracion_create_view(request, condominio_id):
     """
     Vista para registrar una nueva remuneración.
     """
-    condominio = get_object_or_404(Condominio, pk=condominio_id)
+    condominio = request.condominio
 
     if request.method == 'POST':
         form = RemuneracionForm(request.POST, condominio_id=condominio_id)
@@ -362,6 +794,51 @@ def remuneracion_create_view(request, condominio_id):
 
 # --- FIN: Vistas de RRHH ---
 
+# --- INICIO: Auditoría ---
+
+@staff_member_required
+def auditoria_list_view(request):
+    """
+    Registro de auditoría filtrable (entidad, id, acción, usuario y fechas), paginado por
+    cursor sobre (-created_at, -id_auditoria). Sin conteo total: cada página lee solo sus
+    filas por ix_auditoria_entidad, ix_auditoria_usuario o ix_auditoria_fecha.
+    """
+    filtros = {
+        campo: request.GET.get(campo, '').strip()
+        for campo in ('entidad', 'entidad_id', 'accion', 'usuario', 'desde', 'hasta')
+    }
+
+    registros = Auditoria.objects.all()
+    if filtros['entidad']:
+        registros = registros.filter(entidad=filtros['entidad'])
+        if filtros['entidad_id'].isdigit():
+            registros = registros.filter(entidad_id=int(filtros['entidad_id']))
+    if filtros['accion']:
+        registros = registros.filter(accion=filtros['accion'])
+    if filtros['usuario']:
+        registros = registros.filter(usuario_email=filtros['usuario'])
+    desde = _fecha_filtro(filtros['desde'])
+    hasta = _fecha_filtro(filtros['hasta'])
+    if desde:
+        registros = registros.filter(created_at__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        registros = registros.filter(created_at__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)))
+
+    pagina = paginar_keyset(
+        registros, ('-created_at', '-id_auditoria'),
+        cursor=request.GET.get('cursor'), tamano=settings.LIST_PAGE_SIZE
+    )
+
+    contexto = {
+        'registros': pagina,
+        'pagina': pagina,
+        'filtros': filtros,
+        'acciones': ['CREATE', 'UPDATE', 'DELETE'],
+    }
+    return render(request, 'core/auditoria_list.html', contexto)
+
+# --- FIN: Auditoría ---
+
 # --- INICIO: Vistas AJAX ---
 
 @login_required
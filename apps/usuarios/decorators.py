@@ -1,15 +1,72 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.shortcuts import redirect
 from django.core.exceptions import PermissionDenied
 
+# Clave de sesión con los condominios administrados (ver condominios_administrados)
+SESION_CONDOMINIOS = '_condominios_admin'
+
 def es_admin(user):
     return user.is_authenticated and user.tipo_usuario in ['super_admin', 'admin']
 
+def tiene_acceso_total(user):
+    """Superusuarios y super_admin administran todos los condominios."""
+    return user.is_superuser or user.tipo_usuario == 'super_admin'
+
+def condominios_administrados(request):
+    """
+    Ids de los condominios que administra el usuario (None = todos).
+    Se consultan una vez y quedan en la sesión junto a Usuario.version_permisos; como el
+    usuario ya viene cargado en cada petición, comparar la versión no cuesta consultas.
+    Si las membresías cambian (signals.py) la versión no coincide y se vuelven a leer.
+    """
+    user = request.user
+    if tiene_acceso_total(user):
+        return None
+    if not hasattr(request, '_condominios_admin'):
+        guardado = request.session.get(SESION_CONDOMINIOS)
+        if not guardado or guardado['usuario'] != user.pk or guardado['version'] != user.version_permisos:
+            from .models import UsuarioAdminCondo
+            guardado = {
+                'usuario': user.pk,
+                'version': user.version_permisos,
+                'ids': list(UsuarioAdminCondo.objects.filter(id_usuario=user).values_list('id_condominio', flat=True)),
+            }
+            request.session[SESION_CONDOMINIOS] = guardado
+        request._condominios_admin = frozenset(guardado['ids'])
+    return request._condominios_admin
+
+def _restringir_a_condominio(view_func):
+    """
+    Si la vista recibe `condominio_id`, exige que el usuario administre ese condominio.
+    """
+    def permitido(request, kwargs):
+        condominio_id = kwargs.get('condominio_id')
+        if condominio_id is None:
+            return True
+        ids = condominios_administrados(request)
+        return ids is None or int(condominio_id) in ids
+
+    if iscoroutinefunction(view_func):
+        async def _vista(request, *args, **kwargs):
+            if not await sync_to_async(permitido)(request, kwargs):
+                raise PermissionDenied
+            return await view_func(request, *args, **kwargs)
+    else:
+        def _vista(request, *args, **kwargs):
+            if not permitido(request, kwargs):
+                raise PermissionDenied
+            return view_func(request, *args, **kwargs)
+    return wraps(view_func)(_vista)
+
 def solo_admin(view_func=None, redirect_to_portal=False):
     """
     Decorador para restringir el acceso solo a administradores.
     Si redirect_to_portal es True, redirige al portal de residentes en lugar de 403.
+    En vistas con `condominio_id`, además exige que el usuario administre ese condominio.
     """
     if view_func is None:
         return lambda u: solo_admin(u, redirect_to_portal=redirect_to_portal)
@@ -24,7 +81,7 @@ def solo_admin(view_func=None, redirect_to_portal=False):
         raise PermissionDenied
 
     decorator = user_passes_test(check_user, login_url='portal_residente' if redirect_to_portal else None)
-    return decorator(view_func)
+    return decorator(_restringir_a_condominio(view_func))
 
 class AdminRequiredMixin(UserPassesTestMixin):
     """
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.usuarios.models import CodigoVerificacion
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina los códigos de verificación (2FA) vencidos en bloques, para no bloquear '
+        'la tabla con un único DELETE grande.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bloque', type=int, default=1000, help='Filas eliminadas por DELETE')
+
+    def handle(self, *args, **options):
+        # Por ix_otp_creado; el límite se fija al inicio para que el comando termine
+        vencidos = CodigoVerificacion.objects.filter(creado_at__lt=CodigoVerificacion.emitidos_desde())
+        total = 0
+        while True:
+            ids = list(vencidos.values_list('pk', flat=True)[:options['bloque']])
+            if not ids:
+                break
+            total += CodigoVerificacion.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Códigos vencidos eliminados: {total}.'))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_condominio_kpi'),
+        ('usuarios', '0004_codigoverificacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='copropietario',
+            index=models.Index(fields=['id_usuario', 'hasta', 'id_unidad'], name='ix_coprop_usuario'),
+        ),
+        migrations.AddIndex(
+            model_name='residencia',
+            index=models.Index(fields=['id_usuario', 'hasta', 'id_unidad'], name='ix_residencia_usuario'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0005_indices_portal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='notificaciones_no_leidas',
+            field=models.PositiveIntegerField(db_comment='Cantidad de notificaciones sin leer', default=0),
+        ),
+    ]
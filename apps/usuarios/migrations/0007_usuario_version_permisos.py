@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0006_usuario_notificaciones_no_leidas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='version_permisos',
+            field=models.PositiveIntegerField(db_comment='Versión de las membresías de administración del usuario', default=0),
+        ),
+    ]
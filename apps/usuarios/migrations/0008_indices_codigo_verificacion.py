@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0007_usuario_version_permisos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codigoverificacion',
+            index=models.Index(fields=['usuario', 'accion', 'codigo', 'creado_at'], name='ix_otp_verificacion'),
+        ),
+        migrations.AddIndex(
+            model_name='codigoverificacion',
+            index=models.Index(fields=['creado_at'], name='ix_otp_creado'),
+        ),
+    ]
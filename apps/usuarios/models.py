@@ -108,6 +108,18 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         auto_now_add=True,
         db_comment="Fecha de creación del registro"
     )
+    # Contador desnormalizado para el badge de avisos (lo mantienen
+    # core.services.crear_notificaciones / marcar_notificaciones_leidas)
+    notificaciones_no_leidas = models.PositiveIntegerField(
+        default=0,
+        db_comment="Cantidad de notificaciones sin leer"
+    )
+    # Sube cada vez que cambian sus condominios administrados (ver apps/usuarios/signals.py):
+    # invalida la lista cacheada en la sesión por decorators.condominios_administrados
+    version_permisos = models.PositiveIntegerField(
+        default=0,
+        db_comment="Versión de las membresías de administración del usuario"
+    )
     
     objects = UsuarioManager()
     USERNAME_FIELD = 'email'
@@ -214,6 +226,10 @@ class Copropietario(models.Model):
         db_table = 'copropietario'
         # Restricción del SQL
         unique_together = ('id_unidad', 'id_usuario', 'desde')
+        indexes = [
+            # Unidades activas de un usuario (portal de residentes)
+            models.Index(fields=['id_usuario', 'hasta', 'id_unidad'], name='ix_coprop_usuario'),
+        ]
         verbose_name = 'Copropietario'
         verbose_name_plural = 'Copropietarios'
 
@@ -268,6 +284,10 @@ class Residencia(models.Model):
         db_table = 'residencia'
         # Restricción del SQL
         unique_together = ('id_unidad', 'id_usuario', 'desde')
+        indexes = [
+            # Unidades activas de un usuario (portal de residentes)
+            models.Index(fields=['id_usuario', 'hasta', 'id_unidad'], name='ix_residencia_usuario'),
+        ]
         verbose_name = 'Residente'
         verbose_name_plural = 'Residentes'
 
@@ -288,17 +308,26 @@ class CodigoVerificacion(models.Model):
     accion = models.CharField(max_length=50) # ej: 'perfil_update'
     creado_at = models.DateTimeField(auto_now_add=True)
 
-    def es_valido(self):
+    @staticmethod
+    def emitidos_desde():
+        """Fecha de emisión más antigua que sigue vigente (OTP_VALIDEZ_MINUTOS)."""
         # Importación tardía para evitar circular imports si los hubiera
         from django.utils import timezone
         import datetime
 
-        # 10 minutos de validez
-        expiracion = self.creado_at + datetime.timedelta(minutes=10)
-        return timezone.now() <= expiracion
+        return timezone.now() - datetime.timedelta(minutes=settings.OTP_VALIDEZ_MINUTOS)
+
+    def es_valido(self):
+        return self.creado_at >= self.emitidos_desde()
 
     class Meta:
         db_table = 'codigo_verificacion'
+        indexes = [
+            # Verificación: el código vigente de un usuario para una acción (verify_otp_view)
+            models.Index(fields=['usuario', 'accion', 'codigo', 'creado_at'], name='ix_otp_verificacion'),
+            # Purga de vencidos (manage.py purgar_otp)
+            models.Index(fields=['creado_at'], name='ix_otp_creado'),
+        ]
         verbose_name = 'Código de Verificación'
         verbose_name_plural = 'Códigos de Verificación'
 
@@ -0,0 +1,16 @@
+# apps/usuarios/signals.py
+"""
+Invalida la lista de condominios administrados que cada sesión guarda en caché
+(decorators.condominios_administrados): cualquier alta o baja de UsuarioAdminCondo sube
+Usuario.version_permisos y la sesión la recarga en la siguiente petición.
+"""
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Usuario, UsuarioAdminCondo
+
+
+@receiver([post_save, post_delete], sender=UsuarioAdminCondo)
+def _membresia_modificada(sender, instance, **kwargs):
+    Usuario.objects.filter(pk=instance.id_usuario_id).update(version_permisos=F('version_permisos') + 1)
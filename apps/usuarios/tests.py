@@ -1,8 +1,17 @@
-from django.test import TestCase, Client
+from datetime import timedelta
+from io import StringIO
+
+from django.test import TestCase, Client, override_settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core import mail
-from .models import CodigoVerificacion
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core.models import CorreoSaliente
+from .models import CodigoVerificacion, UsuarioAdminCondo
 
 Usuario = get_user_model()
 
@@ -64,6 +73,35 @@ class PerfilUpdateTests(TestCase):
         self.assertIn('pending_password_update', session)
         self.assertEqual(session['pending_password_update'], 'newpassword123')
 
+    def test_otp_se_encola_y_lo_envia_el_worker(self):
+        """
+        El código no se envía dentro de la petición: queda en la bandeja de salida.
+        """
+        self.client.post(reverse('user_profile'), {
+            'nombres': 'Juan Updated',
+            'apellidos': 'Perez',
+            'email': 'test@example.com'
+        })
+        self.assertEqual(len(mail.outbox), 0)
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual(correo.destinatarios, ['test@example.com'])
+
+        call_command('enviar_correos', stdout=StringIO())
+        otp = CodigoVerificacion.objects.get(usuario=self.user, accion='perfil_update')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(otp.codigo, mail.outbox[0].body)
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, 'enviado')
+
+    @override_settings(OTP_VALIDEZ_MINUTOS=5)
+    def test_correo_otp_indica_la_validez_configurada(self):
+        self.client.post(reverse('user_profile'), {
+            'nombres': 'Juan Updated',
+            'apellidos': 'Perez',
+            'email': 'test@example.com'
+        })
+        self.assertIn('Expira en 5 minutos', CorreoSaliente.objects.get().cuerpo)
+
     def test_no_change_does_not_trigger_2fa(self):
         """
         Submitting same data should not trigger 2FA.
@@ -81,3 +119,78 @@ class PerfilUpdateTests(TestCase):
         # No OTP generated
         otp = CodigoVerificacion.objects.filter(usuario=self.user, accion='perfil_update').count()
         self.assertEqual(otp, 0)
+
+
+@override_settings(OTP_MAX_INTENTOS=3)
+class VerificacionOTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Usuario.objects.create_user(
+            email='otp@example.com', password='password123',
+            rut_base=3, rut_dv='5', nombres='Ana', apellidos='Rojas'
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse('user_profile'), {
+            'nombres': 'Ana María', 'apellidos': 'Rojas', 'email': 'otp@example.com'
+        })
+        self.otp = CodigoVerificacion.objects.get(usuario=self.user)
+
+    def _verificar(self, codigo):
+        return self.client.post(reverse('verify_otp'), {'codigo': codigo})
+
+    def test_bloqueo_tras_intentos_fallidos(self):
+        incorrecto = '000000' if self.otp.codigo != '000000' else '111111'
+        for _ in range(3):
+            self.assertContains(self._verificar(incorrecto), 'Código inválido o expirado')
+
+        # Bloqueado: ni el código correcto pasa, y no se consulta la tabla
+        with CaptureQueriesContext(connection) as consultas:
+            response = self._verificar(self.otp.codigo)
+        self.assertContains(response, 'Demasiados intentos')
+        self.assertFalse(any('codigo_verificacion' in q['sql'] for q in consultas.captured_queries))
+
+        cache.clear()
+        self.assertRedirects(self._verificar(self.otp.codigo), reverse('user_profile'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.nombres, 'Ana María')
+
+    def test_codigo_vencido_rechazado_y_purgado(self):
+        vencido = timezone.now() - timedelta(minutes=11)
+        CodigoVerificacion.objects.filter(pk=self.otp.pk).update(creado_at=vencido)
+        self.assertContains(self._verificar(self.otp.codigo), 'Código inválido o expirado')
+
+        CodigoVerificacion.objects.create(usuario=self.user, codigo='123456', accion='perfil_update')
+        call_command('purgar_otp', bloque=1, stdout=StringIO())
+        self.assertEqual(list(CodigoVerificacion.objects.values_list('codigo', flat=True)), ['123456'])
+
+
+class CondominioAccesoTests(TestCase):
+    def setUp(self):
+        from apps.core.models import Condominio
+        self.propio = Condominio.objects.create(nombre="Condo Propio")
+        self.ajeno = Condominio.objects.create(nombre="Condo Ajeno")
+        self.admin = Usuario.objects.create_user(
+            email='admin@condo.com', password='password123', rut_base=2, rut_dv='7',
+            nombres='Admin', apellidos='Condo', tipo_usuario='admin'
+        )
+        UsuarioAdminCondo.objects.create(id_usuario=self.admin, id_condominio=self.propio)
+        self.client.force_login(self.admin)
+
+    def _url(self, condominio):
+        return reverse('gastos_list', kwargs={'condominio_id': condominio.pk})
+
+    def test_solo_condominios_administrados_con_membresias_en_sesion(self):
+        self.assertEqual(self.client.get(self._url(self.propio)).status_code, 200)
+        self.assertEqual(self.client.get(self._url(self.ajeno)).status_code, 403)
+
+        # Ya cacheadas en la sesión: no se vuelve a consultar usuario_admin_condo
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self._url(self.propio))
+        self.assertFalse(any('usuario_admin_condo' in q['sql'] for q in consultas.captured_queries))
+
+        # Una nueva membresía invalida la lista cacheada
+        UsuarioAdminCondo.objects.create(id_usuario=self.admin, id_condominio=self.ajeno)
+        self.assertEqual(self.client.get(self._url(self.ajeno)).status_code, 200)
+
+        UsuarioAdminCondo.objects.filter(id_condominio=self.propio).delete()
+        self.assertEqual(self.client.get(self._url(self.propio)).status_code, 403)
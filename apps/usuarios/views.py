@@ -2,14 +2,15 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django.contrib import messages
-from django.utils.crypto import get_random_string
-from django.core.mail import send_mail
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 from django.urls import reverse_lazy
 import random  # Agregado por seguridad según checklist (aunque usamos get_random_string)
 
+from apps.core.services import encolar_correo
 from .models import CodigoVerificacion
 from .forms import UserProfileForm, OTPVerificationForm
 from .decorators import es_admin
@@ -49,17 +50,12 @@ def perfil_update_view(request):
                 )
 
                 # Send Email
-                print(f"*** 2FA CODE FOR PASSWORD CHANGE {request.user.email}: {otp} ***")
-                try:
-                    send_mail(
-                        'Código de Verificación - Cambio de Contraseña',
-                        f'Tu código es: {otp}. Expira en 10 minutos.',
-                        settings.DEFAULT_FROM_EMAIL or 'noreply@condogestion.cl',
-                        [request.user.email],
-                        fail_silently=True,
-                    )
-                except Exception:
-                    pass
+                # Queda en la bandeja de salida; lo envía el comando enviar_correos
+                encolar_correo(
+                    'Código de Verificación - Cambio de Contraseña',
+                    f'Tu código es: {otp}. Expira en {settings.OTP_VALIDEZ_MINUTOS} minutos.',
+                    [request.user.email],
+                )
 
                 messages.info(request, f'Se ha enviado un código de verificación a {request.user.email}.')
                 return redirect('verify_otp')
@@ -87,17 +83,12 @@ def perfil_update_view(request):
                     )
 
                     # Send Email
-                    print(f"*** 2FA CODE FOR PROFILE UPDATE {request.user.email}: {otp} ***")
-                    try:
-                        send_mail(
-                            'Código de Verificación - Actualización Perfil',
-                            f'Tu código es: {otp}. Expira en 10 minutos.',
-                            settings.DEFAULT_FROM_EMAIL or 'noreply@condogestion.cl',
-                            [request.user.email],
-                            fail_silently=True,
-                        )
-                    except Exception:
-                        pass
+                    # Queda en la bandeja de salida; lo envía el comando enviar_correos
+                    encolar_correo(
+                        'Código de Verificación - Actualización Perfil',
+                        f'Tu código es: {otp}. Expira en {settings.OTP_VALIDEZ_MINUTOS} minutos.',
+                        [request.user.email],
+                    )
 
                     messages.info(request, f'Se ha enviado un código de verificación a {request.user.email}.')
                     return redirect('verify_otp')
@@ -112,6 +103,25 @@ def perfil_update_view(request):
         'password_form': password_form
     })
 
+def _clave_intentos_otp(user):
+    return f'otp_intentos:{user.pk}'
+
+def _otp_bloqueado(user):
+    return cache.get(_clave_intentos_otp(user), 0) >= settings.OTP_MAX_INTENTOS
+
+def _registrar_fallo_otp(user):
+    """
+    Suma un intento fallido. El contador se crea con el primer fallo y expira solo
+    (OTP_BLOQUEO_SEGUNDOS), así el bloqueo no necesita limpieza.
+    """
+    clave = _clave_intentos_otp(user)
+    cache.add(clave, 0, timeout=settings.OTP_BLOQUEO_SEGUNDOS)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # Expiró entre add() e incr()
+        cache.set(clave, 1, timeout=settings.OTP_BLOQUEO_SEGUNDOS)
+
 @login_required
 def verify_otp_view(request):
     pending_profile = request.session.get('pending_profile_update')
@@ -124,53 +134,52 @@ def verify_otp_view(request):
     if request.method == 'POST':
         form = OTPVerificationForm(request.POST)
         if form.is_valid():
-            code = form.cleaned_data['codigo']
-
-            # Verify code
-            # Check for password update first (priority or just logic)
-            if pending_password:
-                verification = CodigoVerificacion.objects.filter(
-                    usuario=request.user,
-                    accion='password_update',
-                    codigo=code
-                ).order_by('-creado_at').first()
-
-                if verification and verification.es_valido():
-                    user = request.user
-                    user.set_password(pending_password)
-                    user.save()
-                    update_session_auth_hash(request, user) # Keep logged in
-
-                    # Clean up
-                    del request.session['pending_password_update']
-                    verification.delete()
-
-                    messages.success(request, 'Contraseña actualizada exitosamente.')
-                    return redirect('user_profile')
-
-            # Check profile update
-            if pending_profile:
-                verification = CodigoVerificacion.objects.filter(
-                    usuario=request.user,
-                    accion='perfil_update',
-                    codigo=code
-                ).order_by('-creado_at').first()
-
-                if verification and verification.es_valido():
-                    data = pending_profile
-                    user = request.user
-                    user.nombres = data.get('nombres', user.nombres)
-                    user.apellidos = data.get('apellidos', user.apellidos)
-                    user.email = data.get('email', user.email)
-                    user.save()
-
-                    # Clean up
-                    del request.session['pending_profile_update']
-                    verification.delete()
-
-                    messages.success(request, 'Perfil actualizado exitosamente.')
-                    return redirect('user_profile')
-
+            if _otp_bloqueado(request.user):
+                messages.error(request, 'Demasiados intentos fallidos. Intenta nuevamente en unos minutos.')
+                return render(request, 'usuarios/verificar_otp.html', {'form': form})
+
+            # Una sola consulta por el índice ix_otp_verificacion; los vencidos quedan fuera
+            acciones = [accion for accion, pendiente in (
+                ('password_update', pending_password), ('perfil_update', pending_profile)
+            ) if pendiente]
+            verification = CodigoVerificacion.objects.filter(
+                usuario=request.user,
+                accion__in=acciones,
+                codigo=form.cleaned_data['codigo'],
+                creado_at__gte=CodigoVerificacion.emitidos_desde(),
+            ).order_by('-creado_at').first()
+
+            if verification and verification.accion == 'password_update':
+                user = request.user
+                user.set_password(pending_password)
+                user.save()
+                update_session_auth_hash(request, user) # Keep logged in
+
+                # Clean up
+                del request.session['pending_password_update']
+                verification.delete()
+                cache.delete(_clave_intentos_otp(user))
+
+                messages.success(request, 'Contraseña actualizada exitosamente.')
+                return redirect('user_profile')
+
+            if verification:
+                data = pending_profile
+                user = request.user
+                user.nombres = data.get('nombres', user.nombres)
+                user.apellidos = data.get('apellidos', user.apellidos)
+                user.email = data.get('email', user.email)
+                user.save()
+
+                # Clean up
+                del request.session['pending_profile_update']
+                verification.delete()
+                cache.delete(_clave_intentos_otp(user))
+
+                messages.success(request, 'Perfil actualizado exitosamente.')
+                return redirect('user_profile')
+
+            _registrar_fallo_otp(request.user)
             messages.error(request, 'Código inválido o expirado.')
     else:
         form = OTPVerificationForm()
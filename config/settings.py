@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,9 +41,13 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'apps.core',
     'apps.usuarios',
-    'django_extensions',
 ]
 
+# django_extensions es solo una herramienta de desarrollo (no está en requirements.txt):
+# se carga únicamente si está instalada.
+if importlib.util.find_spec('django_extensions'):
+    INSTALLED_APPS.append('django_extensions')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.middleware.CondominioMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -68,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.core.context_processors.condominio',
             ],
         },
     },
@@ -142,4 +150,115 @@ LOGIN_REDIRECT_URL = '/'
 
 # A dónde redirigir al usuario si intenta acceder a una página
 # protegida sin haber iniciado sesión.
-LOGIN_URL = '/auth/login/'
\ No newline at end of file
+LOGIN_URL = '/auth/login/'
+
+# --- Correo ---
+# Por defecto los correos se escriben en la consola; en producción se define EMAIL_BACKEND
+# (ej: django.core.mail.backends.smtp.EmailBackend) y los EMAIL_HOST/PORT/USER/PASSWORD.
+# Con 'django.core.mail.backends.filebased.EmailBackend' quedan en EMAIL_FILE_PATH.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 30  # segundos
+EMAIL_FILE_PATH = BASE_DIR / 'var' / 'correos'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@condogestion.cl')
+
+# Bandeja de salida (apps/core/services.enviar_correos_pendientes, manage.py enviar_correos)
+EMAIL_OUTBOX_BATCH_SIZE = 100  # correos por conexión
+EMAIL_OUTBOX_MAX_INTENTOS = 5  # luego queda 'fallido'
+EMAIL_OUTBOX_BACKOFF = 60  # segundos antes del primer reintento; se duplica en cada fallo
+EMAIL_OUTBOX_BACKOFF_MAX = 60 * 60
+# Un lote queda reservado para el worker que lo tomó durante (correos + 1) × EMAIL_TIMEOUT
+# más este margen en segundos (ver services.enviar_correos_pendientes)
+EMAIL_OUTBOX_RESERVA = 5 * 60
+
+# --- Auditoría (apps/core/auditoria.py) ---
+# Las entradas de una transacción se insertan juntas al hacer commit. Con
+# AUDITORIA_SINCRONA se escriben al instante dentro de la transacción del llamador.
+AUDITORIA_SINCRONA = False
+AUDITORIA_BATCH_SIZE = 500
+
+# --- Archivo histórico (apps/core/archivo.py, manage.py archivar) ---
+# Filas más antiguas que la retención se mueven a ARCHIVO_DIR/<tabla>/<AAAA-MM>.jsonl.gz
+ARCHIVO_DIR = BASE_DIR / 'var' / 'archivo'
+AUDITORIA_RETENCION_DIAS = 365
+NOTIFICACION_RETENCION_DIAS = 180
+
+# --- Códigos de verificación (2FA) ---
+OTP_VALIDEZ_MINUTOS = 10
+# Intentos fallidos permitidos antes de bloquear la verificación; el contador vive en la
+# caché y se reinicia OTP_BLOQUEO_SEGUNDOS después del primer fallo
+OTP_MAX_INTENTOS = 5
+OTP_BLOQUEO_SEGUNDOS = 15 * 60
+
+# --- Caché ---
+# Con REDIS_URL la caché es compartida entre procesos (necesario en producción para que las
+# invalidaciones lleguen a todos los workers). Sin ella se usa memoria local del proceso.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Fragmentos de plantilla ({% cache %} en los listados): siempre en memoria local, con
+# contadores de aciertos/fallos (apps/core/cache.py). Las claves incluyen
+# Condominio.version_datos, así que un cambio de datos las deja obsoletas sin borrarlas;
+# la duración se fija en cada {% cache %} y MAX_ENTRIES acota la memoria.
+CACHES['fragmentos'] = {
+    'BACKEND': 'apps.core.cache.LocMemCacheConMetricas',
+    'LOCATION': 'fragmentos',
+    'OPTIONS': {'MAX_ENTRIES': 2000},
+}
+
+# Condominio de la petición (apps/core/middleware.py): segundos que una instancia
+# cacheada sirve en otros procesos antes de volver a leerse
+CONDOMINIO_CACHE_TTL = 30
+
+# Portal de residentes (apps/core/services.portal_residente)
+PORTAL_CACHE_TIMEOUT = 10 * 60  # segundos; se invalida antes ante pagos y cierres
+PORTAL_HISTORIAL = 12  # cobros y pagos recientes por unidad
+
+# --- Listados ---
+# Filas por página en los listados paginados por cursor (apps/core/utils.paginar_keyset)
+LIST_PAGE_SIZE = 30
+# API JSON (apps/core/api.py): filas por defecto y máximo aceptado en ?limit=
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# --- Caché de PDFs (apps/core/utils.render_to_pdf) ---
+# Directorio local donde se guardan los PDFs ya generados, direccionados por hash.
+PDF_CACHE_DIR = BASE_DIR / 'var' / 'pdf_cache'
+
+# Tamaño máximo del directorio; al superarlo se eliminan los PDFs menos usados (LRU).
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Procesos usados para generar lotes de PDFs (ej: avisos de cobro por unidad).
+# Con 1 se renderiza en el mismo proceso, sin pool.
+PDF_BATCH_WORKERS = os.cpu_count() or 1
+
+# Hojas de estilo comunes de las plantillas PDF; se parsean una vez por proceso.
+PDF_STYLESHEETS = [BASE_DIR / 'apps' / 'core' / 'static' / 'core' / 'pdf.css']
+
+# Filas por bloque al maquetar documentos largos (render_to_pdf con chunk_field)
+PDF_CHUNK_SIZE = 500
+
+# Worker persistente de PDFs (manage.py pdf_worker). Si PDF_RENDER_SOCKET está vacío,
+# los PDFs se renderizan dentro del proceso web.
+PDF_RENDER_SOCKET = os.environ.get('PDF_RENDER_SOCKET', '')
+PDF_RENDER_WORKERS = 2
+PDF_RENDER_TIMEOUT = 60  # segundos
+
+# --- Presupuesto de arranque (manage.py medir_arranque) ---
+# Módulos pesados que no deben importarse al arrancar el proceso web.
+STARTUP_FORBIDDEN_MODULES = ['weasyprint', 'zipfile']